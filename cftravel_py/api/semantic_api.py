@@ -34,17 +34,12 @@ class KeywordSearchService:
     """
 
     def __init__(self):
-        from data.data_processor import DataProcessor
+        from data.data_processor import DataProcessor, get_data_processor
         from pathlib import Path as _Path
 
         # Default to asia data file; gracefully handle absence
         default_json = _Path(__file__).parent.parent / "data" / "asia" / "data.json"
-        self.data_processor = DataProcessor(str(default_json)) if default_json.exists() else DataProcessor()
-        if default_json.exists():
-            try:
-                self.data_processor.load_offers(str(default_json))
-            except Exception:
-                pass
+        self.data_processor = get_data_processor(str(default_json)) if default_json.exists() else DataProcessor()
 
     def search(self, query: str, top_k: int = 10, threshold: float = 0.0) -> List[Dict[str, Any]]:
         results = self.data_processor._basic_text_search(query, top_k)
@@ -89,8 +84,8 @@ async def lifespan(app: FastAPI):
             logger.info("✅ Keyword Search Service initialized successfully")
         else:
             logger.info("🚀 Initializing Optimized Semantic Search Service...")
-            from services.optimized_semantic_service import OptimizedSemanticService
-            semantic_service = OptimizedSemanticService()
+            from services.optimized_semantic_service import get_semantic_service
+            semantic_service = get_semantic_service()
             logger.info("✅ Semantic Search Service initialized successfully")
     except Exception as e:
         # Fallback to keyword engine instead of failing to start
@@ -191,7 +186,7 @@ async def semantic_search(request: SearchRequest):
         raise HTTPException(status_code=503, detail="Service not initialized")
     
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Perform search
         if request.context:
@@ -207,7 +202,7 @@ async def semantic_search(request: SearchRequest):
                 request.threshold
             )
         
-        search_time = time.time() - start_time
+        search_time = time.perf_counter() - start_time
         
         return SearchResponse(
             success=True,
@@ -229,12 +224,12 @@ async def chat(request: ChatMessageRequest):
         raise HTTPException(status_code=503, detail="Service not initialized")
     
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         if request.context:
             results = semantic_service.search_with_context(request.message, request.context, request.top_k)
         else:
             results = semantic_service.search(request.message, request.top_k)
-        search_time = time.time() - start_time
+        search_time = time.perf_counter() - start_time
         return SearchResponse(
             success=True,
             query=request.message,
@@ -260,7 +255,7 @@ async def search_get(
         raise HTTPException(status_code=503, detail="Service not initialized")
     
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Perform search
         if context:
@@ -268,7 +263,7 @@ async def search_get(
         else:
             results = semantic_service.search(query, top_k, threshold)
         
-        search_time = time.time() - start_time
+        search_time = time.perf_counter() - start_time
         
         return SearchResponse(
             success=True,
@@ -294,12 +289,12 @@ async def find_similar_offers(
         raise HTTPException(status_code=503, detail="Service not initialized")
     
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Find similar offers
         results = semantic_service.get_similar_offers(offer_id, top_k)
         
-        search_time = time.time() - start_time
+        search_time = time.perf_counter() - start_time
         
         return SearchResponse(
             success=True,
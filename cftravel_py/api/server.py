@@ -8,7 +8,6 @@ from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-import json
 import asyncio
 import logging
 import time
@@ -21,6 +20,7 @@ from core.exceptions import create_error_response, AgentError, APIKeyError, APIT
 from pipelines.enhanced_modular_pipeline import EnhancedASIAModularPipeline
 from services.memory_service import MemoryService
 from services.backup_model_service import backup_model_service
+from services.llm_service import token_sink
 
 # Import settings API
 from api.settings_api import router as settings_router
@@ -37,6 +37,7 @@ app.include_router(settings_router)
 
 # Import unified configuration
 from core.unified_config import unified_config
+from core.json_utils import dumps
 
 # Add CORS middleware using unified configuration
 try:
@@ -76,6 +77,7 @@ except Exception as e:
 _pipeline = None
 _memory_service = None
 _templates = None
+_preload_task = None
 
 def get_pipeline():
     """Lazy load the enhanced pipeline only when needed"""
@@ -108,15 +110,36 @@ async def startup_event():
     """Fast startup - only initialize essential components"""
     logger.info("🚀 Starting ASIA.fr Agent initialization...")
     
+    global _preload_task
+    
     # Initialize memory service immediately (needed for clear endpoints)
     get_memory_service()
     
+    # Load the embedding model and offer embeddings in the background, so the
+    # first chat request doesn't pay for them
+    if os.getenv('PRELOAD_PIPELINE', 'true').lower() == 'true':
+        # Keep a reference: the event loop only holds tasks weakly
+        _preload_task = asyncio.create_task(_preload_pipeline())
+    
     logger.info("✅ Server startup complete")
 
+async def _preload_pipeline():
+    try:
+        await get_pipeline().initialize()
+    except Exception as e:
+        logger.warning(f"⚠️ Pipeline preload failed, it will be retried on the first request: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("🛑 Shutting down ASIA.fr Agent...")
+    
+    if _preload_task is not None and not _preload_task.done():
+        _preload_task.cancel()
+        try:
+            await _preload_task
+        except asyncio.CancelledError:
+            pass
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -244,10 +267,34 @@ async def chat_stream(request: Request):
         async def generate_stream():
             """Generate enhanced streaming response with intelligent orchestration"""
             try:
-                # Process the message with enhanced features
-                result = await pipeline.process_user_input(user_message, conversation_id)
+                # Generated response text is forwarded as the LLM streams it
+                token_queue: asyncio.Queue = asyncio.Queue()
+                
+                async def run_pipeline():
+                    token_sink.set(token_queue.put_nowait)
+                    try:
+                        return await pipeline.process_user_input(user_message, conversation_id)
+                    finally:
+                        token_queue.put_nowait(None)
+                
+                pipeline_task = asyncio.create_task(run_pipeline())
+                streamed = False
+                finished = False
+                while not finished and (chunk := await token_queue.get()) is not None:
+                    streamed = True
+                    # Tokens that queued up while the previous event was written go out in one event
+                    parts = [chunk]
+                    while not token_queue.empty():
+                        token = token_queue.get_nowait()
+                        if token is None:
+                            finished = True
+                            break
+                        parts.append(token)
+                    yield f"data: {dumps({'type': 'content', 'chunk': ''.join(parts)})}\n\n"
                 
-                # Send enhanced metadata first
+                result = await pipeline_task
+                
+                # Send enhanced metadata
                 metadata = {
                     "type": "metadata",
                     "enhanced": True,
@@ -257,7 +304,7 @@ async def chat_stream(request: Request):
                     "budget_processed": result.get("budget_processed", False),
                     "date_processed": result.get("date_processed", False)
                 }
-                yield f"data: {json.dumps(metadata)}\n\n"
+                yield f"data: {dumps(metadata)}\n\n"
                 
                 # Extract response text
                 response_text = result.get("response", "") if isinstance(result, dict) else str(result)
@@ -266,38 +313,27 @@ async def chat_stream(request: Request):
                 if isinstance(result, dict) and result.get("offers"):
                     # Send enhanced offers data
                     offers = result["offers"]
-                    yield f"data: {json.dumps({'type': 'offers', 'offers': [offer.model_dump() if hasattr(offer, 'model_dump') else offer for offer in offers], 'match_scores': result.get('match_scores', []), 'budget_indicators': result.get('budget_indicators', []), 'llm_selected': result.get('llm_selected', False), 'confidence': result.get('confidence', 'medium')})}\n\n"
+                    yield f"data: {dumps({'type': 'offers', 'offers': [offer.model_dump() if hasattr(offer, 'model_dump') else offer for offer in offers], 'match_scores': result.get('match_scores', []), 'budget_indicators': result.get('budget_indicators', []), 'llm_selected': result.get('llm_selected', False), 'confidence': result.get('confidence', 'medium')})}\n\n"
                     
                     # For offers, send a short intro message only
                     intro_message = "Parfait ! J'ai analysé toutes les offres disponibles dans notre base de données et sélectionné les 3 meilleures options qui correspondent à vos critères :"
-                    yield f"data: {json.dumps({'type': 'content', 'chunk': intro_message})}\n\n"
+                    yield f"data: {dumps({'type': 'content', 'chunk': intro_message})}\n\n"
                     
                     # Send end marker immediately after offers
-                    yield f"data: {json.dumps({'type': 'end'})}\n\n"
+                    yield f"data: {dumps({'type': 'end'})}\n\n"
                     return
                 
-                # Stream the response text (only if no offers)
-                words = response_text.split()
-                for i, word in enumerate(words):
-                    # Add space before word (except first word)
-                    if i > 0:
-                        yield f"data: {json.dumps({'type': 'content', 'chunk': ' ' + word})}\n\n"
-                    else:
-                        yield f"data: {json.dumps({'type': 'content', 'chunk': word})}\n\n"
-                    
-                    # Optimized delays for faster response
-                    if i < len(words) - 1:  # Don't delay after the last word
-                        # Faster delays for better performance
-                        delay = min(0.02 + (len(word) * 0.005), 0.08)  # Between 0.02 and 0.08 seconds
-                        
-                        # Minimal delay after punctuation for natural flow
-                        if word.endswith(('.', '!', '?', ':', ';')):
-                            delay += 0.05
-                        
-                        await asyncio.sleep(delay)
+                if streamed:
+                    yield f"data: {dumps({'type': 'end'})}\n\n"
+                    return
+                
+                # Responses that were not generated by a streaming call (fallbacks, errors)
+                # are already complete, send them at once rather than replaying them word by word
+                if response_text:
+                    yield f"data: {dumps({'type': 'content', 'chunk': response_text})}\n\n"
                 
                 # Send end marker
-                yield f"data: {json.dumps({'type': 'end'})}\n\n"
+                yield f"data: {dumps({'type': 'end'})}\n\n"
                 
             except Exception as e:
                 logger.error(f"❌ Error in enhanced streaming: {e}")
@@ -306,8 +342,8 @@ async def chat_stream(request: Request):
                     "type": "error",
                     "error_data": error_response
                 }
-                yield f"data: {json.dumps(error_chunk)}\n\n"
-                yield f"data: {json.dumps({'type': 'end'})}\n\n"
+                yield f"data: {dumps(error_chunk)}\n\n"
+                yield f"data: {dumps({'type': 'end'})}\n\n"
         
         return StreamingResponse(
             generate_stream(),
@@ -516,15 +552,20 @@ async def test_specific_model_type(model_type: str):
         primary_config = backup_model_service.get_model_config(model_type)
         backup_models = backup_model_service.get_backup_models(model_type)
         
+        primary_status, *backup_statuses = await asyncio.gather(
+            backup_model_service.test_model(primary_config),
+            *(backup_model_service.test_model(backup) for backup in backup_models)
+        )
+        
         results = {
             "model_type": model_type,
-            "primary": await backup_model_service.test_model(primary_config),
-            "backups": {}
+            "primary": primary_status,
+            "backups": {
+                f"backup_{backup.get('priority', 'unknown')}": status
+                for backup, status in zip(backup_models, backup_statuses)
+            }
         }
         
-        for backup in backup_models:
-            results["backups"][f"backup_{backup.get('priority', 'unknown')}"] = await backup_model_service.test_model(backup)
-        
         return {
             "status": "success",
             "test_results": results
@@ -540,7 +581,6 @@ if static_dir.exists():
 
 if __name__ == "__main__":
     import uvicorn
-    import os
     
     # Get server configuration from unified config
     server_config = unified_config.get_server('backend')
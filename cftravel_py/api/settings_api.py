@@ -179,16 +179,8 @@ async def get_system_status():
 async def apply_setting_to_system(setting_id: str, value: Any):
     """Apply a setting to the actual system"""
     try:
-        # Import services here to avoid circular imports
-        from services.llm_service import LLMService
-        from services.memory_service import MemoryService
-        from services.optimized_semantic_service import OptimizedSemanticService
-        
-        # Get service instances (you might want to use dependency injection)
-        llm_service = LLMService()
-        memory_service = MemoryService()
-        semantic_service = OptimizedSemanticService()
-        
+        # Services are imported and built only by the settings that use them: the semantic
+        # service loads the embedding model and offer index, far too much for a debug toggle
         # Apply settings based on ID
         if setting_id == "debug-toggle":
             # Enable/disable general debug mode
@@ -196,7 +188,8 @@ async def apply_setting_to_system(setting_id: str, value: Any):
             
         elif setting_id == "llm-debug-toggle":
             # Enable/disable LLM debug mode
-            llm_service.debug_mode = value
+            from services.llm_service import LLMService
+            LLMService().debug_mode = value
             
         elif setting_id == "pipeline-debug-toggle":
             # Enable/disable pipeline debug mode
@@ -210,11 +203,13 @@ async def apply_setting_to_system(setting_id: str, value: Any):
             
         elif setting_id == "semantic-debug-toggle":
             # Enable/disable semantic search debug mode
-            semantic_service.debug_mode = value
+            from services.optimized_semantic_service import get_semantic_service
+            get_semantic_service().debug_mode = value
             
         elif setting_id == "memory-debug-toggle":
             # Enable/disable memory service debug mode
-            memory_service.debug_mode = value
+            from services.memory_service import MemoryService
+            MemoryService().debug_mode = value
             
         elif setting_id == "streaming-speed":
             # Update streaming speed (affects chat responses)
@@ -227,7 +222,8 @@ async def apply_setting_to_system(setting_id: str, value: Any):
             
         elif setting_id == "semantic-toggle":
             # Enable/disable semantic search
-            semantic_service.enabled = value
+            from services.optimized_semantic_service import get_semantic_service
+            get_semantic_service().enabled = value
             
         elif setting_id == "pipeline-toggle":
             # Enable/disable enhanced pipeline
@@ -261,7 +257,8 @@ async def apply_setting_to_system(setting_id: str, value: Any):
             
         elif setting_id == "memory-toggle":
             # Enable/disable conversation memory
-            memory_service.enabled = value
+            from services.memory_service import MemoryService
+            MemoryService().enabled = value
             
         elif setting_id == "experimental-toggle":
             # Enable/disable experimental features
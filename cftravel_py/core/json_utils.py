@@ -0,0 +1,146 @@
+"""
+JSON helpers for parsing LLM responses
+"""
+
+import json
+import mmap
+import os
+import re
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*|\s*```')
+# Only the characters that matter to the scan, so we skip over plain text in C
+_JSON_TOKEN_RE = re.compile(r'[{}\[\]"\\]')
+
+_CLOSING = {'{': '}', '[': ']'}
+
+# Below this length the regex token scan wins, numba dispatch and the UTF-8 encode cost more
+_NATIVE_SCAN_MIN_LENGTH = 4096
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True)
+    def _scan_span_end(data, start, open_byte, close_byte):
+        """Index of the byte closing the bracket at start, -1 if unbalanced"""
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, data.shape[0]):
+            byte = data[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif byte == 92:  # backslash
+                    escaped = True
+                elif byte == 34:  # quote
+                    in_string = False
+            elif byte == 34:
+                in_string = True
+            elif byte == open_byte:
+                depth += 1
+            elif byte == close_byte:
+                depth -= 1
+                if depth == 0:
+                    return i
+        return -1
+
+def _find_json_span_native(text: str, open_char: str) -> Optional[str]:
+    # Brackets, quotes and backslashes are ASCII and never occur inside multi-byte
+    # UTF-8 sequences, so the scan can run over the encoded bytes
+    data = text.encode('utf-8')
+    start = data.find(open_char.encode())
+    if start == -1:
+        return None
+    end = _scan_span_end(np.frombuffer(data, dtype=np.uint8), start, ord(open_char), ord(_CLOSING[open_char]))
+    return data[start:end + 1].decode('utf-8') if end != -1 else None
+
+def find_json_span(text: str, open_char: str = '{') -> Optional[str]:
+    """Return the first balanced {...} (or [...]) substring, ignoring brackets inside strings"""
+    if NUMBA_AVAILABLE and len(text) >= _NATIVE_SCAN_MIN_LENGTH:
+        return _find_json_span_native(text, open_char)
+    
+    close_char = _CLOSING[open_char]
+    start = text.find(open_char)
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped_at = -1
+    for match in _JSON_TOKEN_RE.finditer(text, start):
+        pos = match.start()
+        if pos == escaped_at:
+            continue
+        char = match.group()
+        if in_string:
+            if char == '\\':
+                escaped_at = pos + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return None
+
+def loads(data: Union[str, bytes]) -> Any:
+    """json.loads, using orjson when installed"""
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either the same way
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def load_file(path: Union[str, 'os.PathLike']) -> Any:
+    """json.load of a file; orjson parses it straight from a memory map instead of a bytes copy"""
+    with open(path, 'rb') as f:
+        # Empty files can't be mapped, let the parser report them
+        if ORJSON_AVAILABLE and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer, memoryview(buffer) as view:
+                return orjson.loads(view)
+        return json.loads(f.read())
+
+def dumps(value: Any, sort_keys: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Compact, non-ASCII-escaping json.dumps, using orjson when installed"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value, default=default, option=orjson.OPT_SORT_KEYS if sort_keys else None).decode('utf-8')
+        except TypeError:
+            pass  # non-str keys or ints beyond 64 bits, which the stdlib encoder accepts
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys, default=default)
+
+def extract_json(text: str, open_char: str = '{') -> Optional[Any]:
+    """
+    Extract the first JSON object (or array with open_char='[') from an LLM response.
+    Returns None when no balanced span is found; raises json.JSONDecodeError when it is invalid.
+    """
+    # JSON mode responses are the bare value: parse directly and skip the bracket scan
+    stripped = text.strip()
+    if stripped[:1] == open_char and stripped[-1:] == _CLOSING[open_char]:
+        try:
+            return loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    
+    # Responses in JSON mode come without code fences, skip the substitution copy for them
+    if '```' in text:
+        text = _FENCE_RE.sub('', text)
+    span = find_json_span(text, open_char)
+    if span is None:
+        return None
+    return loads(span)
@@ -3,18 +3,60 @@ Data processing and semantic matching for travel offers
 Enhanced with vector store integration
 """
 
-import json
+import re
+import threading
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from sentence_transformers import SentenceTransformer
+from dataclasses import dataclass, field
 import numpy as np
 import logging
 from pathlib import Path
+from core.json_utils import load_file
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_DURATION_RE = re.compile(r'(\d+)\s*(day|days|week|weeks)')
+_GROUP_SIZE_RE = re.compile(r'(\d+)\s*(person|people|traveler)')
+
+# Description keywords an offer needs to pass a travel style filter
+_STYLE_FILTER_KEYWORDS = {
+    'beach': ['beach', 'resort', 'lagoon', 'ocean', 'seaside'],
+    'adventure': ['adventure', 'trekking', 'hiking', 'exploration', 'outdoor'],
+    'cultural': ['cultural', 'heritage', 'historical', 'temple', 'museum'],
+    'family': ['family', 'kids', 'children', 'friendly'],
+    'romantic': ['romantic', 'couple', 'honeymoon', 'intimate']
+}
+
+# PreferenceParser vocabulary, built once instead of on every parse.
+# Country -> names, adjectives and cities that point to it; the first country matching wins.
+_DESTINATION_KEYWORDS = {
+    'thailand': ('thailand', 'thai', 'bangkok', 'phuket', 'krabi', 'chiang mai'),
+    'japan': ('japan', 'japanese', 'tokyo', 'kyoto', 'osaka'),
+    'vietnam': ('vietnam', 'vietnamese', 'hanoi', 'ho chi minh', 'halong bay'),
+    'cambodia': ('cambodia', 'cambodian', 'siem reap', 'phnom penh'),
+    'australia': ('australia', 'australian', 'melbourne', 'sydney'),
+    'mauritius': ('mauritius', 'mauritian'),
+    'reunion': ('reunion', 'reunion island'),
+    'madagascar': ('madagascar', 'madagascan'),
+    'jordan': ('jordan', 'jordanian', 'amman', 'petra'),
+    'morocco': ('morocco', 'moroccan', 'marrakech', 'casablanca', 'fes')
+}
+
+# Travel style -> keywords, in priority order (the first style matching is kept)
+_TRAVEL_STYLE_KEYWORDS = {
+    'cultural': ('cultural', 'culture', 'heritage', 'historical'),
+    'adventure': ('adventure', 'desert', 'exploration', 'trekking', 'hiking'),
+    'luxury': ('luxury', 'premium', 'exclusive', 'high end'),
+    'relaxing': ('relaxing', 'peaceful', 'tranquil', 'beach', 'resort'),
+    'family': ('family', 'kids', 'children', 'friendly'),
+    'romantic': ('romantic', 'couple', 'honeymoon', 'intimate')
+}
+
+_LOW_BUDGET_KEYWORDS = ('cheap', 'budget', 'affordable', 'low cost', 'economy')
+_HIGH_BUDGET_KEYWORDS = ('expensive', 'luxury', 'premium', 'high end', 'exclusive')
+
 @dataclass
 class TravelOffer:
     """Travel offer data structure"""
@@ -31,6 +73,7 @@ class TravelOffer:
     programme: str
     highlights: List[Dict[str, str]]
     images: List[str]
+    _search_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def get_semantic_text(self) -> str:
         """Get semantic text for matching"""
@@ -39,6 +82,12 @@ class TravelOffer:
         
         return f"{self.product_name} {destinations_text} {self.description} {highlights_text}"
     
+    def get_search_text(self) -> str:
+        """Lowercased semantic text, computed on first use"""
+        if self._search_text is None:
+            self._search_text = self.get_semantic_text().lower()
+        return self._search_text
+    
     def matches_preferences(self, preferences: Dict[str, Any]) -> bool:
         """Check if offer matches user preferences"""
         # Simple boolean matching - no scoring
@@ -61,7 +110,7 @@ class TravelOffer:
         # Check style preferences
         if preferences.get('style'):
             style_prefs = [s.lower() for s in preferences['style']]
-            offer_text = self.get_semantic_text().lower()
+            offer_text = self.get_search_text()
             for style in style_prefs:
                 if style in offer_text:
                     return True
@@ -76,6 +125,8 @@ class DataProcessor:
         self.vector_store_service = vector_store_service
         self.offers: List[TravelOffer] = []
         self.offers_data: List[Dict[str, Any]] = []
+        self._offers_by_ref: Dict[str, TravelOffer] = {}
+        self._offer_data_by_ref: Dict[str, Dict[str, Any]] = {}
         
         # Load offers if file path provided
         if json_file_path:
@@ -91,8 +142,7 @@ class DataProcessor:
             return
         
         try:
-            with open(self.json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_file(self.json_file_path)
             
             self.offers = []
             self.offers_data = []
@@ -117,6 +167,17 @@ class DataProcessor:
                 self.offers.append(offer)
                 self.offers_data.append(item)
             
+            # Reference lookups, first occurrence wins like the linear scans they replace
+            self._offers_by_ref = {}
+            self._offer_data_by_ref = {}
+            for offer, item in zip(self.offers, self.offers_data):
+                self._offers_by_ref.setdefault(offer.reference, offer)
+                self._offer_data_by_ref.setdefault(offer.reference, item)
+            
+            # Lowercased search texts, built once per load rather than on every search
+            for offer in self.offers:
+                offer.get_search_text()
+            
             logger.info(f"✅ Loaded {len(self.offers)} travel offers")
             
             # Build vector index if service is available
@@ -180,13 +241,13 @@ class DataProcessor:
         query_lower = query.lower()
         results = []
         
-        for offer in self.offers:
-            score = 0
-            offer_text = offer.get_semantic_text().lower()
-            
+        # The name, destinations and highlights are all part of the semantic text,
+        # so offers whose text doesn't contain the query can't score at all
+        candidates = [offer for offer in self.offers if query_lower in offer.get_search_text()]
+        
+        for offer in candidates:
             # Simple scoring based on keyword matches
-            if query_lower in offer_text:
-                score += 1
+            score = 1
             
             # Check product name
             if query_lower in offer.product_name.lower():
@@ -286,33 +347,20 @@ class DataProcessor:
             style_filter = filters['travel_style'].lower()
             offer_text = offer.get('description', '').lower()
             
-            style_keywords = {
-                'beach': ['beach', 'resort', 'lagoon', 'ocean', 'seaside'],
-                'adventure': ['adventure', 'trekking', 'hiking', 'exploration', 'outdoor'],
-                'cultural': ['cultural', 'heritage', 'historical', 'temple', 'museum'],
-                'family': ['family', 'kids', 'children', 'friendly'],
-                'romantic': ['romantic', 'couple', 'honeymoon', 'intimate']
-            }
-            
-            if style_filter in style_keywords:
-                if not any(keyword in offer_text for keyword in style_keywords[style_filter]):
+            if style_filter in _STYLE_FILTER_KEYWORDS:
+                if not any(keyword in offer_text for keyword in _STYLE_FILTER_KEYWORDS[style_filter]):
                     return False
         
         return True
     
     def get_offer_by_reference(self, reference: str) -> Optional[TravelOffer]:
         """Get offer by reference"""
-        for offer in self.offers:
-            if offer.reference == reference:
-                return offer
-        return None
+        return self._offers_by_ref.get(reference)
     
     def get_offer_by_reference_dict(self, reference: str) -> Optional[Dict[str, Any]]:
         """Get offer as dictionary by reference"""
-        for offer_data in self.offers_data:
-            if offer_data.get('reference') == reference:
-                return offer_data.copy()
-        return None
+        offer_data = self._offer_data_by_ref.get(reference)
+        return offer_data.copy() if offer_data is not None else None
     
     def get_similar_offers(self, reference: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Get similar offers based on a reference offer"""
@@ -383,18 +431,19 @@ class DataProcessor:
         if not self.offers:
             return "No offers available"
         
-        summary = f"Available Travel Offers ({len(self.offers)} total):\n\n"
+        lines = [f"Available Travel Offers ({len(self.offers)} total):\n"]
         
         for i, offer in enumerate(self.offers[:10], 1):  # Show first 10
             destinations = ", ".join([f"{d.get('city', '')} ({d.get('country', '')})" for d in offer.destinations])
-            summary += f"{i}. {offer.product_name} ({offer.reference})\n"
-            summary += f"   Destinations: {destinations}\n"
-            summary += f"   Duration: {offer.duration} days\n"
-            summary += f"   Group: {offer.min_group_size}-{offer.max_group_size} people\n"
-            summary += f"   Type: {offer.offer_type}\n"
-            summary += f"   Description: {offer.description[:100]}...\n\n"
-        
-        return summary
+            lines.append(f"{i}. {offer.product_name} ({offer.reference})")
+            lines.append(f"   Destinations: {destinations}")
+            lines.append(f"   Duration: {offer.duration} days")
+            lines.append(f"   Group: {offer.min_group_size}-{offer.max_group_size} people")
+            lines.append(f"   Type: {offer.offer_type}")
+            lines.append(f"   Description: {offer.description[:100]}...\n")
+        
+        # One join instead of growing the string line by line
+        return "\n".join(lines) + "\n"
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get data processor statistics"""
@@ -424,27 +473,13 @@ class PreferenceParser:
         input_lower = user_input.lower()
         
         # Destination preferences
-        destinations = {
-            'thailand': ['thailand', 'thai', 'bangkok', 'phuket', 'krabi', 'chiang mai'],
-            'japan': ['japan', 'japanese', 'tokyo', 'kyoto', 'osaka'],
-            'vietnam': ['vietnam', 'vietnamese', 'hanoi', 'ho chi minh', 'halong bay'],
-            'cambodia': ['cambodia', 'cambodian', 'siem reap', 'phnom penh'],
-            'australia': ['australia', 'australian', 'melbourne', 'sydney'],
-            'mauritius': ['mauritius', 'mauritian'],
-            'reunion': ['reunion', 'reunion island'],
-            'madagascar': ['madagascar', 'madagascan'],
-            'jordan': ['jordan', 'jordanian', 'amman', 'petra'],
-            'morocco': ['morocco', 'moroccan', 'marrakech', 'casablanca', 'fes']
-        }
-        
-        for country, keywords in destinations.items():
+        for country, keywords in _DESTINATION_KEYWORDS.items():
             if any(keyword in input_lower for keyword in keywords):
                 preferences['destination'] = country
                 break
         
         # Duration preferences
-        import re
-        duration_match = re.search(r'(\d+)\s*(day|days|week|weeks)', input_lower)
+        duration_match = _DURATION_RE.search(input_lower)
         if duration_match:
             number = int(duration_match.group(1))
             unit = duration_match.group(2)
@@ -457,33 +492,34 @@ class PreferenceParser:
         elif 'two weeks' in input_lower or '14 days' in input_lower:
             preferences['duration'] = 14
         
-        # Style preferences
-        style_keywords = []
-        if any(word in input_lower for word in ['cultural', 'culture', 'heritage', 'historical']):
-            style_keywords.append('cultural')
-        if any(word in input_lower for word in ['adventure', 'desert', 'exploration', 'trekking', 'hiking']):
-            style_keywords.append('adventure')
-        if any(word in input_lower for word in ['luxury', 'premium', 'exclusive', 'high end']):
-            style_keywords.append('luxury')
-        if any(word in input_lower for word in ['relaxing', 'peaceful', 'tranquil', 'beach', 'resort']):
-            style_keywords.append('relaxing')
-        if any(word in input_lower for word in ['family', 'kids', 'children', 'friendly']):
-            style_keywords.append('family')
-        if any(word in input_lower for word in ['romantic', 'couple', 'honeymoon', 'intimate']):
-            style_keywords.append('romantic')
-        
-        if style_keywords:
-            preferences['travel_style'] = style_keywords[0]  # Take first match
+        # Style preferences: take the first match
+        for style, keywords in _TRAVEL_STYLE_KEYWORDS.items():
+            if any(word in input_lower for word in keywords):
+                preferences['travel_style'] = style
+                break
         
         # Budget preferences
-        if any(word in input_lower for word in ['cheap', 'budget', 'affordable', 'low cost', 'economy']):
+        if any(word in input_lower for word in _LOW_BUDGET_KEYWORDS):
             preferences['budget'] = 'low'
-        elif any(word in input_lower for word in ['expensive', 'luxury', 'premium', 'high end', 'exclusive']):
+        elif any(word in input_lower for word in _HIGH_BUDGET_KEYWORDS):
             preferences['budget'] = 'high'
         
         # Group size preferences
-        group_match = re.search(r'(\d+)\s*(person|people|traveler)', input_lower)
+        group_match = _GROUP_SIZE_RE.search(input_lower)
         if group_match:
             preferences['group_size'] = int(group_match.group(1))
         
-        return preferences 
\ No newline at end of file
+        return preferences 
+
+# Loaded processors are shared per data file; the lock keeps concurrent
+# first requests from parsing the same file twice
+_processor_lock = threading.RLock()
+
+@lru_cache(maxsize=4)
+def _load_data_processor(json_file_path: str) -> DataProcessor:
+    return DataProcessor(json_file_path)
+
+def get_data_processor(json_file_path: str) -> DataProcessor:
+    """Get the process-wide DataProcessor for a JSON offers file"""
+    with _processor_lock:
+        return _load_data_processor(json_file_path)
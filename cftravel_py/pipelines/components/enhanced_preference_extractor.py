@@ -10,6 +10,41 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from .preference_extractor import PreferenceExtractorComponent
 
+# Season names (French and English) to month ranges
+_SEASON_MONTHS = {
+    "printemps": "03-05",
+    "spring": "03-05",
+    "été": "06-08",
+    "summer": "06-08",
+    "automne": "09-11",
+    "fall": "09-11",
+    "autumn": "09-11",
+    "hiver": "12-02",
+    "winter": "12-02"
+}
+
+# Month names (French and English) to month numbers
+_MONTH_NUMBERS = {
+    "janvier": "01", "january": "01",
+    "février": "02", "february": "02",
+    "mars": "03", "march": "03",
+    "avril": "04", "april": "04",
+    "mai": "05", "may": "05",
+    "juin": "06", "june": "06",
+    "juillet": "07", "july": "07",
+    "août": "08", "august": "08",
+    "septembre": "09", "september": "09",
+    "octobre": "10", "october": "10",
+    "novembre": "11", "november": "11",
+    "décembre": "12", "december": "12"
+}
+
+_DATE_FORMAT_PATTERNS = (
+    re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'),  # DD/MM/YYYY or MM/DD/YYYY
+    re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})'),  # DD-MM-YYYY or MM-DD-YYYY
+)
+_BUDGET_AMOUNT_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:€|euros?)')
+
 class EnhancedPreferenceExtractorComponent(PreferenceExtractorComponent):
     """Enhanced preference extractor that inherits from original and adds advanced features"""
     
@@ -75,6 +110,9 @@ class EnhancedPreferenceExtractorComponent(PreferenceExtractorComponent):
             r'\b(luxe|premium|standard|économique)\s+(hôtel|hotel)\b',
             r'\b(lodge|auberge|guesthouse)\b'
         ]
+        
+        # _extract_additional_preferences matches the raw input, hence IGNORECASE
+        self._compile_patterns(re.IGNORECASE)
     
     async def process(self, context):
         """Enhanced process that uses original logic + date/budget intelligence"""
@@ -148,18 +186,18 @@ class EnhancedPreferenceExtractorComponent(PreferenceExtractorComponent):
         # Extract activities
         activities = []
         for pattern in self.activity_patterns:
-            if re.search(pattern, user_input, re.IGNORECASE):
-                activity = re.search(pattern, user_input, re.IGNORECASE).group(1)
-                activities.append(activity)
+            match = pattern.search(user_input)
+            if match:
+                activities.append(match.group(1))
         
         if activities:
             additional_preferences['activities'] = activities
         
         # Extract accommodation preferences
         for pattern in self.accommodation_patterns:
-            if re.search(pattern, user_input, re.IGNORECASE):
-                accommodation = re.search(pattern, user_input, re.IGNORECASE).group(1)
-                additional_preferences['accommodation_type'] = accommodation
+            match = pattern.search(user_input)
+            if match:
+                additional_preferences['accommodation_type'] = match.group(1)
                 break
         
         return additional_preferences
@@ -183,50 +221,19 @@ class EnhancedPreferenceExtractorComponent(PreferenceExtractorComponent):
                     return next_week.strftime("%d/%m/%Y")
             
             # Handle seasons
-            season_mapping = {
-                "printemps": "03-05",
-                "spring": "03-05",
-                "été": "06-08",
-                "summer": "06-08",
-                "automne": "09-11",
-                "fall": "09-11",
-                "autumn": "09-11",
-                "hiver": "12-02",
-                "winter": "12-02"
-            }
-            
-            for season, months in season_mapping.items():
-                if season in date_input.lower():
+            date_lower = date_input.lower()
+            for season, months in _SEASON_MONTHS.items():
+                if season in date_lower:
                     return f"{season} {current_year}"
             
             # Handle specific months
-            month_mapping = {
-                "janvier": "01", "january": "01",
-                "février": "02", "february": "02",
-                "mars": "03", "march": "03",
-                "avril": "04", "april": "04",
-                "mai": "05", "may": "05",
-                "juin": "06", "june": "06",
-                "juillet": "07", "july": "07",
-                "août": "08", "august": "08",
-                "septembre": "09", "september": "09",
-                "octobre": "10", "october": "10",
-                "novembre": "11", "november": "11",
-                "décembre": "12", "december": "12"
-            }
-            
-            for month_name, month_num in month_mapping.items():
-                if month_name in date_input.lower():
+            for month_name, month_num in _MONTH_NUMBERS.items():
+                if month_name in date_lower:
                     return f"{month_num}/{current_year}"
             
             # Handle specific date formats
-            date_patterns = [
-                r'(\d{1,2})/(\d{1,2})/(\d{4})',  # DD/MM/YYYY or MM/DD/YYYY
-                r'(\d{1,2})-(\d{1,2})-(\d{4})',  # DD-MM-YYYY or MM-DD-YYYY
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, date_input)
+            for pattern in _DATE_FORMAT_PATTERNS:
+                match = pattern.search(date_input)
                 if match:
                     return match.group(0)
             
@@ -250,7 +257,7 @@ class EnhancedPreferenceExtractorComponent(PreferenceExtractorComponent):
             budget_input_str = str(budget_input)
             
             # Handle numeric amounts
-            amount_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(?:€|euros?)', budget_input_str)
+            amount_match = _BUDGET_AMOUNT_RE.search(budget_input_str)
             if amount_match:
                 amount = float(amount_match.group(1).replace(',', '.'))
                 return str(amount)
@@ -4,13 +4,16 @@ Enhanced version that inherits from original RecommendationEngineComponent
 Adds semantic search and AI intelligence while preserving original functionality
 """
 
-import json
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from .recommendation_engine import RecommendationEngineComponent
+from core.json_utils import dumps
 import re
 
+_OFFER_DAYS_RE = re.compile(r'(\d+)\s*jours?')
+
 class EnhancedRecommendationEngineComponent(RecommendationEngineComponent):
     """Enhanced recommendation engine that inherits from original and adds advanced features"""
     
@@ -105,7 +108,8 @@ class EnhancedRecommendationEngineComponent(RecommendationEngineComponent):
             self.logger.info(f"🔍 Semantic search for: {search_query}")
             
             # Get semantic search results
-            semantic_results = await self.semantic_service.search_offers(search_query, top_k=10)
+            # search_offers is synchronous (embedding + FAISS), keep it off the event loop
+            semantic_results = await asyncio.to_thread(self.semantic_service.search_offers, search_query, top_k=10)
             
             # Filter and enhance results based on user preferences
             filtered_results = await self._filter_semantic_results(semantic_results, user_preferences)
@@ -186,7 +190,7 @@ class EnhancedRecommendationEngineComponent(RecommendationEngineComponent):
                 offer_duration = offer.get('duration', '')
                 
                 # Extract days from duration string
-                days_match = re.search(r'(\d+)\s*jours?', offer_duration)
+                days_match = _OFFER_DAYS_RE.search(offer_duration)
                 if days_match:
                     offer_days = int(days_match.group(1))
                     
@@ -226,11 +230,15 @@ class EnhancedRecommendationEngineComponent(RecommendationEngineComponent):
         try:
             enhanced_offers = []
             
-            for offer in offers:
+            # One explanation request per offer, all in flight at once
+            explanations = await asyncio.gather(
+                *(self._generate_offer_explanation(offer, user_preferences) for offer in offers)
+            )
+            
+            for offer, explanation in zip(offers, explanations):
                 enhanced_offer = offer.copy()
                 
                 # Add AI-generated explanation
-                explanation = await self._generate_offer_explanation(offer, user_preferences)
                 enhanced_offer['ai_explanation'] = explanation
                 
                 # Add recommendation score
@@ -262,7 +270,7 @@ OFFER:
 - Description: {offer.get('description', '')[:200]}...
 
 USER PREFERENCES:
-{json.dumps(user_preferences, indent=2, ensure_ascii=False)}
+{dumps(user_preferences)}
 
 Provide a brief, friendly explanation in French (max 100 words) of why this offer is a good match.
 
@@ -318,7 +326,7 @@ RESPONSE:
                 duration_range = user_preferences['duration_range']
                 offer_duration = offer.get('duration', '')
                 
-                days_match = re.search(r'(\d+)\s*jours?', offer_duration)
+                days_match = _OFFER_DAYS_RE.search(offer_duration)
                 if days_match:
                     offer_days = int(days_match.group(1))
                     
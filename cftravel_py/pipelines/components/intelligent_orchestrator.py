@@ -4,6 +4,7 @@ Enhanced version that inherits from original OrchestratorComponent
 Adds advanced AI orchestration while preserving original functionality
 """
 
+import asyncio
 import json
 import re
 from datetime import datetime, timedelta
@@ -11,6 +12,10 @@ from typing import Dict, Any, List, Optional
 from .orchestrator import OrchestratorComponent
 from services.optimized_semantic_service import OptimizedSemanticService
 
+# Only the start of the user message goes into the search query, so the query stays
+# close to stable preference terms and repeats (and hits the search cache) across turns
+_SEARCH_QUERY_INPUT_CHARS = 64
+
 class IntelligentOrchestratorComponent(OrchestratorComponent):
     """Enhanced orchestrator that inherits from original and adds advanced features"""
     
@@ -63,7 +68,7 @@ class IntelligentOrchestratorComponent(OrchestratorComponent):
                 search_query = self._generate_semantic_search_query(user_input, context.user_preferences)
                 
                 # Test semantic search capability
-                test_results = await self.semantic_service.search_offers(search_query, top_k=3)
+                test_results = await asyncio.to_thread(self.semantic_service.search_offers, search_query, top_k=3)
                 
                 return {
                     'semantic_search_enabled': len(test_results) > 0,
@@ -108,9 +113,6 @@ class IntelligentOrchestratorComponent(OrchestratorComponent):
         """Generate semantic search query from user input and preferences"""
         query_parts = []
         
-        # Add user input terms
-        query_parts.append(user_input)
-        
         # Add destination if available
         if user_preferences.get('destination'):
             query_parts.append(f"voyage {user_preferences['destination']}")
@@ -125,5 +127,7 @@ class IntelligentOrchestratorComponent(OrchestratorComponent):
             for activity in user_preferences['activities']:
                 query_parts.append(f"{activity} asie")
         
-        # Join and return
-        return " ".join(query_parts) 
\ No newline at end of file
+        # Preference terms first, in a fixed order, then the truncated user input
+        query_parts.append(user_input.strip()[:_SEARCH_QUERY_INPUT_CHARS])
+        
+        return " ".join(part for part in query_parts if part) 
\ No newline at end of file
@@ -3,13 +3,51 @@ Orchestrator Component for ASIA.fr Agent
 Handles conversation flow decisions and intent classification
 """
 
-import json
-import re
 from typing import Dict, Any, List
 from ..core import PipelineComponent, PipelineContext, PipelineState
-from services.llm_service import LLMService
+from services.llm_service import JSON_OBJECT_FORMAT, LLMService
+from core.json_utils import dumps, extract_json
 from services.memory_service import MemoryService
 
+# Static orchestration instructions, sent as the system message so they form a cacheable prefix
+_ORCHESTRATION_SYSTEM_PROMPT = """You are ASIA.fr Agent, an intelligent travel specialist. Analyze the user input and decide the best course of action. You MUST ALWAYS RESPOND IN FRENCH: all reasoning and analysis in French.
+
+Respond with a JSON object with this structure:
+{
+    "intent": "question|confirmation|modification|booking|general|preference_complete",
+    "confidence": 0.0-1.0,
+    "response_type": "question|preference_summary|show_offers|modification",
+    "needs_confirmation": true/false,
+    "has_sufficient_details": true/false,
+    "should_show_offers": true/false,
+    "offer_count": 3,
+    "reasoning": "Your reasoning in French"
+}
+
+INTENT TYPES:
+- greeting: greets, thanks or says goodbye
+- confirmation: confirms preferences or wants to see offers
+- modification: wants to change preferences or see different offers
+- preference_complete: enough preferences to show a summary
+- general: asks questions, seeks advice, gives new information or just chats
+- suggestion_request: wants suggestions
+- vague_question: vague question that needs clarification
+- information_request: wants general travel information
+- new_search: wants to start over with different criteria
+- recommendation_request: wants specific recommendations based on preferences
+
+RESPONSE TYPES: greeting, question, preference_summary, show_offers, modification, suggestion, conversation, clarification, information, recommendation
+
+RULES:
+- Confirms after seeing offers, or seems satisfied with the preferences → "confirmation", should_show_offers: true
+- Expresses dissatisfaction or wants changes → "modification"
+- Judge intent from meaning and conversation flow, not keywords
+- Recommendations: match interests, travel style and season to destinations, suggest complementary experiences
+- Keep earlier preferences and offers shown in mind; users may modify choices at any time
+
+REQUIRED FOR OFFERS: destination, duration, travel_dates, style
+OPTIONAL: budget_amount (euros, only if the user gives a specific amount)"""
+
 class OrchestratorComponent(PipelineComponent):
     """Orchestrates conversation flow and makes intelligent decisions"""
     
@@ -61,8 +99,13 @@ class OrchestratorComponent(PipelineComponent):
         prompt = self._build_orchestration_prompt(context)
         
         try:
-            messages = [{"role": "user", "content": prompt}]
-            response = await self.llm_service.create_reasoning_completion(messages, stream=False)
+            messages = [
+                {"role": "system", "content": _ORCHESTRATION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            response = await self.llm_service.create_reasoning_completion(
+                messages, stream=False, response_format=JSON_OBJECT_FORMAT
+            )
             result = self._parse_orchestration_response(response)
             
             # Debug logging
@@ -76,120 +119,22 @@ class OrchestratorComponent(PipelineComponent):
             return self._default_orchestration()
     
     def _build_orchestration_prompt(self, context: PipelineContext) -> str:
-        """Build the orchestration prompt"""
+        """Build the per-turn part of the orchestration prompt"""
         return f"""
-You are ASIA.fr Agent, an intelligent travel specialist. You MUST ALWAYS RESPOND IN FRENCH. Analyze this user input and decide the best course of action.
-
-LANGUAGE REQUIREMENT: You are a French travel agent. All your responses, reasoning, and analysis must be in French.
-
 CONVERSATION CONTEXT:
 - Turn count: {context.turn_count}
-- Current preferences: {json.dumps(context.user_preferences, indent=2, ensure_ascii=False)}
+- Current preferences: {dumps(context.user_preferences)}
 - Conversation history: {context.conversation_history[-300:] if context.conversation_history else "None"}
 
 USER INPUT: "{context.user_input}"
-
-ANALYZE THE USER INPUT AND PROVIDE A JSON RESPONSE WITH THE FOLLOWING STRUCTURE:
-{{
-    "intent": "question|confirmation|modification|booking|general|preference_complete",
-    "confidence": 0.0-1.0,
-    "response_type": "question|preference_summary|show_offers|modification",
-    "needs_confirmation": true/false,
-    "has_sufficient_details": true/false,
-    "should_show_offers": true/false,
-    "offer_count": 3,
-    "reasoning": "Your reasoning in French"
-}}
-
-INTELLIGENT DETECTION RULES:
-You are an intelligent travel agent. Analyze the user's intent naturally and respond appropriately.
-
-INTENT TYPES:
-1. **greeting**: User is greeting, thanking, or saying goodbye
-2. **confirmation**: User confirms preferences or wants to see offers
-3. **modification**: User wants to change preferences or modify choices
-4. **preference_complete**: We have sufficient preferences to show summary
-5. **general**: User is asking questions, seeking advice, or providing new information
-6. **suggestion_request**: User wants AI suggestions or recommendations
-7. **vague_question**: User asks vague questions that need clarification
-8. **information_request**: User wants general travel information
-9. **new_search**: User wants to start a new search with different criteria
-10. **recommendation_request**: User wants specific recommendations based on preferences
-
-RESPONSE TYPES:
-- **greeting**: Friendly response to greetings/thanks
-- **question**: Ask for more information or preferences
-- **preference_summary**: Show current preferences for confirmation
-- **show_offers**: Display travel offers
-- **modification**: Help user modify preferences
-- **suggestion**: Provide AI recommendations
-- **conversation**: Natural conversation response
-- **clarification**: Ask for clarification on vague questions
-- **information**: Provide general travel information
-- **recommendation**: Provide specific, intelligent recommendations
-
-CONTEXT AWARENESS:
-- If user has already seen offers and wants to modify → intent: "modification"
-- If user asks for suggestions → intent: "suggestion_request"
-- If user asks for specific recommendations → intent: "recommendation_request"
-- If user is just chatting → intent: "general"
-- If user confirms after seeing offers → intent: "confirmation", should_show_offers: true
-- If user wants different offers → intent: "modification"
-- If user asks vague questions → intent: "vague_question"
-- If user wants general info → intent: "information_request"
-- If user wants to start fresh → intent: "new_search"
-
-RECOMMENDATION INTELLIGENCE:
-- When user asks for recommendations, analyze their preferences deeply
-- Consider destination-specific features (beaches, mountains, culture, etc.)
-- Match user interests with appropriate destinations
-- Provide intelligent suggestions based on travel style and interests
-- Don't just match keywords, understand the essence of what they want
-- Consider seasonal factors and travel timing
-- Suggest complementary destinations and experiences
-
-CONVERSATION MEMORY:
-- Preserve all conversation context and preferences
-- Remember previous offers shown
-- Track preference changes over time
-- Understand when user wants to modify vs start new search
-- Maintain conversation flow naturally
-
-UNDERSTAND NATURALLY:
-- Don't rely only on keywords, understand the conversation flow
-- Consider what the user is trying to achieve
-- Be flexible and conversational
-- Allow users to modify choices at any time
-- Provide helpful suggestions when appropriate
-- Handle vague questions intelligently
-- Preserve conversation memory and context
-- Be intelligent about destination matching and recommendations
-
-REQUIRED PREFERENCES FOR OFFERS:
-- destination (country/city)
-- duration (number of days/weeks)
-- travel_dates (when they want to travel - required for date range matching)
-- style (cultural, adventure, luxury, relaxation, etc.)
-
-OPTIONAL PREFERENCES (help narrow search if provided):
-- budget_amount (numeric amount in euros) - optional, only if user mentions specific budget
-
-UNDERSTAND THE USER'S INTENT NATURALLY:
-- Don't rely only on keywords, understand the context and meaning
-- Consider the conversation flow and what the user is trying to achieve
-- If user seems satisfied with their preferences, they likely want to see offers
-- If user expresses dissatisfaction or wants changes, they want to modify
-
-RESPOND ONLY WITH VALID JSON:
 """
     
     def _parse_orchestration_response(self, response: str) -> Dict[str, Any]:
         """Parse the LLM orchestration response"""
         try:
             # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
+            result = extract_json(response)
+            if result is not None:
                 self.logger.debug(f"✅ Parsed orchestration result: {result}")
                 return result
             else:
@@ -3,14 +3,38 @@ Preference Extractor Component for ASIA.fr Agent
 Handles intelligent extraction of travel preferences from user input
 """
 
-import json
 import re
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 from ..core import PipelineComponent, PipelineContext, PipelineState
-from services.llm_service import LLMService
+from services.llm_service import JSON_OBJECT_FORMAT, LLMService
+from core.json_utils import extract_json
 from services.memory_service import MemoryService
 
+# Static extraction instructions, sent as the system message so they form a cacheable prefix;
+# the date and the user input follow in the user message
+_EXTRACTION_SYSTEM_PROMPT = """You are an expert travel preference extractor. Extract ALL travel-related information from the user message. You MUST RESPOND IN FRENCH.
+
+LANGUAGE REQUIREMENT: You are a French travel agent. All your analysis and reasoning must be in French.
+
+EXTRACT and return a JSON object with these fields:
+- destination: specific places, countries, cities mentioned
+- duration: how long they want to travel
+- travel_dates: when they want to travel (season, month, relative dates like "dans 2 semaines") - REQUIRED
+- budget_amount: numeric amount in euros (optional - only if clearly mentioned with specific amount)
+- style: travel style (cultural, adventure, luxury, relaxation, gastronomy, etc.)
+- group_size: solo, couple, family, group
+- accommodation: hotel preferences (5_stars, 4_stars, 3_stars, luxury, budget, standard)
+- activities: array of activities they want (plage, culture, aventure, détente, gastronomie, etc.)
+
+EXAMPLES:
+- "Je veux aller au Japon pour 2 semaines en avril" → {"destination": "Japan", "duration": "2 semaines", "travel_dates": "avril"}
+- "Budget de 3000 euros pour une aventure culturelle" → {"budget_amount": 3000, "style": "cultural"}
+- "Philippines en famille pour 10 jours avec plages" → {"destination": "Philippines", "duration": "10 jours", "group_size": "family", "activities": ["plage"]}
+- "Hôtel 5 étoiles au Maldives" → {"destination": "Maldives", "accommodation": "5_stars"}
+
+RESPOND ONLY WITH VALID JSON"""
+
 class PreferenceExtractorComponent(PipelineComponent):
     """Extracts and updates travel preferences from user input"""
     
@@ -140,6 +164,15 @@ class PreferenceExtractorComponent(PipelineComponent):
             'novembre': 11, 'november': 11,
             'décembre': 12, 'december': 12
         }
+        
+        self._compile_patterns()
+    
+    def _compile_patterns(self, flags: int = 0):
+        """Compile the pattern lists once, every extraction runs them on the input"""
+        for name in ('destination_patterns', 'duration_patterns', 'date_patterns',
+                     'budget_patterns', 'accommodation_patterns', 'activity_patterns'):
+            patterns = [getattr(pattern, 'pattern', pattern) for pattern in getattr(self, name)]
+            setattr(self, name, [re.compile(pattern, flags) for pattern in patterns])
     
     def is_required(self, context: PipelineContext) -> bool:
         """Required for all user inputs to extract preferences"""
@@ -194,7 +227,7 @@ class PreferenceExtractorComponent(PipelineComponent):
         
         # Extract destination
         for pattern in self.destination_patterns:
-            match = re.search(pattern, input_lower)
+            match = pattern.search(input_lower)
             if match:
                 destination = match.group(1)
                 preferences['destination'] = self.destination_mapping.get(destination, destination.title())
@@ -202,7 +235,7 @@ class PreferenceExtractorComponent(PipelineComponent):
         
         # Extract duration
         for pattern in self.duration_patterns:
-            match = re.search(pattern, input_lower)
+            match = pattern.search(input_lower)
             if match:
                 number = match.group(1)
                 unit = match.group(2)
@@ -270,7 +303,7 @@ class PreferenceExtractorComponent(PipelineComponent):
         
         # Check for specific dates
         for pattern in self.date_patterns:
-            match = re.search(pattern, input_lower)
+            match = pattern.search(input_lower)
             if match:
                 if 'printemps' in match.group(0) or 'spring' in match.group(0):
                     return "printemps"
@@ -298,7 +331,7 @@ class PreferenceExtractorComponent(PipelineComponent):
     def _extract_budget_info(self, input_lower: str) -> str:
         """Extract budget information (optional) - returns numeric amount"""
         for pattern in self.budget_patterns:
-            match = re.search(pattern, input_lower)
+            match = pattern.search(input_lower)
             if match:
                 # Extract numeric amount from the match
                 if len(match.groups()) >= 1:
@@ -313,7 +346,7 @@ class PreferenceExtractorComponent(PipelineComponent):
     def _extract_accommodation_info(self, input_lower: str) -> str:
         """Extract accommodation preferences"""
         for pattern in self.accommodation_patterns:
-            match = re.search(pattern, input_lower)
+            match = pattern.search(input_lower)
             if match:
                 if '5' in match.group(0):
                     return '5_stars'
@@ -334,7 +367,7 @@ class PreferenceExtractorComponent(PipelineComponent):
         """Extract activity and experience preferences"""
         activities = []
         for pattern in self.activity_patterns:
-            match = re.search(pattern, input_lower)
+            match = pattern.search(input_lower)
             if match:
                 activity = match.group(1)
                 if activity not in activities:
@@ -347,52 +380,33 @@ class PreferenceExtractorComponent(PipelineComponent):
         prompt = self._build_extraction_prompt(context)
         
         try:
-            messages = [{"role": "user", "content": prompt}]
-            response = await self.llm_service.create_extractor_completion(messages, stream=False)
+            messages = [
+                {"role": "system", "content": _EXTRACTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            response = await self.llm_service.create_extractor_completion(
+                messages, stream=False, response_format=JSON_OBJECT_FORMAT
+            )
             return self._parse_extraction_response(response)
         except Exception as e:
             self.logger.error(f"❌ LLM preference extraction failed: {e}")
             return {}
     
     def _build_extraction_prompt(self, context: PipelineContext) -> str:
-        """Build the preference extraction prompt"""
+        """Build the per-turn part of the preference extraction prompt"""
         current_date = datetime.now().strftime('%d/%m/%Y')
         return f"""
-You are an expert travel preference extractor. Extract ALL travel-related information from this user message. You MUST RESPOND IN FRENCH.
-
-LANGUAGE REQUIREMENT: You are a French travel agent. All your analysis and reasoning must be in French.
-
 CURRENT DATE: {current_date}
 
 USER INPUT: {context.user_input}
-ORCHESTRATION CONTEXT: {json.dumps(context.get_metadata('orchestration_result', {}), indent=2, ensure_ascii=False)}
-
-EXTRACT and return a JSON object with these fields:
-- destination: specific places, countries, cities mentioned
-- duration: how long they want to travel
-- travel_dates: when they want to travel (season, month, relative dates like "dans 2 semaines") - REQUIRED
-- budget_amount: numeric amount in euros (optional - only if clearly mentioned with specific amount)
-- style: travel style (cultural, adventure, luxury, relaxation, gastronomy, etc.)
-- group_size: solo, couple, family, group
-- accommodation: hotel preferences (5_stars, 4_stars, 3_stars, luxury, budget, standard)
-- activities: array of activities they want (plage, culture, aventure, détente, gastronomie, etc.)
-
-EXAMPLES:
-- "Je veux aller au Japon pour 2 semaines en avril" → {{"destination": "Japan", "duration": "2 semaines", "travel_dates": "avril"}}
-- "Budget de 3000 euros pour une aventure culturelle" → {{"budget_amount": 3000, "style": "cultural"}}
-- "Philippines en famille pour 10 jours avec plages" → {{"destination": "Philippines", "duration": "10 jours", "group_size": "family", "activities": ["plage"]}}
-- "Hôtel 5 étoiles au Maldives" → {{"destination": "Maldives", "accommodation": "5_stars"}}
-
-RESPOND ONLY WITH VALID JSON:
 """
     
     def _parse_extraction_response(self, response: str) -> Dict[str, Any]:
         """Parse the LLM extraction response"""
         try:
             # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
+            result = extract_json(response)
+            if result is not None:
                 self.logger.debug(f"✅ Parsed extraction result: {result}")
                 return result
             else:
@@ -3,13 +3,71 @@ Recommendation Engine Component for ASIA.fr Agent
 Handles offer matching, ranking, and recommendation generation
 """
 
-import json
+import asyncio
 import hashlib
+import heapq
+import os
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from ..core import PipelineComponent, PipelineContext, PipelineState
 from services.optimized_semantic_service import OptimizedSemanticService
 from services.llm_service import LLMService
 from services.data_service import DataService
+from core.json_utils import dumps, extract_json
+
+# Search terms added to the semantic query for known destinations
+_DESTINATION_QUERY_TERMS = {
+    'japan': ['Japon', 'Tokyo', 'Kyoto', 'Osaka', 'Japonais', 'Japon traditionnel', 'Japon culturel'],
+    'japon': ['Japon', 'Tokyo', 'Kyoto', 'Osaka', 'Japonais', 'Japon traditionnel', 'Japon culturel'],
+    'philippines': ['Philippines', 'Manille', 'Cebu', 'Palawan', 'Philippin', 'Philippines culturel'],
+    'philippine': ['Philippines', 'Manille', 'Cebu', 'Palawan', 'Philippin', 'Philippines culturel'],
+    'thailand': ['Thaïlande', 'Bangkok', 'Phuket', 'Chiang Mai', 'Thaï', 'Thaïlande culturel'],
+    'thaïlande': ['Thaïlande', 'Bangkok', 'Phuket', 'Chiang Mai', 'Thaï', 'Thaïlande culturel'],
+    'vietnam': ['Vietnam', 'Hanoï', 'Ho Chi Minh', 'Halong', 'Vietnamien', 'Vietnam culturel'],
+    'china': ['Chine', 'Pékin', 'Shanghai', 'Chinois', 'Chine culturel'],
+    'chine': ['Chine', 'Pékin', 'Shanghai', 'Chinois', 'Chine culturel'],
+    'india': ['Inde', 'Delhi', 'Mumbai', 'Indien', 'Inde culturel'],
+    'inde': ['Inde', 'Delhi', 'Mumbai', 'Indien', 'Inde culturel'],
+    'indonesia': ['Indonésie', 'Bali', 'Jakarta', 'Indonésien', 'Indonésie culturel'],
+    'indonésie': ['Indonésie', 'Bali', 'Jakarta', 'Indonésien', 'Indonésie culturel'],
+    'malaysia': ['Malaisie', 'Kuala Lumpur', 'Malaisien', 'Malaisie culturel'],
+    'malaisie': ['Malaisie', 'Kuala Lumpur', 'Malaisien', 'Malaisie culturel'],
+    'singapore': ['Singapour', 'Singapourien', 'Singapour culturel'],
+    'singapour': ['Singapour', 'Singapourien', 'Singapour culturel'],
+    'cambodia': ['Cambodge', 'Phnom Penh', 'Cambodgien', 'Cambodge culturel'],
+    'cambodge': ['Cambodge', 'Phnom Penh', 'Cambodgien', 'Cambodge culturel'],
+    'laos': ['Laos', 'Vientiane', 'Laotien', 'Laos culturel'],
+    'myanmar': ['Myanmar', 'Rangoon', 'Myanmarais', 'Myanmar culturel'],
+    'sri lanka': ['Sri Lanka', 'Colombo', 'Sri Lankais', 'Sri Lanka culturel'],
+    'nepal': ['Népal', 'Katmandou', 'Népalais', 'Népal culturel'],
+    'népal': ['Népal', 'Katmandou', 'Népalais', 'Népal culturel'],
+    'bhutan': ['Bhoutan', 'Thimphou', 'Bhoutanais', 'Bhoutan culturel'],
+    'mongolia': ['Mongolie', 'Oulan-Bator', 'Mongol', 'Mongolie culturel'],
+    'mongolie': ['Mongolie', 'Oulan-Bator', 'Mongol', 'Mongolie culturel'],
+    'maldives': ['Maldives', 'Maldive', 'Îles Maldives', 'Atoll Maldives', 'Plage paradisiaque', 'Eau turquoise', 'Bungalow sur pilotis', 'Océan Indien', 'Atoll', 'Plage de sable blanc', 'Snorkeling', 'Plongée', 'Resort de luxe'],
+    'maldive': ['Maldives', 'Maldive', 'Îles Maldives', 'Atoll Maldives', 'Plage paradisiaque', 'Eau turquoise', 'Bungalow sur pilotis', 'Océan Indien', 'Atoll', 'Plage de sable blanc', 'Snorkeling', 'Plongée', 'Resort de luxe'],
+    'australia': ['Australie', 'Sydney', 'Melbourne', 'Perth', 'Adélaïde', 'Darwin', 'Cairns', 'Brisbane', 'Australien', 'Australie culturel', 'Outback', 'Great Barrier Reef', 'Uluru', 'Kangaroo Island', 'Gold Coast'],
+    'australie': ['Australie', 'Sydney', 'Melbourne', 'Perth', 'Adélaïde', 'Darwin', 'Cairns', 'Brisbane', 'Australien', 'Australie culturel', 'Outback', 'Great Barrier Reef', 'Uluru', 'Kangaroo Island', 'Gold Coast']
+}
+
+# Preferences the semantic query is built from; the query is memoized on their values
+_QUERY_FIELDS = ('destination', 'duration', 'style', 'budget_amount', 'group_size', 'travel_dates')
+_QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+
+# Weight of the vector similarity in the local ranking, the rest goes to preference overlap
+_VECTOR_SCORE_WEIGHT = 0.7
+# The LLM matcher is only asked to rank when the two best local scores are this close
+_LLM_RERANK_MARGIN = 0.05
+
+# Static ranking instructions, sent as the system message; only preferences and offers change per call
+_RANKING_SYSTEM_PROMPT = """You are an expert travel offer matcher. Rank the offers based on user preferences. You MUST RESPOND IN FRENCH.
+
+RANK the offers by relevance to user preferences and return a JSON array with:
+- product_name: the offer name
+- match_score: 0.0-1.0 (how well it matches preferences)
+- reasoning: brief explanation in French
+
+RESPOND ONLY WITH VALID JSON ARRAY"""
 
 class RecommendationEngineComponent(PipelineComponent):
     """Handles offer recommendation and matching"""
@@ -21,6 +79,7 @@ class RecommendationEngineComponent(PipelineComponent):
         self.data_service = data_service
         self._offers_cache = {}
         self._last_preferences = {}
+        self._query_cache: 'OrderedDict[tuple, str]' = OrderedDict()
     
     def is_required(self, context: PipelineContext) -> bool:
         """Required when user wants to see offers"""
@@ -106,49 +165,25 @@ class RecommendationEngineComponent(PipelineComponent):
         return hashlib.md5(str(sorted_prefs).encode()).hexdigest()
     
     def _build_enhanced_query(self, preferences: Dict[str, Any]) -> str:
-        """Build enhanced search query from preferences"""
+        """Build enhanced search query from preferences, reusing the query of identical preferences"""
+        key = tuple(repr(preferences.get(field)) for field in _QUERY_FIELDS)
+        query = self._query_cache.get(key)
+        if query is None:
+            query = self._query_cache[key] = self._compose_enhanced_query(preferences)
+            if len(self._query_cache) > _QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        else:
+            self._query_cache.move_to_end(key)
+        return query
+    
+    def _compose_enhanced_query(self, preferences: Dict[str, Any]) -> str:
         query_parts = []
         
-        # Enhanced destination mapping
-        destination_mappings = {
-            'japan': ['Japon', 'Tokyo', 'Kyoto', 'Osaka', 'Japonais', 'Japon traditionnel', 'Japon culturel'],
-            'japon': ['Japon', 'Tokyo', 'Kyoto', 'Osaka', 'Japonais', 'Japon traditionnel', 'Japon culturel'],
-            'philippines': ['Philippines', 'Manille', 'Cebu', 'Palawan', 'Philippin', 'Philippines culturel'],
-            'philippine': ['Philippines', 'Manille', 'Cebu', 'Palawan', 'Philippin', 'Philippines culturel'],
-            'thailand': ['Thaïlande', 'Bangkok', 'Phuket', 'Chiang Mai', 'Thaï', 'Thaïlande culturel'],
-            'thaïlande': ['Thaïlande', 'Bangkok', 'Phuket', 'Chiang Mai', 'Thaï', 'Thaïlande culturel'],
-            'vietnam': ['Vietnam', 'Hanoï', 'Ho Chi Minh', 'Halong', 'Vietnamien', 'Vietnam culturel'],
-            'china': ['Chine', 'Pékin', 'Shanghai', 'Chinois', 'Chine culturel'],
-            'chine': ['Chine', 'Pékin', 'Shanghai', 'Chinois', 'Chine culturel'],
-            'india': ['Inde', 'Delhi', 'Mumbai', 'Indien', 'Inde culturel'],
-            'inde': ['Inde', 'Delhi', 'Mumbai', 'Indien', 'Inde culturel'],
-            'indonesia': ['Indonésie', 'Bali', 'Jakarta', 'Indonésien', 'Indonésie culturel'],
-            'indonésie': ['Indonésie', 'Bali', 'Jakarta', 'Indonésien', 'Indonésie culturel'],
-            'malaysia': ['Malaisie', 'Kuala Lumpur', 'Malaisien', 'Malaisie culturel'],
-            'malaisie': ['Malaisie', 'Kuala Lumpur', 'Malaisien', 'Malaisie culturel'],
-            'singapore': ['Singapour', 'Singapourien', 'Singapour culturel'],
-            'singapour': ['Singapour', 'Singapourien', 'Singapour culturel'],
-            'cambodia': ['Cambodge', 'Phnom Penh', 'Cambodgien', 'Cambodge culturel'],
-            'cambodge': ['Cambodge', 'Phnom Penh', 'Cambodgien', 'Cambodge culturel'],
-            'laos': ['Laos', 'Vientiane', 'Laotien', 'Laos culturel'],
-            'myanmar': ['Myanmar', 'Rangoon', 'Myanmarais', 'Myanmar culturel'],
-            'sri lanka': ['Sri Lanka', 'Colombo', 'Sri Lankais', 'Sri Lanka culturel'],
-            'nepal': ['Népal', 'Katmandou', 'Népalais', 'Népal culturel'],
-            'népal': ['Népal', 'Katmandou', 'Népalais', 'Népal culturel'],
-            'bhutan': ['Bhoutan', 'Thimphou', 'Bhoutanais', 'Bhoutan culturel'],
-            'mongolia': ['Mongolie', 'Oulan-Bator', 'Mongol', 'Mongolie culturel'],
-            'mongolie': ['Mongolie', 'Oulan-Bator', 'Mongol', 'Mongolie culturel'],
-            'maldives': ['Maldives', 'Maldive', 'Îles Maldives', 'Atoll Maldives', 'Plage paradisiaque', 'Eau turquoise', 'Bungalow sur pilotis', 'Océan Indien', 'Atoll', 'Plage de sable blanc', 'Snorkeling', 'Plongée', 'Resort de luxe'],
-            'maldive': ['Maldives', 'Maldive', 'Îles Maldives', 'Atoll Maldives', 'Plage paradisiaque', 'Eau turquoise', 'Bungalow sur pilotis', 'Océan Indien', 'Atoll', 'Plage de sable blanc', 'Snorkeling', 'Plongée', 'Resort de luxe'],
-            'australia': ['Australie', 'Sydney', 'Melbourne', 'Perth', 'Adélaïde', 'Darwin', 'Cairns', 'Brisbane', 'Australien', 'Australie culturel', 'Outback', 'Great Barrier Reef', 'Uluru', 'Kangaroo Island', 'Gold Coast'],
-            'australie': ['Australie', 'Sydney', 'Melbourne', 'Perth', 'Adélaïde', 'Darwin', 'Cairns', 'Brisbane', 'Australien', 'Australie culturel', 'Outback', 'Great Barrier Reef', 'Uluru', 'Kangaroo Island', 'Gold Coast']
-        }
-        
         # Add destination terms with enhanced matching
         if preferences.get('destination'):
             destination_lower = preferences['destination'].lower()
-            if destination_lower in destination_mappings:
-                query_parts.extend(destination_mappings[destination_lower])
+            if destination_lower in _DESTINATION_QUERY_TERMS:
+                query_parts.extend(_DESTINATION_QUERY_TERMS[destination_lower])
                 # Add additional context for better matching
                 query_parts.extend([
                     f"circuit {destination_lower}",
@@ -243,7 +278,8 @@ class RecommendationEngineComponent(PipelineComponent):
         """Use sentence transformer to find similar offers"""
         try:
             self.logger.info(f"🔍 Searching for query: '{query}' with top_k={top_k}")
-            offers = self.semantic_service.search(query, top_k=top_k)
+            # search is synchronous (embedding + FAISS), keep it off the event loop
+            offers = await asyncio.to_thread(self.semantic_service.search, query, top_k=top_k)
             
             self.logger.info(f"🔍 Semantic service returned {len(offers)} offers")
             
@@ -271,22 +307,33 @@ class RecommendationEngineComponent(PipelineComponent):
             return await self._fallback_offers({}, top_k)
     
     async def _ai_refine_offers(self, vector_results: List[Dict], preferences: Dict[str, Any], max_offers: int = 3) -> List[Dict]:
-        """Use LLM to rank and select the best offers"""
+        """
+        Rank and select the best offers
+        - Locally from vector similarity and preference overlap when there is a clear winner
+        - With the LLM matcher when the two best candidates are too close to call
+        """
         try:
             if not vector_results:
                 return []
             
-            # Create simplified offers for LLM processing
+            ranked = self._rank_by_preferences(vector_results, preferences)
+            if len(ranked) < 2 or ranked[0][0] - ranked[1][0] >= _LLM_RERANK_MARGIN:
+                self.logger.info("⚡ Offers ranked locally, skipping the LLM matcher")
+                return [self._with_local_match(score, overlap, offer) for score, overlap, offer in ranked[:max_offers]]
+            
+            # Only the fields the ranking needs, prompt length drives the matcher latency
             simplified_offers = []
             for offer in vector_results:
                 simplified_offer = {
                     'product_name': offer.get('product_name', ''),
                     'description': offer.get('description', '')[:200],  # Truncate for token efficiency
-                    'destinations': offer.get('destinations', []),
+                    'destinations': [
+                        f"{dest.get('city', '')} ({dest.get('country', '')})" for dest in offer.get('destinations', [])
+                    ],
                     'duration': offer.get('duration', ''),
-                    'price_range': offer.get('price_range', ''),
+                    'price': (offer.get('price') or {}).get('amount'),
                     'offer_type': offer.get('offer_type', ''),
-                    'highlights': offer.get('highlights', [])[:3]  # Limit highlights
+                    'vector_score': round(float(offer.get('similarity_score', 0.0)), 3)
                 }
                 simplified_offers.append(simplified_offer)
             
@@ -294,7 +341,10 @@ class RecommendationEngineComponent(PipelineComponent):
             prompt = self._build_ranking_prompt(simplified_offers, preferences)
             
             # Get LLM ranking
-            messages = [{"role": "user", "content": prompt}]
+            messages = [
+                {"role": "system", "content": _RANKING_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
             response = await self.llm_service.create_matcher_completion(messages, stream=False)
             ranked_offers = self._parse_ranking_response(response, vector_results)
             
@@ -304,32 +354,39 @@ class RecommendationEngineComponent(PipelineComponent):
             self.logger.error(f"❌ AI refinement failed: {e}")
             return vector_results[:max_offers]  # Fallback to original order
     
+    def _rank_by_preferences(self, offers: List[Dict], preferences: Dict[str, Any]) -> List[tuple]:
+        """(score, preference overlap, offer) tuples, best first"""
+        ranked = []
+        for offer in offers:
+            overlap = self._calculate_simple_match_score(offer, preferences)
+            vector_score = float(offer.get('similarity_score', 0.0))
+            score = _VECTOR_SCORE_WEIGHT * vector_score + (1 - _VECTOR_SCORE_WEIGHT) * overlap
+            ranked.append((score, overlap, offer))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+    
+    def _with_local_match(self, score: float, overlap: float, offer: Dict) -> Dict:
+        """Copy of the offer with the match fields the LLM matcher would have set"""
+        ranked_offer = offer.copy()
+        ranked_offer['match_score'] = round(score, 3)
+        if overlap >= 0.7:
+            ranked_offer['match_reasoning'] = "Correspond bien à vos critères"
+        elif overlap >= 0.4:
+            ranked_offer['match_reasoning'] = "Correspond en partie à vos critères"
+        else:
+            ranked_offer['match_reasoning'] = "Proche de votre recherche"
+        return ranked_offer
+    
     def _build_ranking_prompt(self, offers: List[Dict], preferences: Dict[str, Any]) -> str:
-        """Build prompt for LLM offer ranking"""
-        return f"""
-You are an expert travel offer matcher. Rank these offers based on user preferences. You MUST RESPOND IN FRENCH.
-
-USER PREFERENCES: {json.dumps(preferences, indent=2, ensure_ascii=False)}
-
-AVAILABLE OFFERS:
-{json.dumps(offers, indent=2, ensure_ascii=False)}
-
-RANK the offers by relevance to user preferences and return a JSON array with:
-- product_name: the offer name
-- match_score: 0.0-1.0 (how well it matches preferences)
-- reasoning: brief explanation in French
-
-RESPOND ONLY WITH VALID JSON ARRAY:
-"""
+        """Build the per-call part of the ranking prompt"""
+        return f"USER PREFERENCES: {dumps(preferences)}\n\nAVAILABLE OFFERS:\n{dumps(offers)}"
     
     def _parse_ranking_response(self, response: str, original_offers: List[Dict]) -> List[Dict]:
         """Parse LLM ranking response and return ranked offers"""
         try:
             # Extract JSON array from response
-            import re
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                ranking = json.loads(json_match.group())
+            ranking = extract_json(response, open_char='[')
+            if ranking is not None:
                 
                 # Create mapping of product names to original offers
                 offer_map = {offer['product_name']: offer for offer in original_offers}
@@ -369,13 +426,15 @@ RESPOND ONLY WITH VALID JSON ARRAY:
             for offer in all_offers:
                 score = self._calculate_simple_match_score(offer, preferences)
                 if score > 0.3:  # Minimum threshold
-                    offer_with_score = offer.copy()
-                    offer_with_score['match_score'] = score
-                    matching_offers.append(offer_with_score)
+                    matching_offers.append((score, offer))
             
-            # Sort by score and return top offers
-            matching_offers.sort(key=lambda x: x.get('match_score', 0), reverse=True)
-            return matching_offers[:offer_count]
+            # Keep the top offers by score, only those are copied
+            top_offers = []
+            for score, offer in heapq.nlargest(offer_count, matching_offers, key=lambda x: x[0]):
+                offer_with_score = offer.copy()
+                offer_with_score['match_score'] = score
+                top_offers.append(offer_with_score)
+            return top_offers
             
         except Exception as e:
             self.logger.error(f"❌ Fallback offer selection failed: {e}")
@@ -394,7 +453,7 @@ RESPOND ONLY WITH VALID JSON ARRAY:
         # Duration matching
         if preferences.get('duration'):
             offer_duration = offer.get('duration', '')
-            if preferences['duration'] in offer_duration:
+            if str(preferences['duration']) in str(offer_duration):
                 score += 0.3
         
         # Style matching
@@ -407,7 +466,7 @@ RESPOND ONLY WITH VALID JSON ARRAY:
         if preferences.get('budget_amount'):
             try:
                 budget_amount = float(preferences['budget_amount'])
-                offer_price = offer.get('price', {}).get('amount', 0)
+                offer_price = (offer.get('price') or {}).get('amount', 0)
                 
                 # Allow offers within 30% of the budget
                 budget_tolerance = budget_amount * 0.3
@@ -3,11 +3,16 @@ Response Generator Component for ASIA.fr Agent
 Handles text generation and response formatting
 """
 
-import json
+import re
 from typing import Dict, Any, List
 from ..core import PipelineComponent, PipelineContext, PipelineState
 from services.llm_service import LLMService
 from services.memory_service import MemoryService
+from core.json_utils import dumps
+
+_NUMBERED_ITEM_RE = re.compile(r'^\d+\.\s*', re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_BULLET_SPACING_RE = re.compile(r'•\s*')
 
 class ResponseGeneratorComponent(PipelineComponent):
     """Generates intelligent responses based on pipeline context"""
@@ -146,7 +151,7 @@ class ResponseGeneratorComponent(PipelineComponent):
         # Build context string
         context_str = ""
         if preferences:
-            context_str = f"\nPréférences actuelles: {json.dumps(preferences, indent=2, ensure_ascii=False)}"
+            context_str = f"\nPréférences actuelles: {dumps(preferences)}"
         
         history_str = ""
         if conversation_history:
@@ -201,7 +206,7 @@ RÉPONSE:
             prompt = f"""
 You are ASIA.fr Agent, a French travel specialist. Generate a personalized introduction for the offers you're about to present.
 
-USER PREFERENCES: {json.dumps(context.user_preferences, indent=2, ensure_ascii=False)}
+USER PREFERENCES: {dumps(context.user_preferences)}
 OFFER COUNT: {len(offers)}
 
 Generate a warm, personalized introduction in French that:
@@ -229,7 +234,7 @@ RESPOND ONLY WITH THE INTRODUCTION TEXT:
             prompt = f"""
 You are ASIA.fr Agent, a friendly and enthusiastic French travel specialist with a warm personality like Layla.ai. The user has confirmed their preferences and you're excited to show them amazing offers!
 
-USER PREFERENCES: {json.dumps(context.user_preferences, indent=2, ensure_ascii=False)}
+USER PREFERENCES: {dumps(context.user_preferences)}
 
 Generate a warm, enthusiastic confirmation response in French that:
 1. 🌟 Acknowledges their confirmation with genuine excitement
@@ -262,7 +267,7 @@ RESPOND ONLY WITH THE CONFIRMATION TEXT:
             prompt = f"""
 You are ASIA.fr Agent, a friendly and enthusiastic French travel specialist with a warm personality like Layla.ai. The user wants to modify their preferences and you're happy to help them get it perfect!
 
-CURRENT PREFERENCES: {json.dumps(context.user_preferences, indent=2, ensure_ascii=False)}
+CURRENT PREFERENCES: {dumps(context.user_preferences)}
 USER INPUT: {context.user_input}
 
 Generate a warm, helpful response in French that:
@@ -302,7 +307,7 @@ RESPOND ONLY WITH THE MODIFICATION RESPONSE:
                 prompt = f"""
 You are ASIA.fr Agent, a friendly and enthusiastic French travel specialist with a warm personality like Layla.ai. You're passionate about helping people discover amazing Asian destinations and you show genuine excitement about their travel dreams.
 
-CURRENT PREFERENCES: {json.dumps(context.user_preferences, indent=2, ensure_ascii=False)}
+CURRENT PREFERENCES: {dumps(context.user_preferences)}
 USER INPUT: {context.user_input}
 
 Generate a warm, friendly response in French that:
@@ -350,7 +355,7 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
                 prompt = f"""
 You are ASIA.fr Agent, a friendly and enthusiastic French travel specialist. The user has provided travel preferences and you need to create a natural summary and ask for confirmation.
 
-CURRENT PREFERENCES: {json.dumps(context.user_preferences, indent=2, ensure_ascii=False)}
+CURRENT PREFERENCES: {dumps(context.user_preferences)}
 PREFERENCE SUMMARY: {preference_summary}
 USER INPUT: {context.user_input}
 
@@ -396,10 +401,8 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     
     def _format_with_bullet_points(self, text: str) -> str:
         """Format text to ensure proper bullet points with line breaks"""
-        import re
-        
         # Replace "1. ", "2. ", "3. ", "4. " etc. with "• "
-        text = re.sub(r'^\d+\.\s*', '• ', text, flags=re.MULTILINE)
+        text = _NUMBERED_ITEM_RE.sub('• ', text)
         
         # Split text into lines and process each line
         lines = text.split('\n')
@@ -421,10 +424,10 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
         result = '\n'.join(formatted_lines)
         
         # Remove multiple consecutive empty lines
-        result = re.sub(r'\n{3,}', '\n\n', result)
+        result = _BLANK_LINES_RE.sub('\n\n', result)
         
         # Ensure bullet points are properly spaced
-        result = re.sub(r'•\s*', '• ', result)
+        result = _BULLET_SPACING_RE.sub('• ', result)
         
         return result.strip()
     
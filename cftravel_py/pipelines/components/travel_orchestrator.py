@@ -4,11 +4,734 @@ Handles the preference-confirmation-search flow with no hardcoded conditions
 """
 
 import json
+import re
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+import bisect
+import heapq
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
+from services.cache_service import cache_client, make_cache_key, semantic_cache
+from services.llm_service import JSON_OBJECT_FORMAT, token_sink
+from core.json_utils import dumps, extract_json
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Country code to name mapping
+_COUNTRY_NAMES = {
+    'jp': 'japon',
+    'vn': 'vietnam',
+    'th': 'thailande',
+    'kh': 'cambodge',
+    'la': 'laos',
+    'mm': 'myanmar',
+    'my': 'malaisie',
+    'sg': 'singapour',
+    'id': 'indonesie',
+    'ph': 'philippines',
+    'in': 'inde',
+    'np': 'nepal',
+    'bd': 'bangladesh',
+    'lk': 'sri lanka',
+    'jo': 'jordanie',
+    'lb': 'liban',
+    'sy': 'syrie',
+    'iq': 'irak',
+    'ir': 'iran',
+    'af': 'afghanistan',
+    'pk': 'pakistan',
+    'cn': 'chine',
+    'kr': 'coree du sud',
+    'kp': 'coree du nord',
+    'mn': 'mongolie',
+    'tw': 'taiwan',
+    'hk': 'hong kong',
+    'mo': 'macao'
+}
+
+@lru_cache(maxsize=1024)
+def _normalize_dest(value: str) -> str:
+    """Lowercase, trim and strip accents so 'Thaïlande' and 'thailande' compare equal"""
+    return unicodedata.normalize('NFD', value.strip().lower()).encode('ascii', 'ignore').decode()
+
+_NORMALIZED_COUNTRY_NAMES = frozenset(_normalize_dest(name) for name in _COUNTRY_NAMES.values())
+_COUNTRY_CODE_BY_NAME = {_normalize_dest(name): code for code, name in _COUNTRY_NAMES.items()}
+
+# Season name to month keywords, in bit order for season masks
+_SEASON_MONTHS = {
+    'été': ['summer', 'june', 'july', 'august'],
+    'hiver': ['winter', 'december', 'january', 'february'],
+    'printemps': ['spring', 'march', 'april', 'may'],
+    'automne': ['autumn', 'september', 'october', 'november']
+}
+
+# One automaton over every month keyword, each mapped to its season bit
+if AHOCORASICK_AVAILABLE:
+    _SEASON_AUTOMATON = ahocorasick.Automaton()
+    for _bit, _months in enumerate(_SEASON_MONTHS.values()):
+        for _month in _months:
+            _SEASON_AUTOMATON.add_word(_month, 1 << _bit)
+    _SEASON_AUTOMATON.make_automaton()
+
+def _season_mask(text: str) -> int:
+    """Bitmask of the seasons whose month keywords appear in the (lowercased) text"""
+    mask = 0
+    if AHOCORASICK_AVAILABLE:
+        for _, bit in _SEASON_AUTOMATON.iter(text):
+            mask |= bit
+        return mask
+    for bit, months in enumerate(_SEASON_MONTHS.values()):
+        if any(month in text for month in months):
+            mask |= 1 << bit
+    return mask
+
+def _user_season_mask(travel_dates: str) -> int:
+    """Season bitmask for the user's travel dates (season names or month keywords)"""
+    user_dates = travel_dates.lower()
+    mask = _season_mask(user_dates)
+    for bit, season in enumerate(_SEASON_MONTHS):
+        if season in user_dates:
+            mask |= 1 << bit
+    return mask
+
+# Style name to offer keywords
+_STYLE_KEYWORDS = {
+    'luxury': ('luxe', 'premium', 'haut de gamme'),
+    'adventure': ('aventure', 'trek', 'exploration'),
+    'cultural': ('culturel', 'culture', 'tradition'),
+    'relaxation': ('détente', 'relaxation', 'bien-être')
+}
+_KEYWORD_TO_STYLE = {kw: style for style, kws in _STYLE_KEYWORDS.items() for kw in kws}
+
+@lru_cache(maxsize=64)
+def _user_style_keywords(user_style: str) -> Optional[frozenset]:
+    """Offer keywords of every style the (lowercased) user style refers to, None if none"""
+    keywords = set()
+    if user_style in _KEYWORD_TO_STYLE:
+        keywords.update(_STYLE_KEYWORDS[_KEYWORD_TO_STYLE[user_style]])
+    for kws in _STYLE_KEYWORDS.values():
+        if any(kw in user_style for kw in kws):
+            keywords.update(kws)
+    return frozenset(keywords) or None
+
+# Characters dropped from price strings like "7,990 €"
+_PRICE_STRIP = str.maketrans('', '', '€, \t\n')
+
+# Duration parsing: user preferences like "2 semaines" / "10 jours", offers like "8 jours / 7 nuits"
+_DAYS_RE = re.compile(r'(\d+)\s*(jours?|days?)')
+_WEEKS_RE = re.compile(r'(\d+)\s*(semaines?|weeks?)')
+_NIGHTS_RE = re.compile(r'(\d+)\s*(nuits?|nights?)')
+_LEADING_NUMBER_RE = re.compile(r'(\d+)')
+
+@lru_cache(maxsize=128)
+def _parse_user_days(duration_text: str) -> int:
+    """Number of days in a (lowercased) duration preference, 0 if it can't be parsed"""
+    days_match = _DAYS_RE.search(duration_text)
+    if days_match:
+        return int(days_match.group(1))
+    weeks_match = _WEEKS_RE.search(duration_text)
+    if weeks_match:
+        return int(weeks_match.group(1)) * 7
+    nights_match = _NIGHTS_RE.search(duration_text)
+    if nights_match:
+        return int(nights_match.group(1)) + 1
+    return 0
+
+# Keyword vocabulary for extracting preferences without an LLM call.
+# Terms are accent-folded; values are what the LLM extraction would return.
+_ENGLISH_COUNTRY_NAMES = {
+    'japan': 'jp', 'thailand': 'th', 'cambodia': 'kh', 'burma': 'mm', 'birmanie': 'mm',
+    'malaysia': 'my', 'singapore': 'sg', 'indonesia': 'id', 'bali': 'id', 'india': 'in',
+    'jordan': 'jo', 'lebanon': 'lb', 'china': 'cn', 'south korea': 'kr', 'coree': 'kr',
+    'korea': 'kr', 'mongolia': 'mn'
+}
+_FAST_TERMS = {}
+for _code, _name in _COUNTRY_NAMES.items():
+    _FAST_TERMS[_normalize_dest(_name)] = ('destination', _name.title())
+for _term, _code in _ENGLISH_COUNTRY_NAMES.items():
+    _FAST_TERMS[_term] = ('destination', _COUNTRY_NAMES[_code].title())
+for _keyword, _style in _KEYWORD_TO_STYLE.items():
+    _FAST_TERMS[_normalize_dest(_keyword)] = ('style', _keyword)
+for _style, _keywords in _STYLE_KEYWORDS.items():
+    _FAST_TERMS[_style] = ('style', _keywords[0])
+for _term, _group in (('solo', 'solo'), ('seul', 'solo'), ('seule', 'solo'),
+                      ('couple', 'couple'), ('en amoureux', 'couple'), ('a deux', 'couple'),
+                      ('famille', 'family'), ('family', 'family'), ('enfants', 'family'),
+                      ('amis', 'group'), ('groupe', 'group'), ('friends', 'group')):
+    _FAST_TERMS[_term] = ('group_size', _group)
+# English month names that are also everyday words ("I may travel", "a long march")
+_AMBIGUOUS_MONTH_TERMS = frozenset({'may', 'march'})
+for _season, _months in _SEASON_MONTHS.items():
+    _FAST_TERMS[_normalize_dest(_season)] = ('travel_dates', _season)
+    # English season names map to the French ones understood by _user_season_mask
+    _FAST_TERMS[_months[0]] = ('travel_dates', _season)
+    for _month in _months[1:]:
+        if _month not in _AMBIGUOUS_MONTH_TERMS:
+            _FAST_TERMS[_month] = ('travel_dates', _month)
+for _month in ('janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+               'août', 'septembre', 'octobre', 'novembre', 'décembre'):
+    _FAST_TERMS[_normalize_dest(_month)] = ('travel_dates', _month)
+
+def _compile_terms(terms: Dict[str, Tuple[str, str]]) -> 're.Pattern':
+    """One alternation over the whole vocabulary, longest terms first so 'sri lanka' beats 'sri'"""
+    return re.compile(r'\b(' + '|'.join(map(re.escape, sorted(terms, key=len, reverse=True))) + r')\b')
+
+_FAST_TERMS_RE = _compile_terms(_FAST_TERMS)
+
+# Circuit stops as listed at the top of each offer's programme
+_CIRCUIT_STOPS_RE = re.compile(r"Les étapes[^:\n]*:\s*([^\n]+)")
+_CIRCUIT_STOP_SPLIT_RE = re.compile(r'[,()]')
+# Stops named with everyday words ("Plage", "Sur" in Oman) that would fire on any input
+_GENERIC_STOP_TERMS = frozenset({'plage', 'sur', 'sour', 'backwaters'})
+
+def _catalog_destination_terms(offers: List[Dict[str, Any]]) -> Dict[str, Tuple[str, str]]:
+    """
+    Cities of the catalog's circuits, each mapped to "City, Country" when its offer is in a
+    single known country so the destination score still matches the offer's country
+    """
+    terms = {}
+    for offer in offers:
+        stops = _CIRCUIT_STOPS_RE.search(offer.get('programme') or '')
+        if not stops:
+            continue
+        countries = {_COUNTRY_NAMES.get(_normalize_dest(dest.get('country', '')))
+                     for dest in offer.get('destinations') or []}
+        countries.discard(None)
+        country = countries.pop().title() if len(countries) == 1 else None
+        for stop in _CIRCUIT_STOP_SPLIT_RE.split(stops.group(1)):
+            stop = stop.strip()
+            term = _normalize_dest(stop)
+            if (len(term) >= 3 and not term[0].isdigit()
+                    and term not in _GENERIC_STOP_TERMS and term not in terms):
+                terms[term] = ('destination', f"{stop}, {country}" if country else stop)
+    return terms
+
+# Keyword vocabulary extended with the catalog's cities, built once per offer list
+_catalog_vocabulary: Optional[Tuple[List[Dict[str, Any]], Dict[str, Tuple[str, str]], 're.Pattern']] = None
+
+def _fast_vocabulary(offers: List[Dict[str, Any]]) -> Tuple[Dict[str, Tuple[str, str]], 're.Pattern']:
+    global _catalog_vocabulary
+    if _catalog_vocabulary is None or _catalog_vocabulary[0] is not offers:
+        terms = _catalog_destination_terms(offers)
+        # Countries, months and styles keep their fixed values
+        terms.update(_FAST_TERMS)
+        _catalog_vocabulary = (offers, terms, _compile_terms(terms))
+    return _catalog_vocabulary[1], _catalog_vocabulary[2]
+
+# Capitalized name after a place preposition ("à Tokyo", "to Kyoto"), likely a destination
+_PLACE_MENTION_RE = re.compile(
+    r"\b(?:à|a|au|aux|en|vers|to|in|visiter|visit)\s+([A-ZÀ-Ý][\w'-]*(?:\s+[A-ZÀ-Ý][\w'-]*)*)"
+)
+_FAST_DURATION_RE = re.compile(r'\b(\d+)\s*(jours?|days?|semaines?|weeks?|nuits?|nights?)\b')
+_FAST_GROUP_RE = re.compile(r'\b(\d+)\s*(?:personnes?|people|persons?|adultes?|adults?|voyageurs?|travell?ers?)\b')
+_THOUSANDS_SEPARATOR_RE = re.compile(r'[\s.,]')
+_FAST_BUDGET_RE = re.compile(r'(\d{1,3}(?:[\s.,]\d{3})+|\d+)\s*(?:€|euros?\b|eur\b)')
+
+def _fold_input(user_input: str) -> str:
+    """Lowercased input without accents, the form the keyword vocabulary is matched against"""
+    return unicodedata.normalize('NFD', user_input.lower()).encode('ascii', 'ignore').decode()
+
+def _fast_extract_preferences(user_input: str, terms: Dict[str, Tuple[str, str]] = _FAST_TERMS,
+                              terms_re: 're.Pattern' = _FAST_TERMS_RE) -> Dict[str, Any]:
+    """Keyword/regex preference extraction, one pass per pattern over the input"""
+    text = user_input.lower()
+    folded = _fold_input(user_input)
+    preferences = {}
+    
+    for match in terms_re.finditer(folded):
+        field, value = terms[match.group(1)]
+        preferences.setdefault(field, value)
+    
+    duration_match = _FAST_DURATION_RE.search(folded)
+    if duration_match:
+        preferences['duration'] = f"{duration_match.group(1)} {duration_match.group(2)}"
+    
+    group_match = _FAST_GROUP_RE.search(folded)
+    if group_match:
+        preferences['group_size'] = f"{group_match.group(1)} personnes"
+    
+    budget_match = _FAST_BUDGET_RE.search(text)
+    if budget_match:
+        amount = _THOUSANDS_SEPARATOR_RE.sub('', budget_match.group(1))
+        if amount:
+            preferences['budget_amount'] = float(amount)
+    
+    return preferences
+
+# Preferences that must all be set before searching offers
+_REQUIRED_PREFERENCE_FIELDS = ('destination', 'duration', 'travel_dates')
+
+# Fewest fields the keyword pass must resolve before the LLM extraction is skipped,
+# down to one for short answers like "Japon" or "10 jours" that leave nothing else to extract
+_FAST_EXTRACTION_MIN_FIELDS = 2
+_FAST_EXTRACTION_SHORT_INPUT_WORDS = 4
+
+# Negations and corrections ("pas le Japon, plutôt la Thaïlande"): the first keyword hit may be
+# the rejected value, which only the LLM extraction can tell apart
+_CORRECTION_RE = re.compile(r"\b(?:pas|ne|n|non|plutot|finalement|sauf|not|no|instead|rather)\b")
+
+def _has_conflicting_terms(folded: str, terms: Dict[str, Tuple[str, str]], terms_re: 're.Pattern') -> bool:
+    """Whether the (folded) input gives two different values for the same field"""
+    values = {}
+    for match in terms_re.finditer(folded):
+        field, value = terms[match.group(1)]
+        if values.setdefault(field, value) != value:
+            return True
+    return len(set(_FAST_DURATION_RE.findall(folded))) > 1
+
+def _mentions_unknown_place(user_input: str, terms_re: 're.Pattern') -> bool:
+    """Whether the input names a place (see _PLACE_MENTION_RE) the vocabulary doesn't know"""
+    for match in _PLACE_MENTION_RE.finditer(user_input):
+        if not terms_re.search(_normalize_dest(match.group(1))):
+            return True
+    return False
+
+def _fast_extraction_suffices(user_input: str, fast_preferences: Dict[str, Any],
+                              terms: Dict[str, Tuple[str, str]], terms_re: 're.Pattern',
+                              has_destination: bool) -> bool:
+    """
+    Whether the keyword pass can stand in for the LLM extraction: never without a destination
+    (found now or earlier in the conversation), nor when the input names an unknown place,
+    negates or corrects itself, or gives two values for one field. These checks come before
+    the short input shortcut, "pas le Japon" being as short as "Japon".
+    """
+    if not has_destination and 'destination' not in fast_preferences:
+        return False
+    folded = _fold_input(user_input)
+    if _CORRECTION_RE.search(folded) or _has_conflicting_terms(folded, terms, terms_re):
+        return False
+    if _mentions_unknown_place(user_input, terms_re):
+        return False
+    if len(fast_preferences) >= _FAST_EXTRACTION_MIN_FIELDS:
+        return True
+    return bool(fast_preferences) and len(user_input.split()) <= _FAST_EXTRACTION_SHORT_INPUT_WORDS
+
+def _merge_preferences(fast_preferences: Dict[str, Any], llm_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """LLM values take precedence, keyword hits fill the gaps"""
+    fast_preferences.update((key, value) for key, value in llm_preferences.items() if value is not None)
+    return fast_preferences
+
+# Parsed (duration in days, price) of each offer dict, by id. The offer is kept alongside
+# so its id can't be reused, and the dicts themselves, which are sent to clients, stay untouched.
+_PARSED_OFFER_FIELDS: Dict[int, Tuple[Dict[str, Any], Optional[int], Optional[float]]] = {}
+# Search results are copies of the catalog offers, so start over rather than grow without bound
+_PARSED_OFFER_FIELDS_MAX = 4096
+
+# Compact JSON of each offer as shown to the LLM matcher, by reference. Offers are static,
+# so each one is serialized once per process instead of on every recommendation turn.
+_OFFER_SUMMARY_CACHE: Dict[str, str] = {}
+
+def _llm_offer_summary(offer: Dict[str, Any]) -> str:
+    """Serialized matcher view of an offer, without the opening brace so an id can be prepended"""
+    reference = offer.get('reference')
+    summary = _OFFER_SUMMARY_CACHE.get(reference) if reference else None
+    if summary is None:
+        summary = dumps({
+            'name': offer.get('product_name', 'Unknown'),
+            'destination': ', '.join([d.get('country', '') for d in offer.get('destinations', [])]),
+            'duration': f"{offer.get('duration', 0)} jours",
+            'price': f"{offer.get('price', {}).get('amount', 0)}€",
+            'style': offer.get('offer_type', 'Standard'),
+            'description': offer.get('description', '')[:200] + '...' if offer.get('description') else ''
+        })[1:]
+        if reference:
+            _OFFER_SUMMARY_CACHE[reference] = summary
+    return summary
+
+# Messages made only of these words are greetings/thanks: no intent analysis or extraction needed
+_GREETING_WORDS = frozenset({
+    'bonjour', 'bonsoir', 'salut', 'coucou', 'hello', 'hi', 'hey', 'merci', 'beaucoup',
+    'thanks', 'thank', 'you', 'au', 'revoir', 'bye', 'ciao', 'madame', 'monsieur', 'a', 'vous', 'bien'
+})
+_WORD_RE = re.compile(r"[a-z]+")
+
+# The greeting prompt only sees the user input, so replies to a plain greeting are shared by
+# every conversation (and every worker through Redis) for a day
+_GREETING_CACHE_TTL = 86400
+
+def _input_words(user_input: str) -> List[str]:
+    folded = unicodedata.normalize('NFD', user_input.lower()).encode('ascii', 'ignore').decode()
+    return _WORD_RE.findall(folded)
+
+def _is_plain_greeting(user_input: str) -> bool:
+    """True when the input is nothing but greeting words and punctuation"""
+    words = _input_words(user_input)
+    return bool(words) and all(word in _GREETING_WORDS for word in words)
+
+# Substrings that make a reply to the preference summary a confirmation
+_CONFIRMATION_KEYWORDS = ('oui', 'yes', 'correct', 'parfait', 'ok', "d'accord", 'confirmer',
+                          "c'est bon", 'c est bon', 'go', 'vas-y', 'vas y')
+
+# One automaton over every keyword: a single pass over the input instead of one scan per keyword
+if AHOCORASICK_AVAILABLE:
+    _CONFIRMATION_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _CONFIRMATION_KEYWORDS:
+        _CONFIRMATION_AUTOMATON.add_word(_keyword, _keyword)
+    _CONFIRMATION_AUTOMATON.make_automaton()
+
+def _is_confirmation(user_input: str) -> bool:
+    """True when the input contains any confirmation keyword"""
+    text = user_input.lower()
+    if AHOCORASICK_AVAILABLE:
+        return next(_CONFIRMATION_AUTOMATON.iter(text), None) is not None
+    return any(keyword in text for keyword in _CONFIRMATION_KEYWORDS)
+
+# Piecewise score tables: a value <= THRESHOLDS[k] (and above the previous one) scores SCORES[k]
+_DUR_THRESHOLDS = (2, 5, 10)
+_DUR_SCORES = (1.0, 0.8, 0.6, 0.3)
+_BUD_THRESHOLDS = (0.1, 0.2, 0.3)
+_BUD_SCORES = (1.0, 0.8, 0.6, 0.3)
+
+# Price buckets: below 2000 -> €€€, below 5000 -> €€€€, otherwise €€€€€
+_BUDGET_THRESHOLDS = (2000.0, 5000.0)
+_BUDGET_LABELS = ('€€€', '€€€€', '€€€€€')
+
+# Weights of the destination, duration, budget, style and date sub-scores
+_MATCH_WEIGHTS = np.array([0.6, 0.2, 0.15, 0.03, 0.02])
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _score_kernel(dest_matches, durations, prices, price_valid, style_ids, style_table,
+                      date_flags, has_field, user_days, user_budget, user_season_mask, weights):
+        """Native per-offer match score, same rules as TravelOrchestrator._calculate_match_score"""
+        n = durations.shape[0]
+        scores = np.zeros(n)
+        for i in prange(n):
+            score = 0.0
+            total_weight = 0.0
+            
+            if weights[0] > 0.0 and has_field[0, i]:
+                score += dest_matches[i] * weights[0]
+                total_weight += weights[0]
+            
+            if weights[1] > 0.0 and has_field[1, i]:
+                if user_days == 0:
+                    match = 0.5
+                elif durations[i] < 0:
+                    match = 0.0
+                else:
+                    diff = abs(durations[i] - user_days)
+                    match = 1.0 if diff <= 2 else 0.8 if diff <= 5 else 0.6 if diff <= 10 else 0.3
+                score += match * weights[1]
+                total_weight += weights[1]
+            
+            if weights[2] > 0.0 and has_field[2, i]:
+                # NaN prices are masked up front since fastmath assumes finite values
+                if user_budget == 0.0 or not price_valid[i]:
+                    match = 0.0
+                else:
+                    pct = abs(prices[i] - user_budget) / user_budget
+                    match = 1.0 if pct <= 0.1 else 0.8 if pct <= 0.2 else 0.6 if pct <= 0.3 else 0.3
+                score += match * weights[2]
+                total_weight += weights[2]
+            
+            if weights[3] > 0.0 and has_field[3, i]:
+                score += style_table[style_ids[i]] * weights[3]
+                total_weight += weights[3]
+            
+            if weights[4] > 0.0 and has_field[4, i]:
+                match = 1.0 if (date_flags[i] & user_season_mask) != 0 else 0.5
+                score += match * weights[4]
+                total_weight += weights[4]
+            
+            if total_weight > 0.0:
+                scores[i] = score / total_weight
+        return scores
+    
+    @njit(cache=True, nogil=True)
+    def _top_k_kernel(scores, k):
+        """Indices of the k largest scores, best first, by partial insertion sort (ties keep the lower index)"""
+        k = min(k, scores.shape[0])
+        top = np.empty(k, dtype=np.int64)
+        count = 0
+        for i in range(scores.shape[0]):
+            value = scores[i]
+            if count == k and (k == 0 or value <= scores[top[k - 1]]):
+                continue
+            j = count if count < k else k - 1
+            while j > 0 and scores[top[j - 1]] < value:
+                top[j] = top[j - 1]
+                j -= 1
+            top[j] = i
+            if count < k:
+                count += 1
+        return top
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first, ties in index order"""
+    if NUMBA_AVAILABLE:
+        return _top_k_kernel(np.ascontiguousarray(scores, dtype=np.float64), k)
+    return np.array(heapq.nlargest(k, range(len(scores)), key=scores.__getitem__), dtype=np.int64)
+
+# Static instructions of the intent analysis and preference extraction calls. They are sent
+# unchanged as the system message, ahead of the per-turn data, so provider prompt caching applies.
+_INTENT_SYSTEM_PROMPT = """You are ASIA.fr Agent, an intelligent travel specialist. Analyze the user's intent and determine the best course of action.
+
+LANGUAGE REQUIREMENT: You are a French travel agent. All your responses, reasoning, and analysis must be in French.
+
+ANALYZE THE USER INPUT AND PROVIDE A JSON RESPONSE WITH THE FOLLOWING STRUCTURE:
+{
+    "intent": "greeting|confirmation|modification|preference_complete|general|suggestion_request|vague_question|information_request|new_search|recommendation_request",
+    "confidence": 0.0-1.0,
+    "response_type": "greeting|question|preference_summary|show_offers|modification|suggestion|conversation|clarification|information|recommendation",
+    "needs_confirmation": true/false,
+    "has_sufficient_details": true/false,
+    "should_show_offers": true/false,
+    "reasoning": "Your reasoning in French"
+}
+
+DECISION RULES:
+- **should_show_offers**: Set to true if user explicitly wants to see offers, confirms preferences (oui, c'est bon, parfait), or asks for recommendations with sufficient details
+- **needs_confirmation**: Set to true if we have preferences but user hasn't explicitly confirmed them yet
+- **has_sufficient_details**: Set to true if we have destination, duration, and travel_dates (the 3 required fields)
+- **intent**: Choose the most appropriate intent based on what the user is trying to achieve
+
+INTENT TYPES:
+1. **greeting**: User is greeting, thanking, or saying goodbye
+2. **confirmation**: User confirms preferences or wants to see offers
+3. **modification**: User wants to change preferences or modify choices
+4. **preference_complete**: We have sufficient preferences to show summary
+5. **general**: User is asking questions, seeking advice, or providing new information
+6. **suggestion_request**: User wants AI suggestions or recommendations
+7. **vague_question**: User asks vague questions that need clarification
+8. **information_request**: User wants general travel information
+9. **new_search**: User wants to start a new search with different criteria
+10. **recommendation_request**: User wants specific recommendations based on preferences
+
+CONTEXT AWARENESS:
+- If user has already seen offers and wants to modify → intent: "modification"
+- If user asks for suggestions → intent: "suggestion_request"
+- If user asks for specific recommendations → intent: "recommendation_request"
+- If user is just chatting → intent: "general"
+- If user confirms preferences (oui, c'est bon, parfait, etc.) → intent: "confirmation", should_show_offers: true
+- If user wants different offers → intent: "modification"
+- If user asks vague questions → intent: "vague_question"
+- If user wants general info → intent: "information_request"
+- If user wants to start fresh → intent: "new_search"
+
+UNDERSTAND NATURALLY:
+- Don't rely only on keywords, understand the conversation flow
+- Consider what the user is trying to achieve
+- Be flexible and conversational
+- Allow users to modify choices at any time
+- Provide helpful suggestions when appropriate
+- Handle vague questions intelligently
+- Preserve conversation memory and context"""
+
+_PREFERENCE_FIELDS_PROMPT = """IMPORTANT: Only extract NEW preferences that are mentioned in the user input. 
+Do NOT repeat preferences that are already known from the conversation context.
+
+Extract the following preferences if mentioned:
+- destination: specific places, countries, cities
+- duration: how long they want to travel (e.g., "2 weeks", "10 days")
+- budget_amount: numeric amount in euros (e.g., "3000€" = 3000)
+- group_size: who they're traveling with (e.g., "couple", "family", "solo")
+- style: travel style (e.g., "luxury", "adventure", "cultural", "relaxation")
+- travel_dates: when they want to travel (e.g., "summer", "April", "next month")
+- special_requirements: any special needs or preferences"""
+
+_PREFERENCE_EXAMPLE = """{
+  "destination": "Maldives",
+  "duration": "2 weeks", 
+  "budget_amount": 5000,
+  "group_size": "couple",
+  "style": "luxury",
+  "travel_dates": "summer",
+  "special_requirements": ["privacy", "premium accommodations"]
+}"""
+
+_EXTRACTION_SYSTEM_PROMPT = f"""You are a travel preference extractor. Extract travel preferences from the user input.
+
+{_PREFERENCE_FIELDS_PROMPT}
+
+Return ONLY a JSON object with the extracted preferences. If a preference is not mentioned, don't include it.
+
+Example:
+{_PREFERENCE_EXAMPLE}"""
+
+# Intent analysis and preference extraction in one call, used when the keyword pass
+# cannot fill the preferences on its own
+_TURN_SYSTEM_PROMPT = f"""{_INTENT_SYSTEM_PROMPT}
+
+PREFERENCE EXTRACTION:
+Also extract the travel preferences from the user input.
+
+{_PREFERENCE_FIELDS_PROMPT}
+
+RESPONSE FORMAT:
+Return ONLY one JSON object holding both results:
+{{
+    "orchestration": {{ the intent analysis, with the structure given above }},
+    "preferences": {{ the extracted preferences, leave out those not mentioned }}
+}}
+
+Example of "preferences":
+{_PREFERENCE_EXAMPLE}"""
+
+# Response generation prompts, static so they form a cacheable prefix;
+# the per-request data (input, preferences, offers) follows in the user message
+_CONFIRMATION_SYSTEM_PROMPT = """You are ASIA.fr Agent, a friendly travel specialist. Create a response that presents the travel summary and asks for confirmation.
+
+Generate a warm, friendly response in French that:
+1. Shows enthusiasm about their travel plans
+2. Presents the summary naturally and clearly
+3. Asks for explicit confirmation before searching
+4. Uses emojis naturally
+5. Keeps it conversational
+6. Makes it clear what will happen next (showing offers)
+
+IMPORTANT: 
+- Always ask for confirmation
+- Be specific about what you'll do next (search and show offers)
+- Example: "Est-ce que ce résumé vous convient pour que je puisse rechercher les meilleures offres ?"
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_MISSING_SYSTEM_PROMPT = """You are ASIA.fr Agent. Ask for missing travel preferences in a friendly way.
+
+Generate a friendly response asking for the missing preferences. Format bullet points with proper spacing:
+- Each bullet point should be on its own line
+- Add a blank line between each bullet point
+- Use proper indentation
+- Be encouraging and warm
+
+IMPORTANT: 
+- Destination, duration, and travel dates are REQUIRED fields
+- Group size and style are OPTIONAL but helpful for better recommendations
+- Budget is completely optional and will help narrow the search if provided
+- Prioritize asking for required fields first
+
+Example format:
+• Destination : Où rêvez-vous de partir ?
+
+• Durée : Combien de jours souhaitez-vous rester ?
+
+• Période de voyage : Quand souhaitez-vous partir ?
+
+Make sure each bullet point is separated by a blank line for proper formatting.
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_GREETING_SYSTEM_PROMPT = """You are ASIA.fr Agent, a friendly travel specialist. Respond to the user's greeting in a warm, welcoming way.
+
+Generate a friendly greeting response in French that:
+1. Acknowledges their greeting warmly
+2. Shows enthusiasm for helping them plan their trip
+3. Encourages them to share their travel dreams
+4. Uses natural, conversational French
+5. Keeps it brief but welcoming
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_SUGGESTION_SYSTEM_PROMPT = """You are ASIA.fr Agent, a knowledgeable travel specialist. Provide intelligent travel suggestions based on the user's request.
+
+Generate helpful travel suggestions in French that:
+1. Address their specific request
+2. Consider their current preferences if any
+3. Provide intelligent, personalized recommendations
+4. Be encouraging and enthusiastic
+5. Suggest specific destinations, activities, or travel styles
+6. Keep it conversational and friendly
+7. Guide them toward providing specific preferences so we can show them actual offers from our database
+
+IMPORTANT: Do not make up specific offers. Instead, guide them to provide preferences so we can show them real offers from our database.
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_VAGUE_SYSTEM_PROMPT = """You are ASIA.fr Agent, a helpful travel specialist. The user has asked a vague question that needs clarification.
+
+Generate a friendly response in French that:
+1. Acknowledges their question
+2. Asks for clarification in a helpful way
+3. Provides some context about what information would be useful
+4. Encourages them to be more specific
+5. Keeps it warm and supportive
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_INFORMATION_SYSTEM_PROMPT = """You are ASIA.fr Agent, a knowledgeable travel specialist. Provide helpful travel information based on the user's request.
+
+Generate informative travel information in French that:
+1. Addresses their specific question
+2. Provides useful, accurate information
+3. Be helpful and educational
+4. Keep it conversational and friendly
+5. Encourage further engagement
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_NEW_SEARCH_SYSTEM_PROMPT = """You are ASIA.fr Agent, a friendly travel specialist. The user wants to start a new travel search.
+
+Generate a welcoming response in French that:
+1. Acknowledges their desire to start fresh
+2. Shows enthusiasm for helping them plan a new trip
+3. Ask for their travel preferences in a friendly way
+4. Encourage them to share their dreams
+5. Keep it warm and inviting
+
+RESPOND ONLY WITH THE RESPONSE TEXT"""
+
+_MATCHER_SYSTEM_PROMPT = """You are an expert travel agent for ASIA.fr. Select the 3 best offers for the user based on their preferences.
+
+IMPORTANT RULES:
+1. You MUST ONLY select from the provided offers (use the exact offer_id numbers)
+2. Do NOT create or suggest offers that are not in the list
+3. If no offers match well, select the 3 closest matches
+4. DESTINATION MATCH IS MANDATORY - Only select offers that match the user's destination preference
+5. Focus on destination match first, then duration, then budget
+6. Provide realistic explanations based on the actual offer details
+
+Your task:
+1. Analyze each offer against the user's preferences
+2. Select the 3 best matches considering destination, duration, budget, style, and overall appeal
+3. Rank them from best to good
+4. Provide a brief explanation for each selection based on the actual offer details
+
+Return ONLY a JSON object with this exact structure:
+{
+  "selected_offers": [offer_id1, offer_id2, offer_id3],
+  "explanations": [
+    "Brief explanation why offer 1 is perfect based on actual details",
+    "Brief explanation why offer 2 is great based on actual details", 
+    "Brief explanation why offer 3 is good based on actual details"
+  ],
+  "confidence": "high/medium/low"
+}
+
+RESPOND ONLY WITH THE JSON"""
+
+# Intents answered from the user input alone, by handler method name
+_INPUT_INTENT_HANDLERS = {
+    'greeting': '_handle_greeting',
+    'modification': '_handle_modification',
+    'suggestion_request': '_handle_suggestion_request',
+    'vague_question': '_handle_vague_question',
+    'information_request': '_handle_information_request',
+    'new_search': '_handle_new_search'
+}
+
+def _system_and_user(system_prompt: str, user_content: str) -> List[Dict[str, str]]:
+    """Chat messages with the static instructions first, so the shared prefix stays byte-identical"""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content}
+    ]
+
 @dataclass
 class TravelPreference:
     """Structured travel preference data"""
@@ -28,6 +751,42 @@ class SearchResult:
     budget_indicator: str
     relevance_score: float
 
+@dataclass
+class ScoringPreferences:
+    """User preferences resolved once per scoring pass (None = no preference)"""
+    destination: Optional[str] = None          # normalized, see _normalize_dest
+    country_code: Optional[str] = None         # set when destination is a known country name
+    days: Optional[int] = None                 # 0 when the duration can't be parsed
+    budget: Optional[float] = None
+    style_keywords: Optional[frozenset] = None
+    has_style: bool = False
+    season_mask: Optional[int] = None
+
+@dataclass
+class OfferMatrix:
+    """Struct-of-arrays view of the offer catalog used for batch scoring"""
+    durations: np.ndarray              # int32, -1 when the duration can't be parsed
+    prices: np.ndarray                 # float64, NaN when the price can't be parsed
+    destination_tokens: List[str]      # city names, country codes and country names
+    destination_incidence: np.ndarray  # bool [offers, tokens]
+    style_ids: np.ndarray              # int16 index into styles
+    styles: List[str]
+    date_flags: np.ndarray             # uint8 season bitmask, see _SEASON_MONTHS
+    has_field: np.ndarray              # bool [5, offers], same order as _MATCH_WEIGHTS
+    
+    def take(self, rows: np.ndarray) -> 'OfferMatrix':
+        """Matrix restricted to the given offer rows"""
+        return OfferMatrix(
+            durations=self.durations[rows],
+            prices=self.prices[rows],
+            destination_tokens=self.destination_tokens,
+            destination_incidence=self.destination_incidence[rows],
+            style_ids=self.style_ids[rows],
+            styles=self.styles,
+            date_flags=self.date_flags[rows],
+            has_field=self.has_field[:, rows]
+        )
+
 class TravelOrchestrator:
     """
     AI Travel Planning Orchestrator
@@ -40,9 +799,10 @@ class TravelOrchestrator:
     5. Handle modifications iteratively
     """
     
-    def __init__(self, llm_service, data_service, logger=None):
+    def __init__(self, llm_service, data_service, logger=None, semantic_service=None):
         self.llm_service = llm_service
         self.data_service = data_service
+        self.semantic_service = semantic_service
         self.logger = logger or logging.getLogger(__name__)
         
         # Conversation state
@@ -50,6 +810,18 @@ class TravelOrchestrator:
         self.confirmation_pending = False
         self.last_summary = None
         
+        # Batch scoring cache, rebuilt when the offer list changes
+        self._offer_matrix = None
+        self._offer_matrix_source = None
+        
+        # Prompt fragments, rebuilt only when the preferences or memory context change
+        self._summary_cache = None
+        self._context_json_cache = None
+        
+        # Semantic cache context: previous turn's intent and the last input embedding
+        self._last_intent = None
+        self._input_embedding_memo = None
+        
     async def process_user_input(self, user_input: str, conversation_context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Main orchestrator method - processes user input and determines next action
@@ -58,19 +830,33 @@ class TravelOrchestrator:
             self.logger.info(f"🎯 Processing user input: '{user_input[:50]}...'")
             self.logger.info(f"📝 Conversation context type: {type(conversation_context)}")
             
-            # Step 1: Use AI to intelligently determine the user's intent
-            self.logger.info("🔍 Step 1: Analyzing user intent...")
-            intent_analysis = await self._analyze_user_intent(user_input, conversation_context)
+            # Plain greetings carry no preferences: answer directly with the small greeting prompt.
+            # Not while a confirmation is pending, where "merci" may well mean "yes, go ahead".
+            if not self.confirmation_pending and _is_plain_greeting(user_input):
+                self.logger.info("👋 Plain greeting, skipping intent analysis and preference extraction")
+                response = await self._handle_greeting(user_input)
+                self._last_intent = 'greeting'
+                return response
             
-            # Step 2: Extract preferences from user input
-            self.logger.info("🔍 Step 2: Extracting preferences...")
-            extracted_preferences = await self._extract_preferences(user_input, conversation_context)
+            # With complete preferences awaiting confirmation, the offer search is the likely next step:
+            # warm its offer matrix on a worker thread during the LLM analysis, and embed the preference
+            # summary it ranks by in the same encode call as the input the semantic cache needs anyway
+            if self.confirmation_pending and self._has_sufficient_preferences():
+                warmup = asyncio.create_task(asyncio.to_thread(self._warm_offer_search))
+                warmup.add_done_callback(lambda task: task.exception())
+                await self._embed_input(user_input, self._create_natural_summary())
+            
+            # Steps 1 & 2: Analyze the user's intent and extract preferences
+            self.logger.info("🔍 Steps 1-2: Analyzing user intent and extracting preferences...")
+            intent_analysis, extracted_preferences = await self._analyze_turn(user_input, conversation_context)
             
             # Step 3: Update current preferences
             self._update_preferences(extracted_preferences)
             
             # Step 4: Determine response based on intent and preferences
-            return await self._determine_response(user_input, intent_analysis)
+            response = await self._determine_response(user_input, intent_analysis)
+            self._last_intent = intent_analysis.get('intent')
+            return response
                 
         except Exception as e:
             self.logger.error(f"❌ Orchestrator error: {e}")
@@ -79,7 +865,75 @@ class TravelOrchestrator:
                 'type': 'error'
             }
     
+    async def _analyze_turn(self, user_input: str, conversation_context: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Intent analysis and preference extraction of one turn, with as few LLM calls as possible:
+        - keyword pass fills the preferences: intent call only
+        - intent cached for a similar input: extraction call only
+        - otherwise a single call returning both
+        """
+        fast_preferences, suffices = self._fast_preferences(user_input)
+        if suffices:
+            self.logger.info(f"⚡ Fast preference extraction: {fast_preferences}")
+            return await self._analyze_user_intent(user_input, conversation_context), fast_preferences
+        
+        state_key = self._intent_state_key(conversation_context)
+        cached = await self._get_cached_intent(user_input, state_key)
+        if cached is not None:
+            llm_preferences = await self._extract_preferences_with_llm(user_input, conversation_context)
+            return cached, _merge_preferences(fast_preferences, llm_preferences)
+        
+        try:
+            prompt = self._intent_user_prompt(user_input, conversation_context)
+            messages = [
+                {"role": "system", "content": _TURN_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            response = await self.llm_service.create_generation_completion(
+                messages, stream=False, cache_key=make_cache_key('turn', _TURN_SYSTEM_PROMPT, prompt),
+                response_format=JSON_OBJECT_FORMAT
+            )
+            result = extract_json(response) or {}
+        except Exception as e:
+            self.logger.error(f"❌ Turn analysis failed: {e}")
+            result = {}
+        
+        intent_analysis = result.get('orchestration')
+        if not isinstance(intent_analysis, dict) or 'intent' not in intent_analysis:
+            self.logger.warning("❌ No intent analysis in turn analysis response")
+            intent_analysis = self._default_intent_analysis()
+        else:
+            self.logger.info(f"✅ Intent analysis result: {intent_analysis}")
+            await self._cache_intent(user_input, state_key, intent_analysis)
+        
+        llm_preferences = result.get('preferences')
+        if not isinstance(llm_preferences, dict):
+            llm_preferences = {}
+        return intent_analysis, _merge_preferences(fast_preferences, llm_preferences)
+    
     async def _extract_preferences(self, user_input: str, conversation_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract travel preferences from user input, keyword pass first and LLM only when it finds too little"""
+        fast_preferences, suffices = self._fast_preferences(user_input)
+        if suffices:
+            self.logger.info(f"⚡ Fast preference extraction: {fast_preferences}")
+            return fast_preferences
+        
+        llm_preferences = await self._extract_preferences_with_llm(user_input, conversation_context)
+        return _merge_preferences(fast_preferences, llm_preferences)
+    
+    def _fast_preferences(self, user_input: str) -> Tuple[Dict[str, Any], bool]:
+        """Keyword pass over the input with the catalog vocabulary, and whether the LLM can be skipped"""
+        try:
+            terms, terms_re = _fast_vocabulary(self.data_service.get_offers())
+        except Exception as e:
+            self.logger.warning(f"⚠️ Catalog vocabulary unavailable, using the fixed one: {e}")
+            terms, terms_re = _FAST_TERMS, _FAST_TERMS_RE
+        fast_preferences = _fast_extract_preferences(user_input, terms, terms_re)
+        suffices = _fast_extraction_suffices(user_input, fast_preferences, terms, terms_re,
+                                             bool(self.current_preferences.destination))
+        return fast_preferences, suffices
+    
+    async def _extract_preferences_with_llm(self, user_input: str, conversation_context: Dict[str, Any]) -> Dict[str, Any]:
         """Extract travel preferences from user input using LLM"""
         try:
             self.logger.info("🔍 Starting preference extraction...")
@@ -87,45 +941,21 @@ class TravelOrchestrator:
             self.logger.info(f"🔍 Conversation context: {conversation_context}")
             
             prompt = f"""
-You are a travel preference extractor. Extract travel preferences from the user input.
-
 USER INPUT: {user_input}
-CURRENT CONVERSATION CONTEXT: {json.dumps(conversation_context, indent=2, ensure_ascii=False)}
+CURRENT CONVERSATION CONTEXT: {self._context_json(conversation_context)}
 CURRENT PREFERENCES: {self._create_natural_summary()}
-
-IMPORTANT: Only extract NEW preferences that are mentioned in the user input. 
-Do NOT repeat preferences that are already known from the conversation context.
-
-Extract the following preferences if mentioned:
-- destination: specific places, countries, cities
-- duration: how long they want to travel (e.g., "2 weeks", "10 days")
-- budget_amount: numeric amount in euros (e.g., "3000€" = 3000)
-- group_size: who they're traveling with (e.g., "couple", "family", "solo")
-- style: travel style (e.g., "luxury", "adventure", "cultural", "relaxation")
-- travel_dates: when they want to travel (e.g., "summer", "April", "next month")
-- special_requirements: any special needs or preferences
-
-Return ONLY a JSON object with the extracted preferences. If a preference is not mentioned, don't include it.
-
-Example:
-{{
-  "destination": "Maldives",
-  "duration": "2 weeks", 
-  "budget_amount": 5000,
-  "group_size": "couple",
-  "style": "luxury",
-  "travel_dates": "summer",
-  "special_requirements": ["privacy", "premium accommodations"]
-}}
-
-RESPOND ONLY WITH THE JSON:
 """
-        
-            messages = [{"role": "user", "content": prompt}]
-            response = await self.llm_service.create_generation_completion(messages, stream=False)
+            
+            messages = [
+                {"role": "system", "content": _EXTRACTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            response = await self.llm_service.create_generation_completion(
+                messages, stream=False, response_format=JSON_OBJECT_FORMAT
+            )
             
             try:
-                return json.loads(response.strip())
+                return extract_json(response) or {}
             except json.JSONDecodeError:
                 self.logger.warning("Failed to parse preference extraction response")
                 return {}
@@ -138,80 +968,31 @@ RESPOND ONLY WITH THE JSON:
         try:
             self.logger.info("🎯 Starting intelligent intent analysis...")
             
-            prompt = f"""
-You are ASIA.fr Agent, an intelligent travel specialist. Analyze the user's intent and determine the best course of action.
-
-LANGUAGE REQUIREMENT: You are a French travel agent. All your responses, reasoning, and analysis must be in French.
-
-CONVERSATION CONTEXT:
-- Current preferences: {self._create_natural_summary()}
-- Conversation context: {json.dumps(conversation_context, indent=2, ensure_ascii=False)}
-- Confirmation pending: {self.confirmation_pending}
-
-USER INPUT: "{user_input}"
-
-ANALYZE THE USER INPUT AND PROVIDE A JSON RESPONSE WITH THE FOLLOWING STRUCTURE:
-{{
-    "intent": "greeting|confirmation|modification|preference_complete|general|suggestion_request|vague_question|information_request|new_search|recommendation_request",
-    "confidence": 0.0-1.0,
-    "response_type": "greeting|question|preference_summary|show_offers|modification|suggestion|conversation|clarification|information|recommendation",
-    "needs_confirmation": true/false,
-    "has_sufficient_details": true/false,
-    "should_show_offers": true/false,
-    "reasoning": "Your reasoning in French"
-}}
-
-DECISION RULES:
-- **should_show_offers**: Set to true if user explicitly wants to see offers, confirms preferences (oui, c'est bon, parfait), or asks for recommendations with sufficient details
-- **needs_confirmation**: Set to true if we have preferences but user hasn't explicitly confirmed them yet
-- **has_sufficient_details**: Set to true if we have destination, duration, and travel_dates (the 3 required fields)
-- **intent**: Choose the most appropriate intent based on what the user is trying to achieve
-
-INTENT TYPES:
-1. **greeting**: User is greeting, thanking, or saying goodbye
-2. **confirmation**: User confirms preferences or wants to see offers
-3. **modification**: User wants to change preferences or modify choices
-4. **preference_complete**: We have sufficient preferences to show summary
-5. **general**: User is asking questions, seeking advice, or providing new information
-6. **suggestion_request**: User wants AI suggestions or recommendations
-7. **vague_question**: User asks vague questions that need clarification
-8. **information_request**: User wants general travel information
-9. **new_search**: User wants to start a new search with different criteria
-10. **recommendation_request**: User wants specific recommendations based on preferences
-
-CONTEXT AWARENESS:
-- If user has already seen offers and wants to modify → intent: "modification"
-- If user asks for suggestions → intent: "suggestion_request"
-- If user asks for specific recommendations → intent: "recommendation_request"
-- If user is just chatting → intent: "general"
-- If user confirms preferences (oui, c'est bon, parfait, etc.) → intent: "confirmation", should_show_offers: true
-- If user wants different offers → intent: "modification"
-- If user asks vague questions → intent: "vague_question"
-- If user wants general info → intent: "information_request"
-- If user wants to start fresh → intent: "new_search"
-
-UNDERSTAND NATURALLY:
-- Don't rely only on keywords, understand the conversation flow
-- Consider what the user is trying to achieve
-- Be flexible and conversational
-- Allow users to modify choices at any time
-- Provide helpful suggestions when appropriate
-- Handle vague questions intelligently
-- Preserve conversation memory and context
-
-RESPOND ONLY WITH VALID JSON:
-"""
+            state_key = self._intent_state_key(conversation_context)
+            cached = await self._get_cached_intent(user_input, state_key)
+            if cached is not None:
+                return cached
+            
+            prompt = self._intent_user_prompt(user_input, conversation_context)
             
-            messages = [{"role": "user", "content": prompt}]
-            response = await self.llm_service.create_generation_completion(messages, stream=False)
+            # Static instructions go first as the system message so the provider can reuse its prefix cache;
+            # the user message carries the input and the whole conversation state, so it is the cache key
+            messages = [
+                {"role": "system", "content": _INTENT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            response = await self.llm_service.create_generation_completion(
+                messages, stream=False, cache_key=make_cache_key('orch', _INTENT_SYSTEM_PROMPT, prompt),
+                response_format=JSON_OBJECT_FORMAT
+            )
             
             try:
                 # Extract JSON from response
-                import re
-                json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
+                result = extract_json(response)
+                if result is not None:
                     self.logger.info(f"✅ Intent analysis result: {result}")
+                    if isinstance(result, dict):
+                        await self._cache_intent(user_input, state_key, result)
                     return result
                 else:
                     self.logger.warning("❌ No JSON found in intent analysis response")
@@ -224,6 +1005,42 @@ RESPOND ONLY WITH VALID JSON:
             self.logger.error(f"❌ Intent analysis failed: {e}")
             return self._default_intent_analysis()
     
+    def _intent_user_prompt(self, user_input: str, conversation_context: Dict[str, Any]) -> str:
+        """Per-turn part of the intent analysis prompt"""
+        return f"""
+CONVERSATION CONTEXT:
+- Current preferences: {self._create_natural_summary()}
+- Conversation context: {self._context_json(conversation_context)}
+- Confirmation pending: {self.confirmation_pending}
+
+USER INPUT: "{user_input}"
+"""
+    
+    def _intent_state_key(self, conversation_context: Dict[str, Any]) -> str:
+        """Semantic cache namespace: paraphrases in the same conversation state share an intent analysis"""
+        return make_cache_key(
+            'intent-state',
+            self._create_natural_summary(),
+            self._context_json(conversation_context),
+            str(self.confirmation_pending),
+            str(self._last_intent)
+        )
+    
+    async def _get_cached_intent(self, user_input: str, state_key: str) -> Optional[Dict[str, Any]]:
+        input_embedding = await self._embed_input(user_input)
+        if input_embedding is None:
+            return None
+        cached = semantic_cache.get(state_key, input_embedding)
+        if cached is None:
+            return None
+        self.logger.info(f"♻️ Reusing intent analysis of a similar input: {cached}")
+        return dict(cached)
+    
+    async def _cache_intent(self, user_input: str, state_key: str, intent_analysis: Dict[str, Any]):
+        input_embedding = await self._embed_input(user_input)
+        if input_embedding is not None:
+            semantic_cache.put(state_key, input_embedding, dict(intent_analysis))
+    
     def _default_intent_analysis(self) -> Dict[str, Any]:
         """Default intent analysis when AI fails"""
         return {
@@ -248,15 +1065,9 @@ RESPOND ONLY WITH VALID JSON:
     
     def _has_sufficient_preferences(self) -> bool:
         """Check if we have enough preferences to start searching"""
-        required_fields = ['destination', 'duration', 'travel_dates']
-        optional_fields = ['group_size', 'style', 'budget_amount']
-        
-        # Need ALL required fields to proceed
-        required_count = sum(1 for field in required_fields if getattr(self.current_preferences, field))
-        optional_count = sum(1 for field in optional_fields if getattr(self.current_preferences, field))
-        
-        # Must have all 3 required fields (destination, duration, travel_dates)
-        return required_count >= 3
+        # Must have all 3 required fields; stops at the first missing one
+        preferences = self.current_preferences
+        return all(getattr(preferences, field) for field in _REQUIRED_PREFERENCE_FIELDS)
     
     async def _determine_response(self, user_input: str, intent_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Intelligently determine the appropriate response based on intent and preferences"""
@@ -271,20 +1082,18 @@ RESPOND ONLY WITH VALID JSON:
             self.logger.info(f"🎯 Intent: {intent}, Response type: {response_type}, Confidence: {confidence}")
             self.logger.info(f"🎯 Should show offers: {should_show_offers}, Needs confirmation: {needs_confirmation}")
             
-            # Handle different intents intelligently
-            if intent == 'greeting':
-                return await self._handle_greeting(user_input)
+            # Intents with a dedicated handler: one table lookup rather than walking the chain below
+            handler_name = _INPUT_INTENT_HANDLERS.get(intent)
+            if handler_name is not None:
+                return await getattr(self, handler_name)(user_input)
             
-            elif intent == 'confirmation':
+            # Handle the remaining intents, which also depend on the preferences
+            if intent == 'confirmation':
                 # User is confirming - proceed to search and show offers
                 self.confirmation_pending = False
                 self.logger.info("✅ User confirmed preferences, proceeding to search and show offers")
                 return await self._search_and_recommend()
             
-            elif intent == 'modification':
-                # User wants to modify preferences
-                return await self._handle_modification(user_input)
-            
             elif intent == 'preference_complete':
                 # We have sufficient preferences
                 if has_sufficient_details:
@@ -295,9 +1104,6 @@ RESPOND ONLY WITH VALID JSON:
                 else:
                     return await self._ask_for_missing_preferences()
             
-            elif intent == 'suggestion_request':
-                return await self._handle_suggestion_request(user_input)
-            
             elif intent == 'recommendation_request':
                 # User wants specific recommendations
                 if should_show_offers and has_sufficient_details:
@@ -305,15 +1111,6 @@ RESPOND ONLY WITH VALID JSON:
                 else:
                     return await self._handle_recommendation_request(user_input)
             
-            elif intent == 'vague_question':
-                return await self._handle_vague_question(user_input)
-            
-            elif intent == 'information_request':
-                return await self._handle_information_request(user_input)
-            
-            elif intent == 'new_search':
-                return await self._handle_new_search(user_input)
-            
             else:  # general or other intents
                 # Use intent analysis to determine best course of action
                 if should_show_offers and has_sufficient_details:
@@ -347,29 +1144,8 @@ RESPOND ONLY WITH VALID JSON:
         
         self.logger.info(f"📝 Creating summary and confirmation: {summary}")
         
-        prompt = f"""
-You are ASIA.fr Agent, a friendly travel specialist. Create a response that presents the travel summary and asks for confirmation.
-
-PREFERENCE SUMMARY: {summary}
-
-Generate a warm, friendly response in French that:
-1. Shows enthusiasm about their travel plans
-2. Presents the summary naturally and clearly
-3. Asks for explicit confirmation before searching
-4. Uses emojis naturally
-5. Keeps it conversational
-6. Makes it clear what will happen next (showing offers)
-
-IMPORTANT: 
-- Always ask for confirmation
-- Be specific about what you'll do next (search and show offers)
-- Example: "Est-ce que ce résumé vous convient pour que je puisse rechercher les meilleures offres ?"
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(_CONFIRMATION_SYSTEM_PROMPT, f"PREFERENCE SUMMARY: {summary}")
+        response = await self._generate_text(messages)
         
         return {
             'text': response.strip(),
@@ -377,8 +1153,25 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
             'summary': summary
         }
     
+    def _context_json(self, conversation_context: Dict[str, Any]) -> str:
+        """Compact, key-sorted JSON of the memory context, serialized again only when it changes"""
+        if self._context_json_cache is None or self._context_json_cache[0] != conversation_context:
+            self._context_json_cache = (
+                dict(conversation_context),
+                dumps(conversation_context, sort_keys=True, default=str)
+            )
+        return self._context_json_cache[1]
+    
     def _create_natural_summary(self) -> str:
         """Create natural language summary of current preferences"""
+        prefs = self.current_preferences
+        key = (prefs.destination, prefs.duration, prefs.group_size, prefs.travel_dates, prefs.style,
+               prefs.budget_amount, tuple(prefs.special_requirements or ()))
+        if self._summary_cache is None or self._summary_cache[0] != key:
+            self._summary_cache = (key, self._build_natural_summary())
+        return self._summary_cache[1]
+    
+    def _build_natural_summary(self) -> str:
         parts = []
         
         if self.current_preferences.destination:
@@ -404,10 +1197,7 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     async def _handle_confirmation(self, user_input: str) -> Dict[str, Any]:
         """Handle user confirmation and trigger search"""
         # Check if user is confirming
-        confirmation_keywords = ['oui', 'yes', 'correct', 'parfait', 'ok', 'd\'accord', 'confirmer', 'c\'est bon', 'c est bon', 'go', 'vas-y', 'vas y']
-        is_confirming = any(keyword in user_input.lower() for keyword in confirmation_keywords)
-        
-        if is_confirming:
+        if _is_confirmation(user_input):
             self.confirmation_pending = False
             self.logger.info("✅ User confirmed preferences, proceeding to search and show offers")
             return await self._search_and_recommend()
@@ -437,19 +1227,35 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
                     'type': 'error'
                 }
             
-            # Try LLM-based selection first
+            # Parse the offers off the event loop
+            await asyncio.to_thread(self._build_offer_matrix, all_offers)
+            
+            # Rank by embedding similarity when offer embeddings are available (no LLM call)
+            try:
+                embedding_results = await asyncio.to_thread(self._embedding_recommendation, all_offers)
+                if embedding_results:
+                    self.logger.info("✅ Embedding-based recommendation successful")
+                    return embedding_results
+            except Exception as e:
+                self.logger.warning(f"⚠️ Embedding recommendation failed, trying LLM: {e}")
+            
+            # Score the fallback on a worker thread while the LLM selection is in flight
+            fallback_task = asyncio.create_task(asyncio.to_thread(self._classic_scoring_fallback, all_offers))
+            
+            # Then LLM-based selection
             try:
                 self.logger.info("🧠 Attempting LLM-based recommendation")
                 llm_results = await self._llm_based_recommendation(all_offers)
                 if llm_results:
                     self.logger.info("✅ LLM-based recommendation successful")
+                    fallback_task.add_done_callback(lambda task: task.exception())
                     return llm_results
             except Exception as e:
                 self.logger.warning(f"⚠️ LLM recommendation failed, using fallback: {e}")
             
             # Fallback to classic scoring
             self.logger.info("🔄 Using classic scoring fallback")
-            return self._classic_scoring_fallback(all_offers)
+            return await fallback_task
             
         except Exception as e:
             self.logger.error(f"❌ Search error: {e}")
@@ -461,13 +1267,12 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     async def _llm_based_recommendation(self, all_offers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Use LLM to intelligently select and rank offers"""
         try:
-            # Filter offers by destination match first
+            # Filter offers by destination match first (strong matches only)
             destination_filtered_offers = []
-            for offer in all_offers:
-                if offer.get('destinations') and self.current_preferences.destination:
-                    dest_match = self._check_destination_match(offer['destinations'])
-                    if dest_match > 0.5:  # Only include offers with strong destination match
-                        destination_filtered_offers.append(offer)
+            if self.current_preferences.destination:
+                matrix = self._build_offer_matrix(all_offers)
+                dest_matches = self._batch_destination_match(matrix)
+                destination_filtered_offers = [all_offers[i] for i in np.flatnonzero(dest_matches > 0.5)]
             
             # If no destination matches found, use all offers but prioritize destination
             if not destination_filtered_offers:
@@ -480,61 +1285,21 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
             # Create preference summary
             preference_summary = self._create_natural_summary()
             
-            # Prepare offers for LLM (simplified format to save tokens)
-            offers_for_llm = []
-            for i, offer in enumerate(limited_offers):
-                offer_info = {
-                    'id': i,
-                    'name': offer.get('product_name', 'Unknown'),
-                    'destination': ', '.join([d.get('country', '') for d in offer.get('destinations', [])]),
-                    'duration': f"{offer.get('duration', 0)} jours",
-                    'price': f"{offer.get('price', {}).get('amount', 0)}€",
-                    'style': offer.get('offer_type', 'Standard'),
-                    'description': offer.get('description', '')[:200] + '...' if offer.get('description') else ''
-                }
-                offers_for_llm.append(offer_info)
-            
-            prompt = f"""
-You are an expert travel agent for ASIA.fr. Select the 3 best offers for the user based on their preferences.
-
-USER PREFERENCES: {preference_summary}
-
-AVAILABLE OFFERS:
-{json.dumps(offers_for_llm, indent=2, ensure_ascii=False)}
-
-IMPORTANT RULES:
-1. You MUST ONLY select from the provided offers (use the exact offer_id numbers)
-2. Do NOT create or suggest offers that are not in the list
-3. If no offers match well, select the 3 closest matches
-4. DESTINATION MATCH IS MANDATORY - Only select offers that match the user's destination preference
-5. Focus on destination match first, then duration, then budget
-6. Provide realistic explanations based on the actual offer details
-
-Your task:
-1. Analyze each offer against the user's preferences
-2. Select the 3 best matches considering destination, duration, budget, style, and overall appeal
-3. Rank them from best to good
-4. Provide a brief explanation for each selection based on the actual offer details
-
-Return ONLY a JSON object with this exact structure:
-{{
-  "selected_offers": [offer_id1, offer_id2, offer_id3],
-  "explanations": [
-    "Brief explanation why offer 1 is perfect based on actual details",
-    "Brief explanation why offer 2 is great based on actual details", 
-    "Brief explanation why offer 3 is good based on actual details"
-  ],
-  "confidence": "high/medium/low"
-}}
-
-RESPOND ONLY WITH THE JSON:
-"""
+            # Offers for the LLM (simplified, compact JSON to save tokens), one per line
+            offers_for_llm = "[\n" + ",\n".join(
+                f'{{"id":{i},{_llm_offer_summary(offer)}' for i, offer in enumerate(limited_offers)
+            ) + "\n]"
             
-            messages = [{"role": "user", "content": prompt}]
-            response = await self.llm_service.create_matcher_completion(messages, stream=False)
+            messages = _system_and_user(
+                _MATCHER_SYSTEM_PROMPT,
+                f"USER PREFERENCES: {preference_summary}\n\nAVAILABLE OFFERS:\n{offers_for_llm}"
+            )
+            response = await self.llm_service.create_matcher_completion(
+                messages, stream=False, response_format=JSON_OBJECT_FORMAT
+            )
             
             # Parse LLM response
-            llm_result = json.loads(response.strip())
+            llm_result = extract_json(response) or {}
             selected_ids = llm_result.get('selected_offers', [])
             explanations = llm_result.get('explanations', [])
             
@@ -547,22 +1312,20 @@ RESPOND ONLY WITH THE JSON:
             # Calculate match scores for selected offers (for display)
             match_scores = []
             budget_indicators = []
+            scoring_prefs = self._prepare_scoring_preferences()
             
             for offer in selected_offers:
-                match_score = self._calculate_match_score(offer)
+                match_score = self._calculate_match_score(offer, prefs=scoring_prefs)
                 budget_indicator = self._get_budget_indicator(offer)
                 match_scores.append(match_score)
                 budget_indicators.append(budget_indicator)
             
-            # Create response text with explanations
-            response_text = f"""Parfait ! J'ai analysé toutes les offres disponibles dans notre base de données et sélectionné les 3 meilleures options qui correspondent à vos critères :
-
-"""
-            
+            # Create response text with explanations, joined once
+            response_parts = ["Parfait ! J'ai analysé toutes les offres disponibles dans notre base de données et sélectionné les 3 meilleures options qui correspondent à vos critères :\n\n"]
             for i, (offer, explanation) in enumerate(zip(selected_offers, explanations)):
-                response_text += f"{i+1}. **{offer.get('product_name', 'Offre')}** - {explanation}\n\n"
-            
-            response_text += "Ces offres sont directement disponibles dans notre système. Choisissez celle qui vous convient le mieux !"
+                response_parts.append(f"{i+1}. **{offer.get('product_name', 'Offre')}** - {explanation}\n\n")
+            response_parts.append("Ces offres sont directement disponibles dans notre système. Choisissez celle qui vous convient le mieux !")
+            response_text = "".join(response_parts)
             
             return {
                 'text': response_text,
@@ -578,33 +1341,75 @@ RESPOND ONLY WITH THE JSON:
             self.logger.error(f"❌ LLM recommendation failed: {e}")
             return None
     
+    def _warm_offer_search(self):
+        """Fill the caches _search_and_recommend reads; results are keyed by content, so never stale"""
+        try:
+            self._build_offer_matrix(self.data_service.get_offers())
+        except Exception as e:
+            self.logger.debug(f"Offer search warm-up failed: {e}")
+    
+    def _embedding_recommendation(self, all_offers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Rank destination-matching offers by similarity to the preference summary"""
+        if self.semantic_service is None or self.semantic_service.offer_embeddings is None:
+            return None
+        
+        # Candidates: strong destination matches that are present in the embedding index
+        matrix = self._build_offer_matrix(all_offers)
+        dest_rows = np.flatnonzero(self._batch_destination_match(matrix) > 0.5)
+        rows_by_reference = self.semantic_service.get_offer_rows()
+        candidates, embedding_rows = [], []
+        for idx in dest_rows:
+            row = rows_by_reference.get(all_offers[idx].get('reference'))
+            if row is not None:
+                candidates.append(idx)
+                embedding_rows.append(row)
+        if not candidates:
+            return None
+        
+        # Cosine similarity: both sides are L2-normalized, so dot products, fused with the top 3 selection
+        query_embedding = self.semantic_service.embed_query(self._create_natural_summary())
+        top, _ = self.semantic_service.top_offers(query_embedding, 3, embedding_rows)
+        
+        scoring_prefs = self._prepare_scoring_preferences()
+        selected_offers = [all_offers[candidates[i]] for i in top]
+        
+        response_text = f"""Parfait ! J'ai trouvé {len(selected_offers)} offres exceptionnelles dans notre base de données qui correspondent à vos critères.
+
+Voici les meilleures options disponibles pour votre voyage :"""
+        
+        return {
+            'text': response_text,
+            'type': 'offers',
+            'offers': selected_offers,
+            'match_scores': [self._calculate_match_score(offer, prefs=scoring_prefs) for offer in selected_offers],
+            'budget_indicators': [self._get_budget_indicator(offer) for offer in selected_offers],
+            'llm_selected': False,
+            'confidence': 'high'
+        }
+    
     def _classic_scoring_fallback(self, all_offers: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Fallback to classic scoring method"""
         try:
-            # Filter and score offers using classic method
-            search_results = []
-            for offer in all_offers:
-                match_score = self._calculate_match_score(offer)
-                relevance_score = self._calculate_relevance_score(offer)
-                budget_indicator = self._get_budget_indicator(offer)
-                
-                # Check destination match specifically
-                dest_match = 0.0
-                if offer.get('destinations') and self.current_preferences.destination:
-                    dest_match = self._check_destination_match(offer['destinations'])
-                
-                # Only include offers with destination match > 0.5 (strong match) and overall match > 0.3
-                if dest_match > 0.5 and match_score > 0.3:
-                    search_results.append(SearchResult(
-                        offer=offer,
-                        match_score=match_score,
-                        budget_indicator=budget_indicator,
-                        relevance_score=relevance_score
-                    ))
+            # Destination first: only offers with a strong match (> 0.5) are scored at all
+            matrix = self._build_offer_matrix(all_offers)
+            dest_rows = np.flatnonzero(self._batch_destination_match(matrix) > 0.5)
+            match_scores = self._score_offers(matrix, dest_rows)
+            
+            # Then keep offers with overall match > 0.3
+            keep = match_scores > 0.3
+            candidates, match_scores = dest_rows[keep], match_scores[keep]
             
-            # Sort by match score and take top 3
-            search_results.sort(key=lambda x: x.match_score, reverse=True)
-            top_offers = search_results[:3]
+            # Top 3 by match score, ties keep catalog order
+            order = _top_k(match_scores, 3)
+            top_offers = []
+            for idx, match_score in zip(candidates[order], match_scores[order]):
+                offer = all_offers[idx]
+                top_offers.append(SearchResult(
+                    offer=offer,
+                    match_score=float(match_score),
+                    budget_indicator=self._get_budget_indicator(offer),
+                    relevance_score=self._calculate_relevance_score(offer)
+                ))
             
             # Create response
             response_text = f"""Parfait ! J'ai trouvé {len(top_offers)} offres exceptionnelles dans notre base de données qui correspondent à vos critères.
@@ -625,225 +1430,285 @@ Voici les meilleures options disponibles pour votre voyage :"""
             self.logger.error(f"❌ Classic scoring fallback failed: {e}")
             raise
     
-    def _calculate_match_score(self, offer: Dict[str, Any]) -> float:
-        """Calculate match score between offer and preferences (0-1)"""
-        score = 0.0
-        total_weight = 0.0
-        
-        # Destination match (highest weight - 60%)
-        if self.current_preferences.destination and offer.get('destinations'):
-            dest_match = self._check_destination_match(offer['destinations'])
-            score += dest_match * 0.6
-            total_weight += 0.6
-        
-        # Duration match (20%)
-        if self.current_preferences.duration and offer.get('duration'):
-            duration_match = self._check_duration_match(offer['duration'])
-            score += duration_match * 0.2
-            total_weight += 0.2
-        
-        # Budget match (15%)
-        if self.current_preferences.budget_amount and offer.get('price', {}).get('amount'):
-            budget_match = self._check_budget_match(offer['price']['amount'])
-            score += budget_match * 0.15
-            total_weight += 0.15
-        
-        # Style match (3%)
-        if self.current_preferences.style and offer.get('offer_type'):
-            style_match = self._check_style_match(offer['offer_type'])
-            score += style_match * 0.03
-            total_weight += 0.03
-        
-        # Date match (2%)
-        if self.current_preferences.travel_dates and offer.get('dates'):
-            date_match = self._check_date_match(offer['dates'])
-            score += date_match * 0.02
-            total_weight += 0.02
-        
-        return score / total_weight if total_weight > 0 else 0.0
-    
-    def _check_destination_match(self, offer_destinations: List[Dict[str, str]]) -> float:
-        """Check destination match (0-1)"""
-        if not self.current_preferences.destination:
-            return 0.0
-        
-        # Country code to name mapping
-        country_mapping = {
-            'jp': 'japon',
-            'vn': 'vietnam',
-            'th': 'thailande',
-            'kh': 'cambodge',
-            'la': 'laos',
-            'mm': 'myanmar',
-            'my': 'malaisie',
-            'sg': 'singapour',
-            'id': 'indonesie',
-            'ph': 'philippines',
-            'in': 'inde',
-            'np': 'nepal',
-            'bd': 'bangladesh',
-            'lk': 'sri lanka',
-            'jo': 'jordanie',
-            'lb': 'liban',
-            'sy': 'syrie',
-            'iq': 'irak',
-            'ir': 'iran',
-            'af': 'afghanistan',
-            'pk': 'pakistan',
-            'cn': 'chine',
-            'kr': 'coree du sud',
-            'kp': 'coree du nord',
-            'mn': 'mongolie',
-            'tw': 'taiwan',
-            'hk': 'hong kong',
-            'mo': 'macao'
-        }
+    def _build_offer_matrix(self, offers: List[Dict[str, Any]]) -> OfferMatrix:
+        """Parse the offer fields used for scoring into column arrays (cached per offer list)"""
+        if self._offer_matrix is not None and offers is self._offer_matrix_source:
+            return self._offer_matrix
         
-        user_dest = self.current_preferences.destination.lower()
+        n = len(offers)
+        durations = np.full(n, -1, dtype=np.int32)
+        prices = np.full(n, np.nan, dtype=np.float64)
+        style_ids = np.zeros(n, dtype=np.int16)
+        date_flags = np.zeros(n, dtype=np.uint8)
+        has_field = np.zeros((5, n), dtype=bool)
+        token_ids: Dict[str, int] = {}
+        incidence_rows, incidence_cols = [], []
+        style_index: Dict[str, int] = {}
         
-        for dest in offer_destinations:
-            offer_country_code = dest.get('country', '').lower()
-            offer_city = dest.get('city', '').lower()
+        for i, offer in enumerate(offers):
+            # Destinations: every token the scalar check compares against
+            destinations = offer.get('destinations')
+            if destinations:
+                has_field[0, i] = True
+                for dest in destinations:
+                    code = _normalize_dest(dest.get('country', ''))
+                    tokens = [code, _normalize_dest(dest.get('city', ''))]
+                    if code in _COUNTRY_NAMES:
+                        tokens.append(_COUNTRY_NAMES[code])
+                    for token in tokens:
+                        incidence_rows.append(i)
+                        incidence_cols.append(token_ids.setdefault(token, len(token_ids)))
             
-            # Check if country code matches user destination
-            if offer_country_code in country_mapping:
-                offer_country_name = country_mapping[offer_country_code]
-                if user_dest in offer_country_name or offer_country_name in user_dest:
-                    return 1.0
+            # Duration and price: -1 / NaN if unparseable
+            duration_int, price_float = self._ensure_offer_parsed(offer)
+            if offer.get('duration'):
+                has_field[1, i] = True
+                if duration_int is not None:
+                    durations[i] = duration_int
+            if offer.get('price', {}).get('amount'):
+                has_field[2, i] = True
+                if price_float is not None:
+                    prices[i] = price_float
             
-            # Check direct country code match
-            if user_dest in offer_country_code or offer_country_code in user_dest:
-                return 1.0
+            # Style: index into the (small) set of distinct offer types
+            offer_type = offer.get('offer_type')
+            if offer_type:
+                has_field[3, i] = True
+                style_ids[i] = style_index.setdefault(offer_type, len(style_index))
             
-            # Check city match
-            if user_dest in offer_city or offer_city in user_dest:
-                return 1.0
+            # Dates: bitmask of the seasons mentioned in the offer dates
+            dates = offer.get('dates')
+            if dates:
+                has_field[4, i] = True
+                date_flags[i] = _season_mask(' '.join(dates).lower())
+        
+        incidence = np.zeros((n, len(token_ids)), dtype=bool)
+        incidence[incidence_rows, incidence_cols] = True
         
-        return 0.0
+        self._offer_matrix = OfferMatrix(
+            durations=durations,
+            prices=prices,
+            destination_tokens=list(token_ids),
+            destination_incidence=incidence,
+            style_ids=style_ids,
+            styles=list(style_index),
+            date_flags=date_flags,
+            has_field=has_field
+        )
+        self._offer_matrix_source = offers
+        self.logger.info(f"🧮 Built offer matrix: {n} offers, {len(token_ids)} destination tokens")
+        return self._offer_matrix
     
-    def _check_duration_match(self, offer_duration) -> float:
-        """Check duration match (0-1)"""
-        if not self.current_preferences.duration:
-            return 0.0
+    def _batch_destination_match(self, matrix: OfferMatrix, prefs: Optional[ScoringPreferences] = None) -> np.ndarray:
+        """Destination match (0/1) for every offer in the matrix"""
+        n = len(matrix.durations)
+        user_dest = (prefs or self._prepare_scoring_preferences()).destination
+        if user_dest is None:
+            return np.zeros(n)
         
-        # Convert offer_duration to int if it's a string
-        try:
-            if isinstance(offer_duration, str):
-                # Extract number from string like "8 jours / 7 nuits jours"
-                import re
-                duration_match = re.search(r'(\d+)', offer_duration)
-                if duration_match:
-                    offer_duration = int(duration_match.group(1))
-                else:
-                    offer_duration = 0
-            else:
-                offer_duration = int(offer_duration)
-        except (ValueError, TypeError):
-            self.logger.warning(f"⚠️ Could not convert offer duration to int: {offer_duration}")
-            return 0.0
+        # Run the substring test once per distinct token instead of once per offer
+        token_hits = np.fromiter(
+            (user_dest in token or token in user_dest for token in matrix.destination_tokens),
+            dtype=bool, count=len(matrix.destination_tokens)
+        )
+        return matrix.destination_incidence[:, token_hits].any(axis=1).astype(np.float64)
+    
+    def _score_offers(self, matrix: OfferMatrix, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorized equivalent of _calculate_match_score for every offer in the matrix (or the given rows)"""
+        if rows is not None:
+            matrix = matrix.take(rows)
+        n = len(matrix.durations)
+        prefs = self._prepare_scoring_preferences()
+        pref_active = np.array([
+            prefs.destination is not None,
+            prefs.days is not None,
+            prefs.budget is not None,
+            prefs.has_style,
+            prefs.season_mask is not None
+        ])
+        
+        # User-side inputs, computed once per scoring pass
+        dest_matches = self._batch_destination_match(matrix, prefs)
+        user_days = prefs.days or 0
+        user_budget = prefs.budget or 0.0
+        style_table = np.zeros(max(len(matrix.styles), 1))
+        if prefs.has_style and matrix.styles:
+            # Score each distinct offer type once
+            style_table = np.array([self._check_style_match(style, prefs.style_keywords) for style in matrix.styles])
+        user_season_mask = prefs.season_mask or 0
         
-        # Extract number of days from user preference
-        import re
-        duration_text = self.current_preferences.duration.lower()
-        days_match = re.search(r'(\d+)\s*(jours?|days?)', duration_text)
-        weeks_match = re.search(r'(\d+)\s*(semaines?|weeks?)', duration_text)
+        if NUMBA_AVAILABLE:
+            return _score_kernel(
+                dest_matches, matrix.durations, matrix.prices, ~np.isnan(matrix.prices),
+                matrix.style_ids, style_table, matrix.date_flags, matrix.has_field,
+                user_days, user_budget, user_season_mask, _MATCH_WEIGHTS * pref_active
+            )
         
-        user_days = 0
-        if days_match:
-            user_days = int(days_match.group(1))
-        elif weeks_match:
-            user_days = int(weeks_match.group(1)) * 7
+        sub_scores = np.zeros((5, n))
+        sub_scores[0] = dest_matches
         
+        # Duration match
         if user_days == 0:
-            return 0.5  # Neutral score if we can't parse duration
-        
-        # Calculate match based on difference
-        diff = abs(offer_duration - user_days)
-        if diff <= 2:
-            return 1.0
-        elif diff <= 5:
-            return 0.8
-        elif diff <= 10:
-            return 0.6
+            sub_scores[1] = 0.5
         else:
-            return 0.3
-    
-    def _check_budget_match(self, offer_price) -> float:
-        """Check budget match (0-1)"""
-        if not self.current_preferences.budget_amount:
-            return 0.0
+            diff = np.abs(matrix.durations - user_days)
+            sub_scores[1] = np.asarray(_DUR_SCORES)[np.searchsorted(_DUR_THRESHOLDS, diff, side='left')]
+            sub_scores[1][matrix.durations < 0] = 0.0
         
-        # Convert offer_price to float if it's a string
-        try:
-            if isinstance(offer_price, str):
-                # Remove currency symbols and convert to float
-                offer_price = float(offer_price.replace('€', '').replace(',', '').strip())
-            else:
-                offer_price = float(offer_price)
-        except (ValueError, TypeError):
-            self.logger.warning(f"⚠️ Could not convert offer price to float: {offer_price}")
-            return 0.0
+        # Budget match
+        if user_budget != 0:
+            with np.errstate(invalid='ignore'):
+                diff_percentage = np.abs(matrix.prices - user_budget) / user_budget
+                sub_scores[2] = np.asarray(_BUD_SCORES)[np.searchsorted(_BUD_THRESHOLDS, diff_percentage, side='left')]
+            sub_scores[2][np.isnan(matrix.prices)] = 0.0
         
-        user_budget = float(self.current_preferences.budget_amount)
+        # Style and date match
+        sub_scores[3] = style_table[matrix.style_ids]
+        sub_scores[4] = np.where(matrix.date_flags & user_season_mask, 1.0, 0.5)
         
-        # Avoid division by zero
-        if user_budget == 0:
-            return 0.0
+        weights = (pref_active[:, None] & matrix.has_field) * _MATCH_WEIGHTS[:, None]
+        score = (sub_scores * weights).sum(axis=0)
+        total_weight = weights.sum(axis=0)
+        return np.divide(score, total_weight, out=np.zeros(n), where=total_weight > 0)
+    
+    def _ensure_offer_parsed(self, offer: Dict[str, Any]) -> Tuple[Optional[int], Optional[float]]:
+        """Offer duration in days and price, parsed once per offer dict (None when unparseable)"""
+        parsed = _PARSED_OFFER_FIELDS.get(id(offer))
+        if parsed is not None:
+            return parsed[1], parsed[2]
         
-        diff_percentage = abs(offer_price - user_budget) / user_budget
+        # Extract number from string like "8 jours / 7 nuits"
+        duration = offer.get('duration')
+        duration_int = None
+        if duration:
+            try:
+                if isinstance(duration, str):
+                    duration_match = _LEADING_NUMBER_RE.search(duration)
+                    duration_int = int(duration_match.group(1)) if duration_match else 0
+                else:
+                    duration_int = int(duration)
+            except (ValueError, TypeError, OverflowError):
+                self.logger.warning(f"⚠️ Could not convert offer duration to int: {duration}")
         
-        if diff_percentage <= 0.1:  # Within 10%
-            return 1.0
-        elif diff_percentage <= 0.2:  # Within 20%
-            return 0.8
-        elif diff_percentage <= 0.3:  # Within 30%
-            return 0.6
-        else:
-            return 0.3
+        # Remove currency symbols and convert to float
+        price = offer.get('price', {}).get('amount')
+        price_float = None
+        if price:
+            try:
+                if isinstance(price, str):
+                    price = price.translate(_PRICE_STRIP)
+                price_float = float(price)
+            except (ValueError, TypeError):
+                self.logger.warning(f"⚠️ Could not convert offer price to float: {price}")
+        
+        if len(_PARSED_OFFER_FIELDS) >= _PARSED_OFFER_FIELDS_MAX:
+            _PARSED_OFFER_FIELDS.clear()
+        _PARSED_OFFER_FIELDS[id(offer)] = (offer, duration_int, price_float)
+        return duration_int, price_float
     
-    def _check_style_match(self, offer_style: str) -> float:
-        """Check style match (0-1)"""
-        if not self.current_preferences.style:
+    def _prepare_scoring_preferences(self) -> ScoringPreferences:
+        """Resolve the current preferences into the values the match checks compare against"""
+        current = self.current_preferences
+        prefs = ScoringPreferences()
+        if current.destination:
+            prefs.destination = _normalize_dest(current.destination)
+            if prefs.destination in _NORMALIZED_COUNTRY_NAMES:
+                prefs.country_code = _COUNTRY_CODE_BY_NAME[prefs.destination]
+        if current.duration:
+            prefs.days = _parse_user_days(current.duration.lower())
+        if current.budget_amount:
+            prefs.budget = float(current.budget_amount)
+        if current.style:
+            prefs.has_style = True
+            prefs.style_keywords = _user_style_keywords(current.style.lower())
+        if current.travel_dates:
+            prefs.season_mask = _user_season_mask(current.travel_dates)
+        return prefs
+    
+    def _calculate_match_score(self, offer: Dict[str, Any], prefs: Optional[ScoringPreferences] = None) -> float:
+        """Calculate match score between offer and preferences (0-1)
+        
+        Pass prefs from _prepare_scoring_preferences when scoring several offers.
+        """
+        if prefs is None:
+            prefs = self._prepare_scoring_preferences()
+        return self._score_offer(prefs, offer)
+    
+    def _score_offer(self, prefs: ScoringPreferences, offer: Dict[str, Any]) -> float:
+        """Single-pass match score of one offer, with every check inlined"""
+        offer_days, offer_price = self._ensure_offer_parsed(offer)
+        destinations = offer.get('destinations')
+        offer_style = offer.get('offer_type')
+        offer_dates = offer.get('dates')
+        
+        # A check counts only when both the preference and the offer field are set
+        dest_weight = 0.6 if prefs.destination is not None and destinations else 0.0
+        duration_weight = 0.2 if prefs.days is not None and offer.get('duration') else 0.0
+        budget_weight = 0.15 if prefs.budget is not None and offer.get('price', {}).get('amount') else 0.0
+        style_weight = 0.03 if prefs.has_style and offer_style else 0.0
+        date_weight = 0.02 if prefs.season_mask is not None and offer_dates else 0.0
+        total_weight = dest_weight + duration_weight + budget_weight + style_weight + date_weight
+        if total_weight == 0:
             return 0.0
         
-        user_style = self.current_preferences.style.lower()
-        offer_style_lower = offer_style.lower()
+        score = 0.0
         
-        # Simple keyword matching
-        style_keywords = {
-            'luxury': ['luxe', 'premium', 'haut de gamme'],
-            'adventure': ['aventure', 'trek', 'exploration'],
-            'cultural': ['culturel', 'culture', 'tradition'],
-            'relaxation': ['détente', 'relaxation', 'bien-être']
-        }
+        # Destination match (highest weight - 60%)
+        if dest_weight:
+            user_dest = prefs.destination
+            match = 0.0
+            for dest in destinations:
+                offer_country_code = _normalize_dest(dest.get('country', ''))
+                offer_city = _normalize_dest(dest.get('city', ''))
+                offer_country_name = _COUNTRY_NAMES.get(offer_country_code)
+                if (offer_country_code == prefs.country_code
+                        or (offer_country_name is not None
+                            and (user_dest in offer_country_name or offer_country_name in user_dest))
+                        or user_dest in offer_country_code or offer_country_code in user_dest
+                        or user_dest in offer_city or offer_city in user_dest):
+                    match = 1.0
+                    break
+            score += match * dest_weight
         
-        for style, keywords in style_keywords.items():
-            if user_style in keywords or any(keyword in user_style for keyword in keywords):
-                if any(keyword in offer_style_lower for keyword in keywords):
-                    return 1.0
+        # Duration match (20%), neutral if the user duration can't be parsed
+        if duration_weight:
+            if offer_days is None:
+                match = 0.0
+            elif prefs.days == 0:
+                match = 0.5
+            else:
+                match = _DUR_SCORES[bisect.bisect_left(_DUR_THRESHOLDS, abs(offer_days - prefs.days))]
+            score += match * duration_weight
         
-        return 0.3  # Neutral score for style
-    
-    def _check_date_match(self, offer_dates: List[str]) -> float:
-        """Check date match (0-1)"""
-        if not self.current_preferences.travel_dates:
-            return 0.0
+        # Budget match (15%), within 10% / 20% / 30% of the budget
+        if budget_weight:
+            if offer_price is None or prefs.budget == 0:
+                match = 0.0
+            else:
+                diff_percentage = abs(offer_price - prefs.budget) / prefs.budget
+                match = _BUD_SCORES[bisect.bisect_left(_BUD_THRESHOLDS, diff_percentage)]
+            score += match * budget_weight
         
-        # Simple season matching
-        user_dates = self.current_preferences.travel_dates.lower()
-        seasons = {
-            'été': ['summer', 'june', 'july', 'august'],
-            'hiver': ['winter', 'december', 'january', 'february'],
-            'printemps': ['spring', 'march', 'april', 'may'],
-            'automne': ['autumn', 'september', 'october', 'november']
-        }
+        # Style match (3%)
+        if style_weight:
+            score += self._check_style_match(offer_style, prefs.style_keywords) * style_weight
         
-        for season, months in seasons.items():
-            if season in user_dates or any(month in user_dates for month in months):
-                if any(month in ' '.join(offer_dates).lower() for month in months):
-                    return 1.0
+        # Date match (2%)
+        if date_weight:
+            match = 1.0 if _season_mask(' '.join(offer_dates).lower()) & prefs.season_mask else 0.5
+            score += match * date_weight
+        
+        return score / total_weight
+    
+    def _check_style_match(self, offer_style: str, user_keywords: Optional[frozenset]) -> float:
+        """Check style match (0-1) against the keywords of the user's style"""
+        # Simple keyword matching
+        if user_keywords:
+            offer_style_lower = offer_style.lower()
+            if any(keyword in offer_style_lower for keyword in user_keywords):
+                return 1.0
         
-        return 0.5  # Neutral score for dates
+        return 0.3  # Neutral score for style
     
     def _calculate_relevance_score(self, offer: Dict[str, Any]) -> float:
         """Calculate relevance score (0-1) - how relevant the offer is overall"""
@@ -852,62 +1717,72 @@ Voici les meilleures options disponibles pour votre voyage :"""
     
     def _get_budget_indicator(self, offer: Dict[str, Any]) -> str:
         """Get budget indicator (€€€, €€€€, €€€€€)"""
-        price = offer.get('price', {}).get('amount', 0)
+        _, price = self._ensure_offer_parsed(offer)
+        price = price or 0
         
-        # Convert price to float if it's a string
-        try:
-            if isinstance(price, str):
-                # Remove currency symbols and convert to float
-                price = float(price.replace('€', '').replace(',', '').strip())
-            else:
-                price = float(price)
-        except (ValueError, TypeError):
-            self.logger.warning(f"⚠️ Could not convert price to float: {price}")
-            price = 0
-        
-        if price < 2000:
-            return '€€€'
-        elif price < 5000:
-            return '€€€€'
+        return _BUDGET_LABELS[bisect.bisect_right(_BUDGET_THRESHOLDS, price)]
+    
+    async def _embed_input(self, user_input: str, *extra_texts: str) -> Optional[np.ndarray]:
+        """
+        Embedding of the user input for the semantic cache, computed once per input
+        extra_texts needed later in the turn go through the same encode call and are
+        picked up from the embedding cache by embed_query
+        """
+        if self.semantic_service is None:
+            return None
+        if self._input_embedding_memo is None or self._input_embedding_memo[0] != user_input:
+            embeddings = await asyncio.to_thread(self.semantic_service.embed_many, [user_input, *extra_texts])
+            self._input_embedding_memo = (user_input, embeddings[0])
+        return self._input_embedding_memo[1]
+    
+    async def _generate_text(self, messages: List[Dict[str, str]], cache_input: Optional[str] = None,
+                             cache_scope: str = '') -> str:
+        """
+        Generate a user-facing response. When a streaming endpoint registered a
+        token sink, chunks are forwarded to it as they arrive from the provider.
+        With cache_input, responses are shared between near-duplicate inputs of the
+        same handler, preferences and previous intent (see SemanticCache).
+        """
+        sink = token_sink.get()
+        
+        namespace = embedding = None
+        if cache_input is not None:
+            embedding = await self._embed_input(cache_input)
+            if embedding is not None:
+                namespace = make_cache_key('gen', cache_scope, self._create_natural_summary(), str(self._last_intent))
+                cached = semantic_cache.get(namespace, embedding)
+                if cached is not None:
+                    self.logger.info(f"♻️ Reusing {cache_scope} response of a similar input")
+                    if sink is not None:
+                        sink(cached)
+                    return cached
+        
+        if sink is None:
+            text = await self.llm_service.create_generation_completion(messages, stream=False)
         else:
-            return '€€€€€'
+            chunks = []
+            async for chunk in self.llm_service.stream_response('generation', messages):
+                if not chunks:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                chunks.append(chunk)
+                sink(chunk)
+            text = ''.join(chunks)
+        
+        if namespace is not None and text and text.strip():
+            semantic_cache.put(namespace, embedding, text.strip())
+        return text
     
     async def _ask_for_missing_preferences(self) -> Dict[str, Any]:
         """Ask for missing preferences"""
         missing = self._get_missing_preferences()
         
-        prompt = f"""
-You are ASIA.fr Agent. Ask for missing travel preferences in a friendly way.
-
-MISSING PREFERENCES: {missing}
-CURRENT PREFERENCES: {self._create_natural_summary()}
-
-Generate a friendly response asking for the missing preferences. Format bullet points with proper spacing:
-- Each bullet point should be on its own line
-- Add a blank line between each bullet point
-- Use proper indentation
-- Be encouraging and warm
-
-IMPORTANT: 
-- Destination, duration, and travel dates are REQUIRED fields
-- Group size and style are OPTIONAL but helpful for better recommendations
-- Budget is completely optional and will help narrow the search if provided
-- Prioritize asking for required fields first
-
-Example format:
-• Destination : Où rêvez-vous de partir ?
-
-• Durée : Combien de jours souhaitez-vous rester ?
-
-• Période de voyage : Quand souhaitez-vous partir ?
-
-Make sure each bullet point is separated by a blank line for proper formatting.
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(
+            _MISSING_SYSTEM_PROMPT,
+            f"MISSING PREFERENCES: {missing}\nCURRENT PREFERENCES: {self._create_natural_summary()}"
+        )
+        response = await self._generate_text(messages)
         
         return {
             'text': response.strip(),
@@ -955,23 +1830,20 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     
     async def _handle_greeting(self, user_input: str) -> Dict[str, Any]:
         """Handle greeting messages"""
-        prompt = f"""
-You are ASIA.fr Agent, a friendly travel specialist. Respond to the user's greeting in a warm, welcoming way.
-
-USER INPUT: "{user_input}"
-
-Generate a friendly greeting response in French that:
-1. Acknowledges their greeting warmly
-2. Shows enthusiasm for helping them plan their trip
-3. Encourages them to share their travel dreams
-4. Uses natural, conversational French
-5. Keeps it brief but welcoming
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
+        cache_key = make_cache_key('greeting', ' '.join(_input_words(user_input))) if _is_plain_greeting(user_input) else None
+        if cache_key is not None:
+            cached = cache_client.get_json(cache_key)
+            if cached is not None:
+                self.logger.info("⚡ Reusing cached greeting response")
+                sink = token_sink.get()
+                if sink is not None:
+                    sink(cached)
+                return {'text': cached, 'type': 'greeting'}
         
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(_GREETING_SYSTEM_PROMPT, f'USER INPUT: "{user_input}"')
+        response = await self._generate_text(messages, cache_input=user_input, cache_scope='greeting')
+        if cache_key is not None and response.strip():
+            cache_client.set_json(cache_key, response.strip(), ttl=_GREETING_CACHE_TTL)
         
         return {
             'text': response.strip(),
@@ -980,28 +1852,11 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     
     async def _handle_suggestion_request(self, user_input: str) -> Dict[str, Any]:
         """Handle requests for travel suggestions"""
-        prompt = f"""
-You are ASIA.fr Agent, a knowledgeable travel specialist. Provide intelligent travel suggestions based on the user's request.
-
-USER INPUT: "{user_input}"
-CURRENT PREFERENCES: {self._create_natural_summary()}
-
-Generate helpful travel suggestions in French that:
-1. Address their specific request
-2. Consider their current preferences if any
-3. Provide intelligent, personalized recommendations
-4. Be encouraging and enthusiastic
-5. Suggest specific destinations, activities, or travel styles
-6. Keep it conversational and friendly
-7. Guide them toward providing specific preferences so we can show them actual offers from our database
-
-IMPORTANT: Do not make up specific offers. Instead, guide them to provide preferences so we can show them real offers from our database.
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(
+            _SUGGESTION_SYSTEM_PROMPT,
+            f'USER INPUT: "{user_input}"\nCURRENT PREFERENCES: {self._create_natural_summary()}'
+        )
+        response = await self._generate_text(messages, cache_input=user_input, cache_scope='suggestion')
         
         return {
             'text': response.strip(),
@@ -1023,23 +1878,8 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     
     async def _handle_vague_question(self, user_input: str) -> Dict[str, Any]:
         """Handle vague questions that need clarification"""
-        prompt = f"""
-You are ASIA.fr Agent, a helpful travel specialist. The user has asked a vague question that needs clarification.
-
-USER INPUT: "{user_input}"
-
-Generate a friendly response in French that:
-1. Acknowledges their question
-2. Asks for clarification in a helpful way
-3. Provides some context about what information would be useful
-4. Encourages them to be more specific
-5. Keeps it warm and supportive
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(_VAGUE_SYSTEM_PROMPT, f'USER INPUT: "{user_input}"')
+        response = await self._generate_text(messages, cache_input=user_input, cache_scope='clarification')
         
         return {
             'text': response.strip(),
@@ -1048,23 +1888,8 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
     
     async def _handle_information_request(self, user_input: str) -> Dict[str, Any]:
         """Handle requests for general travel information"""
-        prompt = f"""
-You are ASIA.fr Agent, a knowledgeable travel specialist. Provide helpful travel information based on the user's request.
-
-USER INPUT: "{user_input}"
-
-Generate informative travel information in French that:
-1. Addresses their specific question
-2. Provides useful, accurate information
-3. Be helpful and educational
-4. Keep it conversational and friendly
-5. Encourage further engagement
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(_INFORMATION_SYSTEM_PROMPT, f'USER INPUT: "{user_input}"')
+        response = await self._generate_text(messages, cache_input=user_input, cache_scope='information')
         
         return {
             'text': response.strip(),
@@ -1078,23 +1903,8 @@ RESPOND ONLY WITH THE RESPONSE TEXT:
         self.confirmation_pending = False
         self.last_summary = None
         
-        prompt = f"""
-You are ASIA.fr Agent, a friendly travel specialist. The user wants to start a new travel search.
-
-USER INPUT: "{user_input}"
-
-Generate a welcoming response in French that:
-1. Acknowledges their desire to start fresh
-2. Shows enthusiasm for helping them plan a new trip
-3. Ask for their travel preferences in a friendly way
-4. Encourage them to share their dreams
-5. Keep it warm and inviting
-
-RESPOND ONLY WITH THE RESPONSE TEXT:
-"""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.llm_service.create_generation_completion(messages, stream=False)
+        messages = _system_and_user(_NEW_SEARCH_SYSTEM_PROMPT, f'USER INPUT: "{user_input}"')
+        response = await self._generate_text(messages, cache_input=user_input, cache_scope='new_search')
         
         return {
             'text': response.strip(),
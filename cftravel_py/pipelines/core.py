@@ -9,7 +9,10 @@ from dataclasses import dataclass, field
 from enum import Enum
 import logging
 import asyncio
+import sys
+import time
 from datetime import datetime
+from itertools import groupby
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +23,10 @@ class PipelineState(Enum):
     COMPLETED = "completed"
     ERROR = "error"
 
-@dataclass
+# Slots drop the per-instance __dict__ of the context built on every turn (Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class PipelineContext:
     """Context object passed between pipeline components"""
     conversation_id: str
@@ -84,7 +90,11 @@ class PipelineComponent(ABC):
         self.enabled = True
 
 class Pipeline:
-    """Main pipeline orchestrator"""
+    """
+    Main pipeline orchestrator
+    Components run in priority order; consecutive components sharing a priority
+    don't read each other's output and run concurrently on the same context
+    """
     
     def __init__(self, components: List[PipelineComponent] = None):
         self.components = components or []
@@ -103,39 +113,31 @@ class Pipeline:
     
     async def execute(self, context: PipelineContext) -> PipelineContext:
         """Execute the pipeline with the given context"""
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         self.logger.info(f"🎯 Starting pipeline execution for conversation {context.conversation_id}")
         
         try:
             context.state = PipelineState.PROCESSING
             
             # Execute components in priority order
-            for component in self.components:
-                if not component.enabled:
-                    self.logger.debug(f"⏭️ Skipping {component.name} - disabled")
-                    continue
-                    
-                if component.is_required(context):
-                    component_start = datetime.utcnow()
-                    component.log_start(context)
-                    
-                    try:
-                        context = await component.process(context)
-                        component.log_complete(context)
-                        
-                        # Record execution time
-                        execution_time = (datetime.utcnow() - component_start).total_seconds()
-                        self.execution_stats[component.name] = execution_time
-                        
-                    except Exception as e:
-                        component.log_error(context, e)
-                        # Continue with next component instead of failing entire pipeline
-                        continue
-                else:
-                    self.logger.debug(f"⏭️ Skipping {component.name} - not required")
+            for _, stage in groupby(self.components, key=lambda x: x.priority):
+                runnable = []
+                for component in stage:
+                    if not component.enabled:
+                        self.logger.debug(f"⏭️ Skipping {component.name} - disabled")
+                    elif component.is_required(context):
+                        runnable.append(component)
+                    else:
+                        self.logger.debug(f"⏭️ Skipping {component.name} - not required")
+                
+                if len(runnable) == 1:
+                    context = await self._run_component(runnable[0], context)
+                elif runnable:
+                    # Independent components (e.g. two LLM calls) overlap their round-trips
+                    await asyncio.gather(*(self._run_component(component, context) for component in runnable))
             
             context.state = PipelineState.COMPLETED
-            total_time = (datetime.utcnow() - start_time).total_seconds()
+            total_time = time.perf_counter() - start_time
             self.logger.info(f"✅ Pipeline execution completed in {total_time:.2f}s")
             
         except Exception as e:
@@ -145,6 +147,25 @@ class Pipeline:
         
         return context
     
+    async def _run_component(self, component: PipelineComponent, context: PipelineContext) -> PipelineContext:
+        """Run one component, recording its execution time"""
+        component_start = time.perf_counter()
+        component.log_start(context)
+        
+        try:
+            context = await component.process(context)
+            component.log_complete(context)
+            
+            # Record execution time
+            execution_time = time.perf_counter() - component_start
+            self.execution_stats[component.name] = execution_time
+            
+        except Exception as e:
+            component.log_error(context, e)
+            # Continue with next component instead of failing entire pipeline
+        
+        return context
+    
     def get_execution_stats(self) -> Dict[str, float]:
         """Get execution statistics for all components"""
         return self.execution_stats.copy()
@@ -6,13 +6,18 @@ Adds advanced AI intelligence while preserving original functionality
 
 import asyncio
 import logging
+import os
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 from .modular_pipeline import ASIAModularPipeline
-from services.optimized_semantic_service import OptimizedSemanticService
 from .components.travel_orchestrator import TravelOrchestrator
 
 logger = logging.getLogger(__name__)
 
+# Conversations whose orchestrator (and its caches) stays in memory, least recently active
+# evicted first; an evicted conversation picks its preferences back up from memory
+MAX_ACTIVE_ORCHESTRATORS = int(os.getenv('MAX_ACTIVE_ORCHESTRATORS', '256'))
+
 class EnhancedASIAModularPipeline(ASIAModularPipeline):
     """Enhanced modular pipeline that inherits from original and adds advanced features"""
     
@@ -22,28 +27,30 @@ class EnhancedASIAModularPipeline(ASIAModularPipeline):
         
         # Add enhanced features
         self.semantic_service = None
+        self._orchestrators: 'OrderedDict[str, TravelOrchestrator]' = OrderedDict()
         self.logger = logging.getLogger(f"{__name__}.EnhancedASIAModularPipeline")
     
     async def initialize(self):
         """Initialize the enhanced pipeline with all services and components"""
-        if self._initialized:
-            return
-        
-        try:
-            self.logger.info("🚀 Initializing Enhanced ASIA Modular Pipeline...")
-            
-            # Initialize services (including enhanced semantic service)
-            await self._initialize_enhanced_services()
-            
-            # Build pipeline with enhanced components
-            self.pipeline = await self._build_enhanced_pipeline()
-            
-            self._initialized = True
-            self.logger.info("✅ Enhanced ASIA Modular Pipeline initialized successfully")
-            
-        except Exception as e:
-            self.logger.error(f"❌ Failed to initialize enhanced pipeline: {e}")
-            raise
+        async with self._init_lock:
+            if self._initialized:
+                return
+            
+            try:
+                self.logger.info("🚀 Initializing Enhanced ASIA Modular Pipeline...")
+                
+                # Initialize services (including enhanced semantic service)
+                await self._initialize_enhanced_services()
+                
+                # Build pipeline with enhanced components
+                self.pipeline = await self._build_enhanced_pipeline()
+                
+                self._initialized = True
+                self.logger.info("✅ Enhanced ASIA Modular Pipeline initialized successfully")
+                
+            except Exception as e:
+                self.logger.error(f"❌ Failed to initialize enhanced pipeline: {e}")
+                raise
     
     async def _initialize_enhanced_services(self):
         """Initialize all required services including enhanced ones"""
@@ -51,8 +58,9 @@ class EnhancedASIAModularPipeline(ASIAModularPipeline):
             # Initialize original services first
             await super()._initialize_services()
             
-            # Initialize enhanced semantic service
-            self.semantic_service = OptimizedSemanticService()
+            # Share the semantic service built by the parent: a second instance would load
+            # the offers and embedding matrix again
+            self.semantic_service = self.services['semantic']
             
             # Ensure data service is properly loaded
             if self.services.get('data'):
@@ -88,7 +96,8 @@ class EnhancedASIAModularPipeline(ASIAModularPipeline):
             builder.add_component(
                 TravelOrchestrator(
                     self.services['llm'],
-                    self.services['data']
+                    self.services['data'],
+                    semantic_service=self.semantic_service
                 ),
                 priority=100
             )
@@ -137,19 +146,14 @@ class EnhancedASIAModularPipeline(ASIAModularPipeline):
             conversation_context = {}
             if conversation_id and self.services.get('memory'):
                 try:
-                    conversation_context = await self.services['memory'].get_conversation_context(conversation_id)
+                    # Check if the method is async or sync
+                    if asyncio.iscoroutinefunction(self.services['memory'].get_conversation_context):
+                        conversation_context = await self.services['memory'].get_conversation_context(conversation_id)
+                    else:
+                        conversation_context = self.services['memory'].get_conversation_context(conversation_id)
+                    conversation_context = dict(conversation_context or {})
                     self.logger.info(f"📝 Retrieved conversation context: {len(conversation_context)} items")
                     self.logger.info(f"📝 Conversation context content: {conversation_context}")
-                    
-                    # If we have stored preferences, update the orchestrator's current preferences
-                    if orchestrator_key in self._orchestrators and conversation_context:
-                        orchestrator = self._orchestrators[orchestrator_key]
-                        # Update orchestrator preferences from memory
-                        for key, value in conversation_context.items():
-                            if hasattr(orchestrator.current_preferences, key) and value is not None:
-                                setattr(orchestrator.current_preferences, key, value)
-                        self.logger.info(f"🔄 Updated orchestrator preferences from memory: {orchestrator.current_preferences}")
-                        
                 except Exception as e:
                     self.logger.warning(f"⚠️ Failed to get conversation context: {e}")
                     conversation_context = {}
@@ -164,19 +168,29 @@ class EnhancedASIAModularPipeline(ASIAModularPipeline):
             
             # Create orchestrator instance or reuse existing one for this conversation
             orchestrator_key = f"orchestrator_{conversation_id}"
-            if not hasattr(self, '_orchestrators'):
-                self._orchestrators = {}
-            
-            if orchestrator_key not in self._orchestrators:
-                self._orchestrators[orchestrator_key] = TravelOrchestrator(
+            orchestrator = self._orchestrators.get(orchestrator_key)
+            if orchestrator is None:
+                orchestrator = self._orchestrators[orchestrator_key] = TravelOrchestrator(
                     self.services['llm'],
-                    self.services['data']
+                    self.services['data'],
+                    semantic_service=self.semantic_service
                 )
                 self.logger.info(f"🆕 Created new orchestrator for conversation {conversation_id}")
+                # A conversation whose orchestrator was evicted resumes where it stopped
+                orchestrator.confirmation_pending = bool(conversation_context.get('confirmation_pending'))
+                if len(self._orchestrators) > MAX_ACTIVE_ORCHESTRATORS:
+                    evicted_key, _ = self._orchestrators.popitem(last=False)
+                    self.logger.info(f"🧹 Evicted least recently active orchestrator {evicted_key}")
             else:
+                self._orchestrators.move_to_end(orchestrator_key)
                 self.logger.info(f"🔄 Reusing existing orchestrator for conversation {conversation_id}")
             
-            orchestrator = self._orchestrators[orchestrator_key]
+            # If we have stored preferences, update the orchestrator's current preferences
+            if conversation_context:
+                for key, value in conversation_context.items():
+                    if hasattr(orchestrator.current_preferences, key) and value is not None:
+                        setattr(orchestrator.current_preferences, key, value)
+                self.logger.info(f"🔄 Updated orchestrator preferences from memory: {orchestrator.current_preferences}")
             
             # Process through orchestrator
             result = await orchestrator.process_user_input(user_input, conversation_context)
@@ -199,17 +213,20 @@ class EnhancedASIAModularPipeline(ASIAModularPipeline):
                         # Remove None values
                         current_preferences = {k: v for k, v in current_preferences.items() if v is not None}
                     
+                    # Kept with the preferences so an evicted orchestrator can be rebuilt
+                    context_update = dict(current_preferences, confirmation_pending=orchestrator.confirmation_pending)
+                    
                     # Check if the method is async or sync
                     if asyncio.iscoroutinefunction(self.services['memory'].update_conversation_context):
                         await self.services['memory'].update_conversation_context(
                             conversation_id, 
-                            current_preferences
+                            context_update
                         )
                     else:
                         # Sync method
                         self.services['memory'].update_conversation_context(
                             conversation_id, 
-                            current_preferences
+                            context_update
                         )
                     
                     self.logger.info(f"📝 Updated memory with preferences: {current_preferences}")
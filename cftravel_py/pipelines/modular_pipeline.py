@@ -13,11 +13,14 @@ from .components.recommendation_engine import RecommendationEngineComponent
 from .components.response_generator import ResponseGeneratorComponent
 from services.llm_service import LLMService
 from services.memory_service import MemoryService
-from services.optimized_semantic_service import OptimizedSemanticService
+from services.optimized_semantic_service import get_semantic_service
 from services.data_service import DataService
 
 logger = logging.getLogger(__name__)
 
+# The orchestration prompt only shows the tail of the history
+CONVERSATION_HISTORY_CHARS = 500
+
 class ASIAModularPipeline:
     """Main modular pipeline for ASIA.fr Agent"""
     
@@ -26,27 +29,30 @@ class ASIAModularPipeline:
         self.services = {}
         self.logger = logging.getLogger(f"{__name__}.ASIAModularPipeline")
         self._initialized = False
+        # Startup warm-up and the first requests may all call initialize()
+        self._init_lock = asyncio.Lock()
     
     async def initialize(self):
         """Initialize the pipeline with all services and components"""
-        if self._initialized:
-            return
-        
-        try:
-            self.logger.info("🚀 Initializing ASIA Modular Pipeline...")
-            
-            # Initialize services
-            await self._initialize_services()
-            
-            # Build pipeline with components
-            self.pipeline = await self._build_pipeline()
-            
-            self._initialized = True
-            self.logger.info("✅ ASIA Modular Pipeline initialized successfully")
-            
-        except Exception as e:
-            self.logger.error(f"❌ Failed to initialize pipeline: {e}")
-            raise
+        async with self._init_lock:
+            if self._initialized:
+                return
+            
+            try:
+                self.logger.info("🚀 Initializing ASIA Modular Pipeline...")
+                
+                # Initialize services
+                await self._initialize_services()
+                
+                # Build pipeline with components
+                self.pipeline = await self._build_pipeline()
+                
+                self._initialized = True
+                self.logger.info("✅ ASIA Modular Pipeline initialized successfully")
+                
+            except Exception as e:
+                self.logger.error(f"❌ Failed to initialize pipeline: {e}")
+                raise
     
     async def _initialize_services(self):
         """Initialize all required services"""
@@ -57,18 +63,30 @@ class ASIAModularPipeline:
             # Initialize Memory Service
             self.services['memory'] = MemoryService()
             
-            # Initialize Semantic Service
-            self.services['semantic'] = OptimizedSemanticService()
-            
             # Initialize Data Service
             self.services['data'] = DataService()
             
+            # Initialize Semantic Service: loads the model and the saved offer embeddings
+            # (or embeds every offer once). The offer catalog is parsed at the same time,
+            # both off the event loop, so the first request pays for neither
+            self.services['semantic'], _ = await asyncio.gather(
+                asyncio.to_thread(get_semantic_service),
+                asyncio.to_thread(self._preload_data)
+            )
+            
             self.logger.info("✅ All services initialized")
             
         except Exception as e:
             self.logger.error(f"❌ Service initialization failed: {e}")
             raise
     
+    def _preload_data(self):
+        """Parse the offer catalog now instead of on the first search"""
+        try:
+            self.services['data'].get_data()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Offer data preload failed, it will be retried on first use: {e}")
+    
     async def _build_pipeline(self) -> Pipeline:
         """Build the pipeline with all components"""
         try:
@@ -83,12 +101,14 @@ class ASIAModularPipeline:
                 priority=100
             )
             
+            # Same priority as the orchestrator: the extraction doesn't use the intent,
+            # so both LLM calls run concurrently
             builder.add_component(
                 PreferenceExtractorComponent(
                     self.services['llm'],
                     self.services['memory']
                 ),
-                priority=90
+                priority=100
             )
             
             builder.add_component(
@@ -148,12 +168,14 @@ class ASIAModularPipeline:
             # Get latest preferences
             user_preferences = memory_service.get_latest_preferences(conversation_id)
             
-            # Get conversation history
-            conversation_history = memory_service.get_conversation_history(conversation_id, max_messages=10)
+            # Get conversation history, bounded to what the prompts use
+            conversation_history = memory_service.get_conversation_history(
+                conversation_id, max_messages=10, max_chars=CONVERSATION_HISTORY_CHARS
+            )
             
             # Get turn count
             conversation = memory_service.get_conversation(conversation_id)
-            turn_count = len(conversation.messages) if conversation else 0
+            turn_count = conversation.message_count if conversation else 0
             
             # Create context
             context = PipelineContext(
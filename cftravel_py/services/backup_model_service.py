@@ -6,12 +6,67 @@ Handles priority-based backup models with automatic fallback and retry logic.
 
 import logging
 import asyncio
+import os
+import time
 from typing import Dict, List, Optional, Any
-from groq import Groq, GroqError
+import httpx
+from groq import AsyncGroq, GroqError
 from core.unified_config import unified_config
 
+try:
+    import h2  # noqa: F401 - lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+class AsyncRateLimiter:
+    """Token bucket: at most `rate` acquisitions per `period` seconds, with bursts up to `rate`"""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        # Waiters queue on the lock, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return self
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+class _NoLimit:
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+# Shared by every Groq request of the process: GROQ_CONCURRENCY requests in flight at most,
+# and GROQ_RPM requests per minute (0 = no limit) so bursts queue here instead of hitting 429s
+_GROQ_SEMAPHORE = asyncio.Semaphore(int(os.getenv('GROQ_CONCURRENCY', '8')))
+_GROQ_RPM = int(os.getenv('GROQ_RPM', '0'))
+_GROQ_LIMITER = AsyncRateLimiter(_GROQ_RPM) if _GROQ_RPM > 0 else _NoLimit()
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Keep-alive connection pool shared by all async Groq calls, HTTP/2 when h2 is installed"""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    )
+
 class BackupModelService:
     """
     Priority-based backup model service with automatic fallback
@@ -23,10 +78,13 @@ class BackupModelService:
         
         if not api_key:
             logger.warning("⚠️ No API key found. Some features may not work properly.")
-            self.client = None
+            self.async_client = None
         else:
-            # Initialize Groq client without base_url to prevent URL duplication
-            self.client = Groq(api_key=api_key)
+            # Single client for the process: every model and service shares its connection pool
+            # Async client so concurrent requests and streams don't block the event loop
+            # The SDK retries 429/5xx responses with jittered exponential backoff (max_retries),
+            # sleeping with asyncio so other requests keep running
+            self.async_client = AsyncGroq(api_key=api_key, http_client=_create_http_client(), max_retries=2)
             logger.info(f"🔧 Initialized Groq client with API key: {api_key[:10]}...")
         
         self.models = self.config.get('models', {})
@@ -132,16 +190,16 @@ class BackupModelService:
         
         logger.info(f"📡 Creating completion with {model_config['name']}: {completion_params}")
         
-        if not self.client:
+        if not self.async_client:
             raise Exception("No API client available. Please set GROQ_API_KEY environment variable.")
         
         try:
-            completion = self.client.chat.completions.create(**completion_params)
-            
+            async with _GROQ_SEMAPHORE, _GROQ_LIMITER:
+                completion = await self.async_client.chat.completions.create(**completion_params)
             if stream:
+                # Async chunk stream, consumed with `async for`
                 return completion
-            else:
-                return completion.choices[0].message.content
+            return completion.choices[0].message.content
                 
         except GroqError as e:
             logger.error(f"❌ Groq API error with {model_config['name']}: {e}")
@@ -200,20 +258,21 @@ class BackupModelService:
     
     async def test_all_models(self) -> Dict[str, Dict[str, bool]]:
         """Test all models and return their status"""
-        results = {}
-        
+        # Every model is probed concurrently, the shared semaphore still caps the in-flight requests
+        labels = []
+        configs = []
         for model_type in ['reasoning', 'generation', 'matcher', 'extractor']:
-            results[model_type] = {}
-            
-            # Test primary model
-            primary_config = self.get_model_config(model_type)
-            results[model_type]['primary'] = await self.test_model(primary_config)
-            
-            # Test backup models
-            backup_models = self.get_backup_models(model_type)
-            for backup in backup_models:
-                results[model_type][f"backup_{backup.get('priority', 'unknown')}"] = await self.test_model(backup)
+            labels.append((model_type, 'primary'))
+            configs.append(self.get_model_config(model_type))
+            for backup in self.get_backup_models(model_type):
+                labels.append((model_type, f"backup_{backup.get('priority', 'unknown')}"))
+                configs.append(backup)
         
+        statuses = await asyncio.gather(*(self.test_model(config) for config in configs))
+        
+        results = {}
+        for (model_type, label), status in zip(labels, statuses):
+            results.setdefault(model_type, {})[label] = status
         return results
 
 # Global instance
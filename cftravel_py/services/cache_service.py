@@ -0,0 +1,193 @@
+"""
+Cache Service
+=============
+Optional Redis cache for query embeddings and LLM responses.
+Every operation falls through to the uncached path when Redis is not
+installed, not configured (REDIS_URL) or not reachable. Without Redis,
+JSON values (LLM responses) and query embeddings are still memoized in a
+small in-process LRU.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.json_utils import dumps, loads
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(prefix: str, *parts: str) -> str:
+    """Build a cache key from a prefix and a 64-bit BLAKE2b digest of the parts"""
+    # Hashes whole prompts on every LLM call, blake2b is faster than sha256 and sizes its own digest
+    digest = hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+    return f"{prefix}:{digest}"
+
+class CacheClient:
+    """
+    Thin Redis wrapper
+    - JSON values are stored gzipped
+    - Embeddings are stored as raw float32 bytes
+    - JSON values and embeddings fall back to an in-process LRU when Redis is not in use
+    """
+
+    def __init__(self, url: Optional[str] = None, ttl: int = 900, local_size: int = 256):
+        self.url = url or os.getenv('REDIS_URL')
+        self.ttl = int(os.getenv('CACHE_TTL_SECONDS', ttl))
+        self.client = None
+        self.local_size = local_size
+        self._local: OrderedDict = OrderedDict()
+        self._local_lock = threading.Lock()
+
+        if not self.url:
+            logger.info("ℹ️ REDIS_URL not set, LLM responses cached in-process only")
+        elif not REDIS_AVAILABLE:
+            logger.warning("⚠️ redis package not installed, LLM responses cached in-process only")
+        else:
+            self.client = redis.Redis.from_url(
+                self.url, decode_responses=False, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            logger.info(f"🗄️ Redis cache enabled (TTL {self.ttl}s)")
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """Get a JSON value, None on miss or error"""
+        if not self.client:
+            return self._get_local(key)
+        try:
+            raw = self.client.get(key)
+            return loads(gzip.decompress(raw)) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"⚠️ Cache read failed for {key}: {e}")
+            return None
+
+    def set_json(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Store a JSON value with a TTL"""
+        if not self.client:
+            self._set_local(key, value, ttl)
+            return
+        try:
+            payload = gzip.compress(dumps(value).encode('utf-8'))
+            self.client.setex(key, ttl or self.ttl, payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache write failed for {key}: {e}")
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        with self._local_lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Any, ttl: Optional[int] = None):
+        with self._local_lock:
+            self._local[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def get_embeddings(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Get float32 embeddings for several keys in one round-trip"""
+        if not self.client:
+            return [self._get_local(key) for key in keys]
+        try:
+            values = self.client.mget(keys)
+            return [np.frombuffer(raw, dtype=np.float32) if raw is not None else None for raw in values]
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache read failed: {e}")
+            return [None] * len(keys)
+
+    def set_embeddings(self, embeddings: Dict[str, np.ndarray], ttl: Optional[int] = None):
+        """Store several embeddings in one pipelined round-trip"""
+        if not embeddings:
+            return
+        if not self.client:
+            for key, embedding in embeddings.items():
+                self._set_local(key, np.asarray(embedding, dtype=np.float32), ttl)
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, embedding in embeddings.items():
+                pipe.setex(key, ttl or self.ttl, np.asarray(embedding, dtype=np.float32).tobytes())
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache write failed: {e}")
+
+class SemanticCache:
+    """
+    In-process cache keyed by meaning rather than exact text
+    - Entries are L2-normalized embeddings plus a namespace (e.g. conversation state)
+    - A lookup hits when an entry of the same namespace has cosine similarity >= threshold
+    - Once max_entries is reached, entries are overwritten in CLOCK order (an LRU approximation):
+      the sweep skips, once, every entry that was hit since it last passed
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 10000):
+        self.threshold = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', threshold))
+        self.max_entries = max_entries
+        self._embeddings: Optional[np.ndarray] = None  # allocated on first put, once the dimension is known
+        self._namespaces = np.zeros(max_entries, dtype=np.int64)
+        self._values: List[Any] = [None] * max_entries
+        self._referenced = np.zeros(max_entries, dtype=bool)
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _namespace_id(namespace: str) -> int:
+        return int.from_bytes(hashlib.sha256(namespace.encode('utf-8')).digest()[:8], 'little', signed=True)
+
+    def get(self, namespace: str, embedding: np.ndarray) -> Optional[Any]:
+        """Value stored for the most similar embedding in the namespace, None below the threshold"""
+        with self._lock:
+            if not self._count:
+                return None
+            similarities = self._embeddings[:self._count] @ embedding
+            similarities[self._namespaces[:self._count] != self._namespace_id(namespace)] = -1.0
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            self._referenced[best] = True
+            return self._values[best]
+
+    def put(self, namespace: str, embedding: np.ndarray, value: Any):
+        """Store a value for an embedding, evicting the least recently hit entry (approximately) when full"""
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+            slot = self._next
+            if self._count == self.max_entries:
+                # Give recently hit entries a second chance; stops after one full sweep at most
+                while self._referenced[slot]:
+                    self._referenced[slot] = False
+                    slot = (slot + 1) % self.max_entries
+            self._referenced[slot] = False
+            self._embeddings[slot] = embedding
+            self._namespaces[slot] = self._namespace_id(namespace)
+            self._values[slot] = value
+            self._next = (slot + 1) % self.max_entries
+            self._count = min(self._count + 1, self.max_entries)
+
+# Global instances
+cache_client = CacheClient()
+semantic_cache = SemanticCache()
@@ -7,6 +7,7 @@ import logging
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from core.exceptions import ProcessingError as DataError
+from core.json_utils import load_file
 from models.data_models import TravelOffer
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,8 @@ class DataService:
         self.data_path = Path(data_path)
         self._data = None
         self._offers = None
+        self._offers_by_reference = None
+        self._offers_by_id = None
         
     def load_data(self) -> Dict[str, Any]:
         """Load data from JSON file"""
@@ -25,10 +28,11 @@ class DataService:
             if not self.data_path.exists():
                 raise DataError(f"Data file not found: {self.data_path}")
                 
-            with open(self.data_path, 'r', encoding='utf-8') as f:
-                self._data = json.load(f)
-                logger.info(f"✅ Loaded data from {self.data_path}")
-                return self._data
+            self._data = load_file(self.data_path)
+            self._offers_by_reference = None
+            self._offers_by_id = None
+            logger.info(f"✅ Loaded data from {self.data_path}")
+            return self._data
                 
         except json.JSONDecodeError as e:
             raise DataError(f"Invalid JSON in data file: {e}")
@@ -60,12 +64,20 @@ class DataService:
             return offers
     
     def get_offer_by_id(self, offer_id: str) -> Optional[Dict[str, Any]]:
-        """Get specific offer by ID"""
-        offers = self.get_offers()
-        for offer in offers:
-            if offer.get('id') == offer_id:
-                return offer
-        return None
+        """Get specific offer by ID, through an index built on first use"""
+        if self._offers_by_id is None:
+            self._offers_by_id = {}
+            for offer in self.get_offers():
+                self._offers_by_id.setdefault(offer.get('id'), offer)
+        return self._offers_by_id.get(offer_id)
+    
+    def get_offer_by_reference(self, reference: str) -> Optional[Dict[str, Any]]:
+        """Get specific offer by reference, through an index built on first use"""
+        if self._offers_by_reference is None:
+            self._offers_by_reference = {}
+            for offer in self.get_offers():
+                self._offers_by_reference.setdefault(offer.get('reference'), offer)
+        return self._offers_by_reference.get(reference)
     
     def search_offers(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search offers by query"""
@@ -4,15 +4,40 @@ LLM Service with Backup Model Support
 Enhanced LLM service that uses priority-based backup models with automatic fallback.
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Generator, Union
-from groq import Groq, GroqError
+import os
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any, AsyncGenerator, Callable, Union
 from core.unified_config import unified_config
 from services.backup_model_service import backup_model_service
+from services.cache_service import cache_client, make_cache_key
+from core.json_utils import dumps, loads
 import json
 
 logger = logging.getLogger(__name__)
 
+# Completions at or below this temperature are effectively deterministic, so identical
+# requests are answered from the cache (reasoning at 0.1 and matcher at 0.3 by default)
+DETERMINISTIC_MAX_TEMPERATURE = float(os.getenv('DETERMINISTIC_CACHE_MAX_TEMPERATURE', '0.3'))
+DETERMINISTIC_CACHE_TTL = int(os.getenv('DETERMINISTIC_CACHE_TTL_SECONDS', '3600'))
+
+# Cacheable completions currently being requested, by cache key. Concurrent identical
+# requests (e.g. several users ranking the same offers) wait for one provider call.
+_IN_FLIGHT: Dict[str, asyncio.Future] = {}
+
+def _forget_in_flight(cache_key: str, task: asyncio.Future):
+    if _IN_FLIGHT.get(cache_key) is task:
+        del _IN_FLIGHT[cache_key]
+
+# JSON mode: the provider constrains decoding to a single valid JSON object.
+# The messages must still mention JSON and describe the expected fields.
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# Per-request callback receiving generated response text as it streams in.
+# Set by streaming endpoints; asyncio tasks inherit it, so concurrent requests don't mix.
+token_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar('token_sink', default=None)
+
 class LLMService:
     """
     Enhanced LLM service with backup model support
@@ -25,7 +50,8 @@ class LLMService:
             logger.warning("⚠️ No API key found in LLMService. Some features may not work properly.")
             self.client = None
         else:
-            self.client = Groq(api_key=api_key)
+            # Reuse the backup service's pooled client instead of opening another connection pool
+            self.client = backup_model_service.async_client
         self.models = self.config.get('models', {})
         
         # Dashboard settings support
@@ -57,6 +83,7 @@ class LLMService:
         model_type: str,
         messages: List[Dict[str, str]],
         stream: bool = False,  # Changed default to False for simple API calls
+        cache_key: Optional[str] = None,
         **kwargs
     ) -> Any:
         """
@@ -66,22 +93,65 @@ class LLMService:
             model_type: Type of model (reasoning, generation, matcher, extractor)
             messages: List of message dictionaries
             stream: Whether to stream the response
+            cache_key: Optional cache key for non-streaming responses (see make_cache_key).
+                Low-temperature completions are keyed on the exact request when not given.
             **kwargs: Additional parameters
         
         Returns:
             Completion response or generator
         """
+        cache_ttl = None
+        if cache_key is None and not stream:
+            cache_key = self._deterministic_cache_key(model_type, messages, kwargs)
+            cache_ttl = DETERMINISTIC_CACHE_TTL
+        use_cache = cache_key is not None and not stream
+        if use_cache:
+            cached = cache_client.get_json(cache_key)
+            if cached is not None:
+                logger.info(f"⚡ Cache hit for {model_type} completion ({cache_key})")
+                return cached
+            pending = _IN_FLIGHT.get(cache_key)
+            if pending is not None:
+                logger.info(f"⚡ Joining in-flight {model_type} completion ({cache_key})")
+                # Shielded so a cancelled caller doesn't cancel the call others wait for
+                return await asyncio.shield(pending)
+        
         try:
-            return await backup_model_service.create_completion_with_fallback(
+            request = backup_model_service.create_completion_with_fallback(
                 model_type=model_type,
                 messages=messages,
                 stream=stream,
                 **kwargs
             )
+            if not use_cache:
+                return await request
+            
+            task = asyncio.ensure_future(request)
+            _IN_FLIGHT[cache_key] = task
+            task.add_done_callback(lambda done: _forget_in_flight(cache_key, done))
+            response = await asyncio.shield(task)
+            cache_client.set_json(cache_key, response, ttl=cache_ttl)
+            return response
         except Exception as e:
             logger.error(f"❌ All models failed for {model_type}: {e}")
             raise
     
+    def _deterministic_cache_key(self, model_type: str, messages: List[Dict[str, str]],
+                                 params: Dict[str, Any]) -> Optional[str]:
+        """Exact-request cache key (model, temperature, params, messages), None for sampled completions"""
+        model_config = self.models.get(model_type, {})
+        temperature = params.get('temperature', model_config.get('temperature', 0.7))
+        if temperature is None or temperature > DETERMINISTIC_MAX_TEMPERATURE:
+            return None
+        return make_cache_key(
+            'llm',
+            model_type,
+            str(model_config.get('name')),
+            str(temperature),
+            dumps(params, sort_keys=True, default=str),
+            dumps(messages)
+        )
+    
     async def create_reasoning_completion(
         self,
         messages: List[Dict[str, str]],
@@ -139,7 +209,7 @@ class LLMService:
         model_type: str,
         messages: List[Dict[str, str]],
         **kwargs
-    ) -> Generator[str, None, None]:
+    ) -> AsyncGenerator[str, None]:
         """
         Stream response from model with backup fallback
         
@@ -154,8 +224,8 @@ class LLMService:
         try:
             completion = await self.create_completion(model_type, messages, stream=True, **kwargs)
             
-            for chunk in completion:
-                if chunk.choices[0].delta.content:
+            async for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
                     
         except Exception as e:
@@ -215,7 +285,7 @@ class LLMService:
                 
                 # Try to parse as JSON first
                 try:
-                    result = json.loads(response)
+                    result = loads(response)
                     return result
                 except json.JSONDecodeError:
                     # Return as string if not JSON
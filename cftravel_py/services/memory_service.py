@@ -3,14 +3,23 @@ Memory service for ASIA.fr Agent
 """
 
 import logging
+import sys
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
+from itertools import islice
+from typing import Deque, Dict, Any, List, Optional
 from datetime import datetime
 from core.exceptions import MemoryError
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Messages kept per conversation; prompts only ever use the last few turns
+MAX_STORED_MESSAGES = 50
+
+# One instance per message and per live conversation; slots drop the per-instance __dict__ (Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class ConversationMessage:
     """Model for conversation messages"""
     role: str  # "user", "assistant", "system"
@@ -18,16 +27,17 @@ class ConversationMessage:
     timestamp: str
     metadata: Optional[Dict[str, Any]] = None
 
-@dataclass
+@dataclass(**_SLOTS)
 class Conversation:
     """Model for conversation context"""
     id: str
-    messages: List[ConversationMessage]
+    messages: Deque[ConversationMessage]
     created_at: str
     updated_at: str
     user_preferences: Optional[Dict[str, Any]] = None
     offers_shown: Optional[List[Dict[str, Any]]] = None
     conversation_context: Optional[Dict[str, Any]] = None
+    message_count: int = 0  # All messages ever added, including those dropped from the deque
 
 class MemoryService:
     """Service for managing conversation memory"""
@@ -46,7 +56,7 @@ class MemoryService:
             now = datetime.utcnow().isoformat()
             conversation = Conversation(
                 id=conversation_id,
-                messages=[],
+                messages=deque(maxlen=MAX_STORED_MESSAGES),
                 user_preferences={},
                 offers_shown=[],
                 conversation_context={},
@@ -80,6 +90,7 @@ class MemoryService:
             )
             
             conversation.messages.append(message)
+            conversation.message_count += 1
             conversation.updated_at = datetime.utcnow().isoformat()
             
             logger.debug(f"✅ Added {role} message to conversation {conversation_id}")
@@ -96,9 +107,9 @@ class MemoryService:
         
         messages = conversation.messages
         if limit:
-            messages = messages[-limit:]
+            return list(islice(messages, max(len(messages) - limit, 0), None))
         
-        return messages
+        return list(messages)
     
     def clear_conversation(self, conversation_id: str) -> bool:
         """Clear a conversation"""
@@ -226,7 +237,7 @@ class MemoryService:
         
         return {
             'id': conversation.id,
-            'message_count': len(conversation.messages),
+            'message_count': conversation.message_count,
             'created_at': conversation.created_at,
             'updated_at': conversation.updated_at,
             'user_preferences': conversation.user_preferences,
@@ -237,16 +248,30 @@ class MemoryService:
         """Get all conversations summary"""
         return [self.get_conversation_summary(conv_id) for conv_id in self._conversations.keys()]
     
-    def get_conversation_history(self, conversation_id: str, max_messages: int = 10) -> str:
-        """Get conversation history as formatted string"""
-        messages = self.get_messages(conversation_id, max_messages)
+    def get_conversation_history(self, conversation_id: str, max_messages: int = 10,
+                                 max_chars: Optional[int] = None) -> str:
+        """
+        Get conversation history as formatted string
+        - With max_chars, only the most recent messages fitting the budget are formatted
+        """
+        conversation = self.get_conversation(conversation_id)
+        if not conversation:
+            return ""
         
+        # Walk from the newest message so long conversations never format older turns
         history = []
-        for msg in messages:
+        remaining = max_chars
+        for msg in islice(reversed(conversation.messages), max_messages):
+            if remaining is not None and remaining <= 0:
+                break
             role = "User" if msg.role == "user" else "Assistant"
-            history.append(f"{role}: {msg.content}")
+            line = f"{role}: {msg.content}"
+            history.append(line)
+            if remaining is not None:
+                remaining -= len(line) + 1
         
-        return "\n".join(history)
+        text = "\n".join(reversed(history))
+        return text[-max_chars:] if max_chars is not None else text
     
     def add_offers_shown(self, conversation_id: str, offers: List[Dict[str, Any]]) -> bool:
         """Track offers shown to user"""
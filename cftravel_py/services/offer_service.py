@@ -2,6 +2,7 @@
 Offer service for ASIA.fr Agent
 """
 
+import heapq
 import logging
 from typing import Dict, Any, List, Optional
 from core.exceptions import ProcessingError as OfferError
@@ -10,6 +11,54 @@ from services.data_service import DataService
 
 logger = logging.getLogger(__name__)
 
+# Country names (English and French) to the country codes used in offer destinations
+_COUNTRY_CODES = {
+    'japan': 'jp',
+    'japon': 'jp',
+    'vietnam': 'vn',
+    'thailand': 'th',
+    'thailande': 'th',
+    'cambodia': 'kh',
+    'cambodge': 'kh',
+    'laos': 'la',
+    'myanmar': 'mm',
+    'singapore': 'sg',
+    'malaysia': 'my',
+    'malaisie': 'my',
+    'indonesia': 'id',
+    'indonésie': 'id',
+    'philippines': 'ph',
+    'philippine': 'ph',
+    'china': 'cn',
+    'chine': 'cn',
+    'india': 'in',
+    'inde': 'in',
+    'nepal': 'np',
+    'népal': 'np',
+    'bhutan': 'bt',
+    'bhoutan': 'bt',
+    'sri lanka': 'lk',
+    'maldives': 'mv',
+    'maldive': 'mv',
+    'australia': 'au',
+    'australie': 'au',
+    'jordan': 'jo',
+    'jordanie': 'jo',
+    'lebanon': 'lb',
+    'syria': 'sy',
+    'iraq': 'iq',
+    'iran': 'ir',
+    'oman': 'om',
+    'yemen': 'ye',
+    'saudi arabia': 'sa',
+    'arabie saoudite': 'sa',
+    'kuwait': 'kw',
+    'qatar': 'qa',
+    'bahrain': 'bh',
+    'uae': 'ae',
+    'emirates': 'ae'
+}
+
 class OfferService:
     """Service for offer matching and processing"""
     
@@ -19,9 +68,6 @@ class OfferService:
     def match_offers(self, user_preferences: Dict[str, Any], max_offers: int = 3) -> List[OfferCard]:
         """Match offers based on user preferences"""
         try:
-            import logging
-            logger = logging.getLogger(__name__)
-            
             logger.info(f"🔍 Matching offers with preferences: {user_preferences}")
             
             # Extract preferences
@@ -36,22 +82,21 @@ class OfferService:
             all_offers = self.data_service.get_offers()
             logger.info(f"🔍 Processing {len(all_offers)} offers")
             
-            matched_offers = []
+            scored_offers = []
             
             for i, offer in enumerate(all_offers):
                 try:
                     score = self._calculate_match_score(offer, user_preferences)
                     if score > 0.5:  # Minimum match threshold
-                        offer_card = self._convert_to_offer_card(offer, score, user_preferences)
-                        matched_offers.append(offer_card)
+                        scored_offers.append((score, offer))
                 except Exception as e:
                     logger.error(f"❌ Error processing offer {i}: {e}")
                     logger.error(f"❌ Offer data: {offer}")
                     raise
             
-            # Sort by match score and limit results
-            matched_offers.sort(key=lambda x: x.match_score or 0, reverse=True)
-            result = matched_offers[:max_offers]
+            # Keep the best offers by match score, only those are converted to cards
+            top_offers = heapq.nlargest(max_offers, scored_offers, key=lambda x: x[0])
+            result = [self._convert_to_offer_card(offer, score, user_preferences) for score, offer in top_offers]
             logger.info(f"🔍 Found {len(result)} matching offers")
             return result
             
@@ -62,13 +107,7 @@ class OfferService:
         """Get detailed program for an offer"""
         try:
             # Find the offer by reference
-            offers = self.data_service.get_offers()
-            offer = None
-            
-            for o in offers:
-                if o.get('reference') == offer_reference:
-                    offer = o
-                    break
+            offer = self.data_service.get_offer_by_reference(offer_reference)
             
             if not offer:
                 return None
@@ -123,55 +162,6 @@ class OfferService:
         
         # Destination match (weight: 0.6 - much more important)
         if preferences.get('destination'):
-            # Enhanced country name to country code mapping
-            country_mapping = {
-                'japan': 'jp',
-                'japon': 'jp',
-                'vietnam': 'vn',
-                'thailand': 'th',
-                'thailande': 'th',
-                'cambodia': 'kh',
-                'cambodge': 'kh',
-                'laos': 'la',
-                'myanmar': 'mm',
-                'singapore': 'sg',
-                'malaysia': 'my',
-                'malaisie': 'my',
-                'indonesia': 'id',
-                'indonésie': 'id',
-                'philippines': 'ph',
-                'philippine': 'ph',
-                'china': 'cn',
-                'chine': 'cn',
-                'india': 'in',
-                'inde': 'in',
-                'nepal': 'np',
-                'népal': 'np',
-                'bhutan': 'bt',
-                'bhoutan': 'bt',
-                'sri lanka': 'lk',
-                'sri lanka': 'lk',
-                'maldives': 'mv',
-                'maldive': 'mv',
-                'australia': 'au',
-                'australie': 'au',
-                'jordan': 'jo',
-                'jordanie': 'jo',
-                'lebanon': 'lb',
-                'syria': 'sy',
-                'iraq': 'iq',
-                'iran': 'ir',
-                'oman': 'om',
-                'yemen': 'ye',
-                'saudi arabia': 'sa',
-                'arabie saoudite': 'sa',
-                'kuwait': 'kw',
-                'qatar': 'qa',
-                'bahrain': 'bh',
-                'uae': 'ae',
-                'emirates': 'ae'
-            }
-            
             # Destinations are dictionaries with 'city' and 'country' fields
             offer_destinations = []
             for dest in offer.get('destinations', []):
@@ -187,8 +177,8 @@ class OfferService:
             if pref_destination in offer_destinations:
                 score += 0.6
             # Check if preference matches country name (mapped to country code)
-            elif pref_destination in country_mapping:
-                country_code = country_mapping[pref_destination]
+            elif pref_destination in _COUNTRY_CODES:
+                country_code = _COUNTRY_CODES[pref_destination]
                 if country_code in offer_destinations:
                     score += 0.6
             # Check for partial matches (less weight)
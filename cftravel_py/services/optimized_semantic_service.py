@@ -7,18 +7,238 @@ Focused on performance and accuracy
 
 import numpy as np
 import faiss
+import hashlib
+import importlib.util
 import json
 import logging
+import platform
+import re
+import threading
 import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import Callable, List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+from services.cache_service import cache_client, make_cache_key
+from core.json_utils import load_file
 from datetime import datetime
 import pickle
 import os
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Bump when the text representation or index layout changes so saved indexes get rebuilt
+INDEX_VERSION = 1
+
+# Search results kept per service; queries built from the same preferences repeat across turns
+SEARCH_CACHE_SIZE = 1024
+_QUERY_PUNCTUATION_RE = re.compile(r'[^\w\s]+')
+
+def _normalize_query(query: str) -> str:
+    """Lowercased query without punctuation and with collapsed whitespace"""
+    return ' '.join(_QUERY_PUNCTUATION_RE.sub(' ', query.lower()).split())
+
+# Models are shared by every service instance; the lock keeps concurrent
+# first requests from loading the same model twice
+_model_lock = threading.RLock()
+
+# "onnx" encodes with a quantized ONNX export through ONNX Runtime (no PyTorch in the encode path),
+# "torch" with the regular model, "remote" through an embedding server (see EMBEDDING_SERVER_URL).
+# ONNX and remote fall back to torch when they are not installed, reachable or fail to load.
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'onnx').lower()
+
+def _default_onnx_file() -> str:
+    """
+    Pick the int8 export matching the CPU's instruction set, as published for the
+    sentence-transformers models: VNNI dot-product instructions when present
+    """
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return 'onnx/model_qint8_arm64.onnx'
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            flags = next((line.split(':', 1)[1].split() for line in cpuinfo if line.startswith('flags')), [])
+    except OSError:
+        flags = []
+    if 'avx512_vnni' in flags:
+        return 'onnx/model_qint8_avx512_vnni.onnx'
+    if 'avx512f' in flags:
+        return 'onnx/model_qint8_avx512.onnx'
+    return 'onnx/model_quint8_avx2.onnx'
+
+EMBEDDING_ONNX_FILE = os.getenv('EMBEDDING_ONNX_FILE') or _default_onnx_file()
+# Texts per encode batch, 0 picks one for the device (large batches only pay off on GPU)
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '0'))
+# Half-precision weights for the PyTorch model on GPU: half the memory traffic per batch,
+# cosine similarities move in the third decimal at most
+EMBEDDING_FP16 = os.getenv('EMBEDDING_FP16', 'true').lower() == 'true'
+ONNX_AVAILABLE = (importlib.util.find_spec('onnxruntime') is not None
+                  and importlib.util.find_spec('optimum') is not None)
+
+# OpenAI-compatible /embeddings server for the remote backend, e.g. Infinity, which batches
+# the concurrent requests of every worker process into full model batches
+EMBEDDING_SERVER_URL = os.getenv('EMBEDDING_SERVER_URL', 'http://localhost:7997')
+# Model id the server was started with, defaults to the sentence-transformers hub id
+EMBEDDING_SERVER_MODEL = os.getenv('EMBEDDING_SERVER_MODEL')
+
+class RemoteEmbeddingModel:
+    """The part of the SentenceTransformer API the service uses, backed by an embedding server"""
+    
+    def __init__(self, model_id: str, base_url: str):
+        import httpx
+        self.model_id = model_id
+        self.url = f"{base_url.rstrip('/')}/embeddings"
+        self.device = None  # batch size defaults as on CPU
+        self._client = httpx.Client(timeout=httpx.Timeout(30.0, connect=5.0))
+        self._dimension = None
+    
+    def encode(self, texts: List[str], batch_size: int = 128, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True) -> np.ndarray:
+        """Embeddings of the texts, one request per batch_size texts"""
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            response = self._client.post(self.url, json={'model': self.model_id, 'input': texts[start:start + batch_size]})
+            response.raise_for_status()
+            data = sorted(response.json()['data'], key=lambda item: item['index'])
+            embeddings.extend(item['embedding'] for item in data)
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = self.encode(['dimension']).shape[1]
+        return self._dimension
+
+@lru_cache(maxsize=4)
+def _load_embedding_model(model_name: str, backend: str) -> Tuple['SentenceTransformer', str]:
+    if backend == 'remote':
+        model_id = EMBEDDING_SERVER_MODEL or (model_name if '/' in model_name else f"sentence-transformers/{model_name}")
+        try:
+            model = RemoteEmbeddingModel(model_id, EMBEDDING_SERVER_URL)
+            model.get_sentence_embedding_dimension()  # fail here, not on the first search
+            return model, f"remote:{model_id}"
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding server {EMBEDDING_SERVER_URL} unavailable, using PyTorch: {e}")
+    
+    # Imported on first load: sentence_transformers pulls in torch, which takes seconds
+    from sentence_transformers import SentenceTransformer
+    
+    if backend == 'onnx' and ONNX_AVAILABLE:
+        try:
+            model = SentenceTransformer(model_name, backend='onnx', model_kwargs={'file_name': EMBEDDING_ONNX_FILE})
+            return model, f"onnx:{EMBEDDING_ONNX_FILE}"
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX backend unavailable for {model_name}, using PyTorch: {e}")
+    model = SentenceTransformer(model_name)
+    if EMBEDDING_FP16 and model.device.type == 'cuda':
+        # Own backend label, so fp16 vectors never mix with cached or saved fp32 ones
+        return model.half(), 'torch:fp16'
+    return model, 'torch'
+
+def get_embedding_model(model_name: str) -> 'SentenceTransformer':
+    """Get the process-wide Sentence Transformer for a model name"""
+    with _model_lock:
+        return _load_embedding_model(model_name, EMBEDDING_BACKEND)[0]
+
+def get_embedding_backend(model_name: str) -> str:
+    """Backend actually used for a model name: 'torch', 'torch:fp16', 'onnx:<file>' or 'remote:<model id>'"""
+    with _model_lock:
+        return _load_embedding_model(model_name, EMBEDDING_BACKEND)[1]
+
+def _quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization, returns (int8 rows, float32 scale per row)"""
+    scales = np.abs(embeddings).max(axis=1).astype('float32') / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(embeddings / scales[:, None]).astype(np.int8)
+    return quantized, scales
+
+# Below this many rows numba's thread dispatch costs more than numpy's single pass
+_NATIVE_SCORE_MIN_ROWS = 512
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True, fastmath=True, nogil=True)
+    def _dot_scores_native(matrix, query):
+        """Row-parallel dot products; int8 rows are read as is, without a widened copy"""
+        rows, dim = matrix.shape
+        scores = np.empty(rows, dtype=np.float32)
+        for i in prange(rows):
+            acc = 0.0
+            for j in range(dim):
+                acc += matrix[i, j] * query[j]
+            scores[i] = acc
+        return scores
+    
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _top_k_dot_native(matrix, scales, query, k):
+        """
+        The k best rows by dot product with the query times the row scale, best first (ties keep
+        the lower row), scored and selected in one pass without building the score array
+        """
+        rows, dim = matrix.shape
+        k = min(k, rows)
+        top = np.empty(k, dtype=np.int64)
+        top_scores = np.empty(k, dtype=np.float32)
+        count = 0
+        for i in range(rows):
+            acc = 0.0
+            for j in range(dim):
+                acc += matrix[i, j] * query[j]
+            score = acc * scales[i]
+            if count == k and (k == 0 or score <= top_scores[k - 1]):
+                continue
+            pos = count if count < k else k - 1
+            while pos > 0 and top_scores[pos - 1] < score:
+                top[pos] = top[pos - 1]
+                top_scores[pos] = top_scores[pos - 1]
+                pos -= 1
+            top[pos] = i
+            top_scores[pos] = score
+            if count < k:
+                count += 1
+        return top, top_scores
+
+def _dot_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Dot product of every row with the query, with SimSIMD's or numba's kernels when installed"""
+    if SIMSIMD_AVAILABLE:
+        try:
+            # int8 rows are multiplied as is, without the widened int32 copy numpy needs
+            return np.asarray(simsimd.cdist(query.reshape(1, -1), matrix, metric='dot'), dtype=np.float32)[0]
+        except Exception as e:
+            logger.debug(f"SimSIMD scoring failed for {matrix.dtype}, using numpy: {e}")
+    if NUMBA_AVAILABLE and matrix.shape[0] >= _NATIVE_SCORE_MIN_ROWS:
+        # int8 dot products stay below 2**24 for embedding sizes up to 1024, so float32 holds them exactly
+        return _dot_scores_native(np.ascontiguousarray(matrix), np.ascontiguousarray(query))
+    if matrix.dtype == np.int8:
+        return matrix.astype(np.int32) @ query.astype(np.int32)
+    return matrix @ query
+
+def _write_atomically(path: Path, write: Callable[[str], None]):
+    """
+    Write a file through a temporary file next to it, then rename it into place: readers and
+    other workers' memory maps see the old file or the new one, never a truncated one
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(str(tmp_path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
 class OptimizedSemanticService:
     """
     High-performance semantic search service using Sentence Transformers
@@ -31,9 +251,14 @@ class OptimizedSemanticService:
     def __init__(self, 
                  model_name: str = 'all-MiniLM-L6-v2',
                  index_dir: str = None,
-                 cache_embeddings: bool = True):
+                 cache_embeddings: bool = True,
+                 quantize_embeddings: Optional[bool] = None):
         """Initialize the optimized semantic service"""
         self.model_name = model_name
+        # int8 similarity scans, EMBEDDINGS_INT8=false keeps float32 scoring
+        if quantize_embeddings is None:
+            quantize_embeddings = os.getenv('EMBEDDINGS_INT8', 'true').lower() == 'true'
+        self.quantize_embeddings = quantize_embeddings
         self.index_dir = Path(index_dir) if index_dir else Path(__file__).parent.parent / "data" / "vector_index"
         self.cache_embeddings = cache_embeddings
         
@@ -44,13 +269,20 @@ class OptimizedSemanticService:
         self.index_file = self.index_dir / "optimized_faiss_index.bin"
         self.metadata_file = self.index_dir / "optimized_metadata.pkl"
         self.embeddings_file = self.index_dir / "optimized_embeddings.npy"
+        self.fingerprint_file = self.index_dir / "optimized_index_fingerprint.json"
         
         # Core components
         self.model = None
+        self.embedding_backend = None
         self.index = None
         self.offer_embeddings = None
         self.offer_metadata = []
         self.offers = []
+        self._offer_rows = None
+        self._offer_embeddings_i8 = None
+        self._offer_scales = None
+        self._search_cache: OrderedDict = OrderedDict()
+        self._search_cache_lock = threading.Lock()
         
         # Performance metrics
         self.search_times = []
@@ -63,17 +295,19 @@ class OptimizedSemanticService:
         # Initialize
         self._load_model()
         self._load_or_build_index()
+        self._warm_kernels()
     
     def _load_model(self):
         """Load the Sentence Transformer model"""
         try:
             logger.info(f"🤖 Loading Sentence Transformer: {self.model_name}")
-            start_time = time.time()
+            start_time = time.perf_counter()
             
-            self.model = SentenceTransformer(self.model_name)
+            self.model = get_embedding_model(self.model_name)
+            self.embedding_backend = get_embedding_backend(self.model_name)
             
-            load_time = time.time() - start_time
-            logger.info(f"✅ Model loaded in {load_time:.2f}s")
+            load_time = time.perf_counter() - start_time
+            logger.info(f"✅ Model loaded in {load_time:.2f}s ({self.embedding_backend})")
             
         except Exception as e:
             logger.error(f"❌ Failed to load model: {e}")
@@ -81,15 +315,26 @@ class OptimizedSemanticService:
     
     def _load_or_build_index(self):
         """Load existing index or build new one"""
+        self._load_offers()
         if self._try_load_existing_index():
             logger.info("✅ Loaded existing optimized index")
         else:
             logger.info("🔨 Building new optimized index...")
-            self._load_offers()
             self._build_optimized_index()
     
+    def _index_fingerprint(self) -> Dict[str, Any]:
+        """Identify the saved index by layout version, embedding model and offer rows"""
+        references = [offer.get('reference') for offer in self.offers]
+        offers_hash = hashlib.sha256(json.dumps(references).encode('utf-8')).hexdigest()[:12]
+        return {
+            'version': INDEX_VERSION,
+            'model_name': self.model_name,
+            'backend': self.embedding_backend,
+            'offers_hash': offers_hash
+        }
+    
     def _try_load_existing_index(self) -> bool:
-        """Try to load existing index files"""
+        """Try to load existing index files, only if they were built from the current offers and model"""
         try:
             if (self.index_file.exists() and 
                 self.metadata_file.exists() and 
@@ -99,8 +344,26 @@ class OptimizedSemanticService:
                 with open(self.metadata_file, 'rb') as f:
                     self.offer_metadata = pickle.load(f)
                 
-                # Load embeddings
-                self.offer_embeddings = np.load(self.embeddings_file)
+                fingerprint = self._index_fingerprint()
+                if self.fingerprint_file.exists():
+                    with open(self.fingerprint_file, 'r', encoding='utf-8') as f:
+                        if json.load(f) != fingerprint:
+                            logger.info("♻️ Saved index is stale (offers or model changed)")
+                            return False
+                else:
+                    # Index saved before fingerprints existed (PyTorch embeddings): accept it if the
+                    # backend matches and its rows line up with the offers
+                    if self.embedding_backend != 'torch':
+                        logger.info("♻️ Saved index was embedded with PyTorch, rebuilding for the ONNX backend")
+                        return False
+                    saved_references = [metadata['offer'].get('reference') for metadata in self.offer_metadata]
+                    if saved_references != [offer.get('reference') for offer in self.offers]:
+                        logger.info("♻️ Saved index rows don't match the current offers")
+                        return False
+                    self._save_fingerprint(fingerprint)
+                
+                # Memory-map the embeddings: read-only pages are shared by every worker process
+                self.offer_embeddings = np.load(self.embeddings_file, mmap_mode='r')
                 
                 # Load FAISS index
                 self.index = faiss.read_index(str(self.index_file))
@@ -116,6 +379,7 @@ class OptimizedSemanticService:
     def _load_offers(self):
         """Load travel offers from data files"""
         data_dir = Path(__file__).parent.parent / "data"
+        self.offers = []
         
         # Load offers from different regions
         regions = ['asia', 'europe', 'americas', 'africa', 'oceania']
@@ -125,12 +389,11 @@ class OptimizedSemanticService:
             if region_dir.exists():
                 for json_file in region_dir.glob("*.json"):
                     try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            region_offers = json.load(f)
-                            if isinstance(region_offers, list):
-                                self.offers.extend(region_offers)
-                            elif isinstance(region_offers, dict) and 'offers' in region_offers:
-                                self.offers.extend(region_offers['offers'])
+                        region_offers = load_file(json_file)
+                        if isinstance(region_offers, list):
+                            self.offers.extend(region_offers)
+                        elif isinstance(region_offers, dict) and 'offers' in region_offers:
+                            self.offers.extend(region_offers['offers'])
                     except Exception as e:
                         logger.warning(f"Failed to load {json_file}: {e}")
         
@@ -203,12 +466,16 @@ class OptimizedSemanticService:
         
         try:
             logger.info("🔨 Building optimized index...")
-            start_time = time.time()
+            start_time = time.perf_counter()
             
             # Clear existing data
             self.offer_metadata = []
             self.offer_embeddings = None
             self.index = None
+            self._offer_rows = None
+            self._offer_embeddings_i8 = None
+            self._offer_scales = None
+            self._clear_search_cache()
             
             # Create optimized text representations
             offer_texts = []
@@ -233,24 +500,11 @@ class OptimizedSemanticService:
             
             # Generate embeddings
             logger.info("🧠 Generating embeddings...")
-            embedding_start = time.time()
+            embedding_start = time.perf_counter()
             
-            # Use batch processing for better performance
-            batch_size = 32
-            all_embeddings = []
-            
-            for i in range(0, len(offer_texts), batch_size):
-                batch_texts = offer_texts[i:i + batch_size]
-                batch_embeddings = self.model.encode(batch_texts, show_progress_bar=False)
-                all_embeddings.append(batch_embeddings)
-                
-                if (i + batch_size) % 100 == 0:
-                    logger.info(f"Generated embeddings for {min(i + batch_size, len(offer_texts))}/{len(offer_texts)} offers")
+            self.offer_embeddings = self._embed_offer_texts(offer_texts)
             
-            # Combine all embeddings
-            self.offer_embeddings = np.vstack(all_embeddings).astype('float32')
-            
-            embedding_time = time.time() - embedding_start
+            embedding_time = time.perf_counter() - embedding_start
             logger.info(f"✅ Generated {len(self.offer_embeddings)} embeddings in {embedding_time:.2f}s")
             
             # Build FAISS index
@@ -267,7 +521,7 @@ class OptimizedSemanticService:
             # Save index
             self._save_index()
             
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             logger.info(f"✅ Optimized index built in {total_time:.2f}s")
             logger.info(f"📊 Index contains {len(self.offer_embeddings)} offers with {dimension}D embeddings")
             
@@ -275,24 +529,187 @@ class OptimizedSemanticService:
             logger.error(f"❌ Failed to build optimized index: {e}")
             raise
     
+    def _embed_offer_texts(self, offer_texts: List[str]) -> np.ndarray:
+        """
+        Embedding matrix for the offer texts. Texts unchanged since the saved index reuse
+        its rows, the rest go through a single encode call (the model batches internally).
+        """
+        saved = self._saved_embeddings_by_text()
+        if not saved:
+            return self._encode(offer_texts)
+        
+        missing = [i for i, text in enumerate(offer_texts) if text not in saved]
+        embeddings = np.empty((len(offer_texts), self.model.get_sentence_embedding_dimension()), dtype='float32')
+        for i, text in enumerate(offer_texts):
+            if text in saved:
+                embeddings[i] = saved[text]  # copies out of the memory-mapped file
+        if missing:
+            embeddings[missing] = self._encode([offer_texts[i] for i in missing])
+        logger.info(f"♻️ Reused {len(offer_texts) - len(missing)} saved embeddings, encoded {len(missing)} offers")
+        return embeddings
+    
+    def _saved_embeddings_by_text(self) -> Dict[str, np.ndarray]:
+        """Rows of the saved index by offer text, when it was embedded with the current model and backend"""
+        try:
+            if not (self.fingerprint_file.exists() and self.metadata_file.exists() and self.embeddings_file.exists()):
+                return {}
+            with open(self.fingerprint_file, 'r', encoding='utf-8') as f:
+                fingerprint = json.load(f)
+            current = self._index_fingerprint()
+            if any(fingerprint.get(key) != current[key] for key in ('version', 'model_name', 'backend')):
+                return {}
+            
+            with open(self.metadata_file, 'rb') as f:
+                metadata = pickle.load(f)
+            embeddings = np.load(self.embeddings_file, mmap_mode='r')
+            if len(metadata) != len(embeddings):
+                return {}
+            return {entry['text']: embeddings[i] for i, entry in enumerate(metadata)}
+        except Exception as e:
+            logger.warning(f"⚠️ Could not reuse saved embeddings: {e}")
+            return {}
+    
     def _save_index(self):
         """Save the optimized index to disk"""
         try:
+            # Matches no build while the files are replaced, so a concurrent load sees a stale index
+            self._save_fingerprint({'saving': True})
+            
             # Save FAISS index
-            faiss.write_index(self.index, str(self.index_file))
+            _write_atomically(self.index_file, lambda path: faiss.write_index(self.index, path))
             
             # Save metadata
-            with open(self.metadata_file, 'wb') as f:
-                pickle.dump(self.offer_metadata, f)
+            def write_metadata(path: str):
+                with open(path, 'wb') as f:
+                    pickle.dump(self.offer_metadata, f)
+            _write_atomically(self.metadata_file, write_metadata)
             
             # Save embeddings
-            np.save(self.embeddings_file, self.offer_embeddings)
+            def write_embeddings(path: str):
+                with open(path, 'wb') as f:
+                    np.save(f, self.offer_embeddings)
+            _write_atomically(self.embeddings_file, write_embeddings)
+            
+            self._save_fingerprint(self._index_fingerprint())
             
             logger.info("💾 Index saved successfully")
             
         except Exception as e:
             logger.error(f"❌ Failed to save index: {e}")
     
+    def _save_fingerprint(self, fingerprint: Dict[str, Any]):
+        """Record which offers and model the saved index was built from"""
+        def write_fingerprint(path: str):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(fingerprint, f)
+        try:
+            _write_atomically(self.fingerprint_file, write_fingerprint)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to save index fingerprint: {e}")
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Raw float32 embeddings. encode() sorts the texts by length before batching and
+        restores their order, so each batch is padded to similar lengths only.
+        """
+        batch_size = EMBEDDING_BATCH_SIZE
+        if batch_size <= 0:
+            device = getattr(self.model, 'device', None)
+            batch_size = 1024 if getattr(device, 'type', 'cpu') == 'cuda' else 128
+        return self.model.encode(
+            texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True
+        ).astype('float32', copy=False)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """L2-normalized query embedding, comparable with offer_embeddings by dot product"""
+        return self.embed_many([query])[0]
+    
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """
+        L2-normalized embeddings for several texts
+        Cached embeddings are fetched in one round-trip, only misses go through the model
+        """
+        keys = [make_cache_key('emb', self.model_name, self.embedding_backend, text) for text in texts]
+        embeddings = np.zeros((len(texts), self.model.get_sentence_embedding_dimension()), dtype='float32')
+        
+        misses = []
+        for i, cached in enumerate(cache_client.get_embeddings(keys)):
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                misses.append(i)
+        
+        if misses:
+            encoded = self._encode([texts[i] for i in misses])
+            faiss.normalize_L2(encoded)
+            embeddings[misses] = encoded
+            cache_client.set_embeddings({keys[i]: embedding for i, embedding in zip(misses, encoded)})
+        
+        return embeddings
+    
+    def get_offer_rows(self) -> Dict[str, int]:
+        """Row of each offer (by reference) in offer_embeddings"""
+        if self._offer_rows is None:
+            self._offer_rows = {
+                metadata['offer'].get('reference'): i
+                for i, metadata in enumerate(self.offer_metadata)
+            }
+        return self._offer_rows
+    
+    def score_offers(self, query_embedding: np.ndarray, rows: Optional[List[int]] = None) -> np.ndarray:
+        """
+        Cosine similarity of a normalized query embedding with offer_embeddings (or some rows of it)
+        Uses the int8 copy of the matrix unless quantization is disabled
+        """
+        if not self.quantize_embeddings:
+            matrix = self.offer_embeddings if rows is None else self.offer_embeddings[rows]
+            return _dot_scores(matrix, np.asarray(query_embedding, dtype=np.float32))
+        
+        if self._offer_embeddings_i8 is None:
+            self._offer_embeddings_i8, self._offer_scales = _quantize_int8(self.offer_embeddings)
+        query_i8, query_scale = _quantize_int8(query_embedding.reshape(1, -1))
+        
+        matrix = self._offer_embeddings_i8 if rows is None else self._offer_embeddings_i8[rows]
+        scales = self._offer_scales if rows is None else self._offer_scales[rows]
+        # Exact integer dot products, rescaled by the row and query scales
+        dots = _dot_scores(matrix, query_i8[0])
+        return dots * scales * query_scale[0]
+    
+    def top_offers(self, query_embedding: np.ndarray, k: int,
+                   rows: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions (in rows, or in offer_embeddings) and similarities of the k offers most
+        similar to a normalized query embedding, best first, ties in row order
+        With numba the scoring and the selection are a single pass over the matrix
+        """
+        if not NUMBA_AVAILABLE:
+            scores = self.score_offers(query_embedding, rows)
+            top = np.argsort(-scores, kind='stable')[:k]
+            return top, scores[top]
+        
+        if not self.quantize_embeddings:
+            matrix = self.offer_embeddings if rows is None else self.offer_embeddings[rows]
+            query = np.asarray(query_embedding, dtype=np.float32)
+            scales = np.ones(matrix.shape[0], dtype=np.float32)
+        else:
+            if self._offer_embeddings_i8 is None:
+                self._offer_embeddings_i8, self._offer_scales = _quantize_int8(self.offer_embeddings)
+            query_i8, query_scale = _quantize_int8(query_embedding.reshape(1, -1))
+            matrix = self._offer_embeddings_i8 if rows is None else self._offer_embeddings_i8[rows]
+            query = query_i8[0]
+            scales = (self._offer_scales if rows is None else self._offer_scales[rows]) * query_scale[0]
+        return _top_k_dot_native(np.ascontiguousarray(matrix), np.ascontiguousarray(scales, dtype=np.float32),
+                                 np.ascontiguousarray(query), k)
+    
+    def _warm_kernels(self):
+        """Compile (or load from numba's cache) the scoring kernel now rather than on the first search"""
+        if not NUMBA_AVAILABLE or self.offer_embeddings is None or not len(self.offer_embeddings):
+            return
+        try:
+            self.top_offers(np.asarray(self.offer_embeddings[0], dtype=np.float32), 1, [0])
+        except Exception as e:
+            logger.debug(f"Scoring kernel warm-up failed: {e}")
+    
     def search_offers(self, query: str, top_k: int = 10, threshold: float = 0.1) -> List[Dict[str, Any]]:
         """
         Alias for search method - used by enhanced pipeline
@@ -307,53 +724,114 @@ class OptimizedSemanticService:
             logger.error("Index not built")
             return []
         
+        cache_key = (_normalize_query(query), top_k, threshold)
+        with self._search_cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                self._search_cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Using cached search results for '{query}'")
+            # Callers annotate the offers they get, so hand out copies
+            return [offer.copy() for offer in cached]
+        
         try:
-            search_start = time.time()
+            search_start = time.perf_counter()
             
-            # Generate query embedding
-            query_embedding = self.model.encode([query])
-            query_embedding = query_embedding.astype('float32')
-            
-            # Normalize query embedding for cosine similarity
-            faiss.normalize_L2(query_embedding)
+            # Generate (or reuse the cached) normalized query embedding
+            query_embedding = np.ascontiguousarray(self.embed_query(query).reshape(1, -1))
             
             # Search in FAISS index (get more candidates for better filtering)
             search_k = min(top_k * 3, len(self.offer_metadata))
             similarities, indices = self.index.search(query_embedding, search_k)
             
-            # Convert numpy arrays to regular Python types
-            similarities_list = similarities[0].tolist()
-            indices_list = indices[0].tolist()
-            
-            # Filter and format results
-            results = []
-            seen_offers = set()
-            
-            for similarity, idx in zip(similarities_list, indices_list):
-                if idx < len(self.offer_metadata) and similarity >= threshold:
-                    offer_data = self.offer_metadata[idx]['offer'].copy()
-                    offer_data['similarity_score'] = float(similarity)
-                    offer_data['search_rank'] = len(results) + 1
-                    
-                    # Avoid duplicates
-                    offer_id = offer_data.get('reference', f'offer_{idx}')
-                    if offer_id not in seen_offers:
-                        seen_offers.add(offer_id)
-                        results.append(offer_data)
-                        
-                        if len(results) >= top_k:
-                            break
-            
-            search_time = time.time() - search_start
+            results = self._collect_results(similarities[0], indices[0], top_k, threshold)
+            
+            search_time = time.perf_counter() - search_start
             self.search_times.append(search_time)
             
             logger.info(f"🔍 Found {len(results)} offers for '{query}' in {search_time:.3f}s")
+            self._cache_search_results(cache_key, results)
             return results
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
     
+    def search_batch(self, queries: List[str], top_k: int = 10, threshold: float = 0.1) -> List[List[Dict[str, Any]]]:
+        """
+        Semantic search for several queries (e.g. rewrites of one request) at once
+        Uncached queries are embedded in one encode() call and looked up in one FAISS search
+        """
+        if not self.index or self.offer_embeddings is None:
+            logger.error("Index not built")
+            return [[] for _ in queries]
+        
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+        cache_keys = [(_normalize_query(query), top_k, threshold) for query in queries]
+        with self._search_cache_lock:
+            for i, cache_key in enumerate(cache_keys):
+                cached = self._search_cache.get(cache_key)
+                if cached is not None:
+                    self._search_cache.move_to_end(cache_key)
+                    results[i] = [offer.copy() for offer in cached]
+        
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        if not misses:
+            return results
+        
+        try:
+            search_start = time.perf_counter()
+            
+            query_embeddings = np.ascontiguousarray(self.embed_many([queries[i] for i in misses]))
+            search_k = min(top_k * 3, len(self.offer_metadata))
+            similarities, indices = self.index.search(query_embeddings, search_k)
+            
+            for row, i in enumerate(misses):
+                results[i] = self._collect_results(similarities[row], indices[row], top_k, threshold)
+                self._cache_search_results(cache_keys[i], results[i])
+            
+            search_time = time.perf_counter() - search_start
+            self.search_times.append(search_time)
+            logger.info(f"🔍 Searched {len(misses)} queries in one batch in {search_time:.3f}s")
+            
+        except Exception as e:
+            logger.error(f"Batch search failed: {e}")
+            for i in misses:
+                results[i] = []
+        
+        return results
+    
+    def _collect_results(self, similarities: np.ndarray, indices: np.ndarray,
+                         top_k: int, threshold: float) -> List[Dict[str, Any]]:
+        """Turn one row of FAISS hits into ranked, de-duplicated offers above the threshold"""
+        results = []
+        seen_offers = set()
+        
+        # Convert numpy arrays to regular Python types
+        for similarity, idx in zip(similarities.tolist(), indices.tolist()):
+            if 0 <= idx < len(self.offer_metadata) and similarity >= threshold:
+                # Avoid duplicates
+                offer_id = self.offer_metadata[idx]['offer'].get('reference', f'offer_{idx}')
+                if offer_id in seen_offers:
+                    continue
+                seen_offers.add(offer_id)
+                
+                offer_data = self.offer_metadata[idx]['offer'].copy()
+                offer_data['similarity_score'] = float(similarity)
+                offer_data['search_rank'] = len(results) + 1
+                results.append(offer_data)
+                
+                if len(results) >= top_k:
+                    break
+        
+        return results
+    
+    def _cache_search_results(self, cache_key: Tuple[str, int, float], results: List[Dict[str, Any]]):
+        with self._search_cache_lock:
+            self._search_cache[cache_key] = [offer.copy() for offer in results]
+            while len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+    
     def search_with_context(self, query: str, context: str = "", top_k: int = 10) -> List[Dict[str, Any]]:
         """
         Search with additional context for better relevance
@@ -365,18 +843,14 @@ class OptimizedSemanticService:
     def get_similar_offers(self, offer_id: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Find offers similar to a specific offer"""
         # Find the target offer
-        target_idx = None
-        for i, metadata in enumerate(self.offer_metadata):
-            if metadata['offer'].get('reference') == offer_id:
-                target_idx = i
-                break
+        target_idx = self.get_offer_rows().get(offer_id)
         
         if target_idx is None:
             logger.warning(f"Offer {offer_id} not found")
             return []
         
         # Get the target embedding
-        target_embedding = self.offer_embeddings[target_idx:target_idx+1]
+        target_embedding = np.ascontiguousarray(self.offer_embeddings[target_idx:target_idx+1])
         
         # Search for similar offers
         similarities, indices = self.index.search(target_embedding, top_k + 1)  # +1 to exclude self
@@ -404,6 +878,7 @@ class OptimizedSemanticService:
             'embedding_dimension': self.offer_embeddings.shape[1] if self.offer_embeddings is not None else 0,
             'index_built': self.index is not None,
             'model_name': self.model_name,
+            'embedding_backend': self.embedding_backend,
             'average_search_time': avg_search_time,
             'average_embedding_time': avg_embedding_time,
             'total_searches': len(self.search_times),
@@ -411,10 +886,15 @@ class OptimizedSemanticService:
             'embeddings_file_size': self.embeddings_file.stat().st_size if self.embeddings_file.exists() else 0
         }
     
+    def _clear_search_cache(self):
+        with self._search_cache_lock:
+            self._search_cache.clear()
+    
     def clear_cache(self):
-        """Clear performance cache"""
+        """Clear performance and search result caches"""
         self.search_times = []
         self.embedding_times = []
+        self._clear_search_cache()
         logger.info("🧹 Performance cache cleared")
     
     def rebuild_index(self, force: bool = False):
@@ -424,4 +904,18 @@ class OptimizedSemanticService:
             self._load_offers()
             self._build_optimized_index()
         else:
-            logger.info("✅ Index already exists, use force=True to rebuild") 
\ No newline at end of file
+            logger.info("✅ Index already exists, use force=True to rebuild") 
+
+
+# One service per process: the index, offers and embedding matrices are loaded once
+# and shared by the chat pipeline, the semantic API and the settings endpoints
+_service_lock = threading.Lock()
+_shared_service: Optional[OptimizedSemanticService] = None
+
+def get_semantic_service() -> OptimizedSemanticService:
+    """Process-wide semantic service with the default index, built on first use"""
+    global _shared_service
+    with _service_lock:
+        if _shared_service is None:
+            _shared_service = OptimizedSemanticService()
+        return _shared_service
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic response cache
+"""
+
+import sys
+from pathlib import Path
+
+# Add the package directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from services.cache_service import SemanticCache
+
+def _unit(*components: float) -> np.ndarray:
+    """L2-normalized float32 vector of the given components, zero padded to 8 dimensions"""
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(components)] = components
+    return vector / np.linalg.norm(vector)
+
+def _basis(i: int) -> np.ndarray:
+    vector = np.zeros(8, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+def test_namespaces_are_separate():
+    """An entry only answers lookups from its own namespace"""
+    cache = SemanticCache(max_entries=4)
+    cache.threshold = 0.95
+    cache.put('conversation:a', _basis(0), 'réponse a')
+    
+    assert cache.get('conversation:a', _basis(0)) == 'réponse a'
+    assert cache.get('conversation:b', _basis(0)) is None
+    
+    # The same embedding in another namespace is a separate entry
+    cache.put('conversation:b', _basis(0), 'réponse b')
+    assert cache.get('conversation:a', _basis(0)) == 'réponse a'
+    assert cache.get('conversation:b', _basis(0)) == 'réponse b'
+
+def test_below_threshold_is_a_miss():
+    """Only inputs at least threshold-similar to a stored one are answered from the cache"""
+    cache = SemanticCache(max_entries=4)
+    cache.threshold = 0.95
+    cache.put('ns', _basis(0), 'réponse')
+    
+    close = _unit(1.0, 0.2)    # cosine ~0.98
+    far = _unit(1.0, 0.75)     # cosine 0.8
+    assert float(close @ _basis(0)) >= 0.95 > float(far @ _basis(0))
+    assert cache.get('ns', close) == 'réponse'
+    assert cache.get('ns', far) is None
+    assert cache.get('ns', _basis(1)) is None
+
+def test_eviction_at_capacity_skips_recently_hit_entries():
+    """When full, puts overwrite entries in CLOCK order, giving hit entries a second chance"""
+    cache = SemanticCache(max_entries=3)
+    cache.threshold = 0.95
+    for i in range(3):
+        cache.put('ns', _basis(i), f"réponse {i}")
+    
+    # Entry 0 was hit, so the next put overwrites entry 1 instead
+    assert cache.get('ns', _basis(0)) == 'réponse 0'
+    cache.put('ns', _basis(3), 'réponse 3')
+    assert cache.get('ns', _basis(1)) is None
+    assert cache.get('ns', _basis(2)) == 'réponse 2'
+    assert cache.get('ns', _basis(3)) == 'réponse 3'
+    
+    # The sweep goes on from there: entry 2 was hit above, so entry 0 is overwritten
+    cache.put('ns', _basis(4), 'réponse 4')
+    assert cache.get('ns', _basis(0)) is None
+    assert cache.get('ns', _basis(4)) == 'réponse 4'
+    assert cache._count == 3
+
+if __name__ == "__main__":
+    test_namespaces_are_separate()
+    test_below_threshold_is_a_miss()
+    test_eviction_at_capacity_skips_recently_hit_entries()
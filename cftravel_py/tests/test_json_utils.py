@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the JSON helpers used to parse LLM responses
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the package directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core import json_utils
+from core.json_utils import dumps, extract_json, find_json_span, load_file
+
+def _without_numba(function, *args):
+    """Run function with the regex scanner only"""
+    numba_available = json_utils.NUMBA_AVAILABLE
+    json_utils.NUMBA_AVAILABLE = False
+    try:
+        return function(*args)
+    finally:
+        json_utils.NUMBA_AVAILABLE = numba_available
+
+def test_extract_fenced_json():
+    """Code fences around the object are ignored"""
+    text = 'Voici la réponse :\n```json\n{"intent": "greeting", "confidence": 0.9}\n```\nBonne journée'
+    assert extract_json(text) == {'intent': 'greeting', 'confidence': 0.9}
+
+def test_extract_nested_json():
+    """Nesting, brackets inside strings and escaped quotes don't end the span early"""
+    text = 'Analyse : {"a": {"b": [1, 2, {"c": null}]}, "s": "}{ \\" ] {"} puis {"autre": 1}'
+    assert extract_json(text) == {'a': {'b': [1, 2, {'c': None}]}, 's': '}{ " ] {'}
+
+def test_extract_bare_json():
+    """JSON mode responses are parsed as a whole"""
+    assert extract_json('  {"destination": "Japon"}\n') == {'destination': 'Japon'}
+
+def test_extract_invalid_json():
+    """A balanced but invalid span raises, an unbalanced or missing one gives None"""
+    try:
+        extract_json('résultat {"a": } fin')
+    except json.JSONDecodeError:
+        pass
+    else:
+        raise AssertionError("invalid JSON was accepted")
+    assert extract_json('{"a": [1, 2]') is None
+    assert extract_json('pas de JSON ici') is None
+
+def test_extract_json_array():
+    """With open_char='[' the first balanced array is extracted"""
+    text = 'Sélection : [0, {"ids": [2, 5]}, "]"] et voilà'
+    assert extract_json(text, '[') == [0, {'ids': [2, 5]}, ']']
+    assert find_json_span('aucun tableau', '[') is None
+
+def test_long_non_ascii_input_scanners_agree():
+    """Above the native scan threshold, the byte scan and the regex scan return the same span"""
+    span = '{"ville": "Hô Chi Minh-Ville", "étapes": ["Hanoï", "Huế", "}"], "prix": {"€": 1990}}'
+    text = 'é' * 3000 + ' 日本 {non json ' + 'ü' * 1200 + ' ' + span + ' 東京' * 50
+    assert len(text) >= json_utils._NATIVE_SCAN_MIN_LENGTH
+    # Starts at the first brace, which opens an unbalanced span: no result
+    assert find_json_span(text) is None
+    assert _without_numba(find_json_span, text) is None
+    
+    text = text.replace('{non json', 'non json')
+    assert find_json_span(text) == span
+    assert _without_numba(find_json_span, text) == span
+    if json_utils.NUMBA_AVAILABLE:
+        assert json_utils._find_json_span_native(text, '{') == span
+    assert extract_json(text) == json.loads(span)
+
+def test_native_scan_matches_regex_scan():
+    """The byte scan agrees with the regex scan on nesting, strings, escapes and unbalanced input"""
+    if not json_utils.NUMBA_AVAILABLE:
+        return
+    cases = [
+        ('{"a": {"b": [1, 2]}} reste', '{'),
+        ('avant {"s": "}{ \\" ]", "é": "東京"} après {"x": 1}', '{'),
+        ('{"a": [1, 2]', '{'),
+        ('aucun objet', '{'),
+        ('liste [1, ["]", 2], {"k": [3]}] fin', '['),
+        ('["non fermé", [1, 2]', '['),
+    ]
+    for text, open_char in cases:
+        assert json_utils._find_json_span_native(text, open_char) == _without_numba(find_json_span, text, open_char), text
+
+def test_dumps_matches_json_dumps():
+    """Compact, non-ASCII output, with the stdlib fallback for non-str keys and big ints"""
+    value = {'ville': 'Kyōto', 'prix': 1990.5, 'étapes': ['Nara']}
+    assert dumps(value) == json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    assert dumps({'b': 1, 'a': 2}, sort_keys=True) == '{"a":2,"b":1}'
+    assert json.loads(dumps({1: 'un', 2: 'deux'})) == {'1': 'un', '2': 'deux'}
+    assert dumps(2 ** 70) == str(2 ** 70)
+    assert dumps({'d': object()}, default=lambda _: 'x') == '{"d":"x"}'
+
+def test_load_file():
+    """Files parse the same as json.load, empty files raise"""
+    value = {'offres': [{'reference': 'A', 'destination': 'Thaïlande'}]}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        assert load_file(path) == value
+        
+        empty_path = os.path.join(directory, 'empty.json')
+        open(empty_path, 'w').close()
+        try:
+            load_file(empty_path)
+        except json.JSONDecodeError:
+            pass
+        else:
+            raise AssertionError("empty file was accepted")
+
+if __name__ == "__main__":
+    test_extract_fenced_json()
+    test_extract_nested_json()
+    test_extract_bare_json()
+    test_extract_invalid_json()
+    test_extract_json_array()
+    test_long_non_ascii_input_scanners_agree()
+    test_native_scan_matches_regex_scan()
+    test_dumps_matches_json_dumps()
+    test_load_file()
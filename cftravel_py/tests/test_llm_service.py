@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the coalescing of identical cacheable completions
+"""
+
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+# Add the package directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services import llm_service as llm_service_module
+from services.llm_service import _IN_FLIGHT, llm_service
+
+MESSAGES = [{"role": "user", "content": "Classe ces offres"}]
+
+class _ControlledProvider:
+    """Stands in for backup_model_service: counts calls, answers once released"""
+    
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+    
+    async def create_completion_with_fallback(self, model_type, messages, stream=False, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return "réponse"
+
+async def _with_provider(provider: _ControlledProvider, scenario):
+    backup_model_service = llm_service_module.backup_model_service
+    llm_service_module.backup_model_service = provider
+    try:
+        return await scenario()
+    finally:
+        llm_service_module.backup_model_service = backup_model_service
+
+def _cache_key() -> str:
+    # A fresh key per test, so no earlier response is served from the cache
+    return f"test:{uuid.uuid4().hex}"
+
+def test_concurrent_identical_calls_share_one_provider_call():
+    """Concurrent requests for the same cache key wait for a single provider call"""
+    async def scenario():
+        provider = _ControlledProvider()
+        cache_key = _cache_key()
+        
+        async def run():
+            first = asyncio.create_task(llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+            second = asyncio.create_task(llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+            await asyncio.sleep(0)
+            provider.release.set()
+            results = await asyncio.gather(first, second)
+            # Let the done callback run
+            await asyncio.sleep(0)
+            return results
+        
+        results = await _with_provider(provider, run)
+        assert results == ["réponse", "réponse"]
+        assert provider.calls == 1
+        assert cache_key not in _IN_FLIGHT
+    
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    """Cancelling the caller that started the shared call leaves it running for the others"""
+    async def scenario():
+        provider = _ControlledProvider()
+        cache_key = _cache_key()
+        
+        async def run():
+            first = asyncio.create_task(llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+            await asyncio.sleep(0)
+            first.cancel()
+            await asyncio.sleep(0)
+            provider.release.set()
+            return first, await second
+        
+        first, second_result = await _with_provider(provider, run)
+        assert first.cancelled()
+        assert second_result == "réponse"
+        assert provider.calls == 1
+    
+    asyncio.run(scenario())
+
+def test_failed_call_leaves_no_in_flight_entry():
+    """A failure reaches every waiter and the next request makes a new provider call"""
+    async def scenario():
+        provider = _ControlledProvider(error=RuntimeError("provider down"))
+        cache_key = _cache_key()
+        
+        async def run():
+            first = asyncio.create_task(llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+            second = asyncio.create_task(llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+            await asyncio.sleep(0)
+            provider.release.set()
+            results = await asyncio.gather(first, second, return_exceptions=True)
+            # Let the done callback run
+            await asyncio.sleep(0)
+            return results
+        
+        results = await _with_provider(provider, run)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert provider.calls == 1
+        assert cache_key not in _IN_FLIGHT
+        
+        provider.error = None
+        result = await _with_provider(provider, lambda: llm_service.create_completion('matcher', MESSAGES, cache_key=cache_key))
+        assert result == "réponse"
+        assert provider.calls == 2
+    
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_concurrent_identical_calls_share_one_provider_call()
+    test_cancelled_waiter_does_not_cancel_shared_call()
+    test_failed_call_leaves_no_in_flight_entry()
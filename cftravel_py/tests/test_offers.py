@@ -3,6 +3,7 @@
 Test script for offer detection and structured offer creation
 """
 
+import asyncio
 import os
 import sys
 from pathlib import Path
@@ -10,7 +11,174 @@ from pathlib import Path
 # Add the current directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
+import numpy as np
+
+from pipelines import enhanced_modular_pipeline
+from pipelines.enhanced_modular_pipeline import EnhancedASIAModularPipeline
 from pipelines.modular_pipeline import ASIAModularPipeline
+from pipelines.components import travel_orchestrator
+from pipelines.components.travel_orchestrator import (
+    TravelOrchestrator, _FAST_TERMS, _FAST_TERMS_RE, _fast_extract_preferences, _fast_extraction_suffices, _top_k
+)
+from services import optimized_semantic_service
+from services.memory_service import MemoryService
+from services.optimized_semantic_service import OptimizedSemanticService
+
+# Small catalog covering every scoring branch: matching and other countries, close and far
+# durations, missing price and dates, culture and other offer types
+SCORING_OFFERS = [
+    {'reference': 'A', 'destinations': [{'country': 'JP', 'city': 'TYO'}], 'duration': '10 jours / 9 nuits',
+     'price': {'amount': 3000.0}, 'offer_type': 'Circuit culturel', 'dates': ['april 2026']},
+    {'reference': 'B', 'destinations': [{'country': 'JP', 'city': 'KIX'}], 'duration': '14 jours / 13 nuits',
+     'price': {'amount': '3 500 €'}, 'offer_type': 'Voyage individuel', 'dates': ['july 2026']},
+    {'reference': 'C', 'destinations': [{'country': 'TH', 'city': 'BKK'}], 'duration': '10 jours / 9 nuits',
+     'price': {'amount': 3000.0}, 'offer_type': 'Circuit culturel', 'dates': ['april 2026']},
+    {'reference': 'D', 'destinations': [{'country': 'JP', 'city': 'OSA'}], 'duration': 8,
+     'price': {'amount': 5000.0}, 'offer_type': 'Croisière'},
+    {'reference': 'E', 'destinations': [{'country': 'VN', 'city': 'HAN'}], 'duration': '21 jours',
+     'price': {}, 'offer_type': 'Circuit', 'dates': ['october 2026']},
+    {'reference': 'F', 'destinations': [{'country': 'KR', 'city': 'SEL'}], 'duration': 'sur mesure',
+     'price': {'amount': 2500.0}, 'offer_type': 'Autotour', 'dates': ['december 2026']},
+]
+
+def _scoring_orchestrator() -> TravelOrchestrator:
+    orchestrator = TravelOrchestrator(llm_service=None, data_service=None)
+    preferences = orchestrator.current_preferences
+    preferences.destination = 'Japon'
+    preferences.duration = '10 jours'
+    preferences.budget_amount = 3000.0
+    preferences.style = 'culture'
+    preferences.travel_dates = 'april'
+    return orchestrator
+
+def test_score_offer_matches_hand_computed_scores():
+    """Weighted sub-scores of _score_offer, only over the fields both sides set"""
+    orchestrator = _scoring_orchestrator()
+    prefs = orchestrator._prepare_scoring_preferences()
+    expected = [
+        1.0,  # A: every check matches
+        0.6 + 0.8 * 0.2 + 0.8 * 0.15 + 0.3 * 0.03 + 0.5 * 0.02,  # B: 4 days and 17% off, other style and season
+        0.2 + 0.15 + 0.03 + 0.02,  # C: other country
+        (0.6 + 0.2 + 0.3 * 0.15 + 0.3 * 0.03) / 0.98,  # D: no dates, price 67% off
+        (0.3 * 0.2 + 0.3 * 0.03 + 0.5 * 0.02) / 0.85,  # E: no price, 11 days off
+        0.6 * 0.2 + 0.8 * 0.15 + 0.3 * 0.03 + 0.5 * 0.02,  # F: "sur mesure" counts as 0 days
+    ]
+    scores = [orchestrator._score_offer(prefs, offer) for offer in SCORING_OFFERS]
+    assert np.allclose(scores, expected)
+    assert scores == [orchestrator._calculate_match_score(offer, prefs=prefs) for offer in SCORING_OFFERS]
+
+def _check_batch_scores(orchestrator: TravelOrchestrator):
+    """Batch scores must match the scalar scorer, for the matrix and for some rows"""
+    prefs = orchestrator._prepare_scoring_preferences()
+    expected = np.array([orchestrator._score_offer(prefs, offer) for offer in SCORING_OFFERS])
+    matrix = orchestrator._build_offer_matrix(SCORING_OFFERS)
+    assert np.allclose(orchestrator._score_offers(matrix), expected)
+    
+    # Restricted to some rows, positions are relative to the rows
+    rows = np.array([1, 3, 5])
+    assert np.allclose(orchestrator._score_offers(matrix, rows), expected[rows])
+
+def test_batch_scoring_matches_scalar_scorer():
+    """Batch scoring (numba kernel when installed) against _score_offer"""
+    _check_batch_scores(_scoring_orchestrator())
+
+def test_batch_scoring_matches_scalar_scorer_without_numba():
+    """numpy batch scoring against _score_offer"""
+    numba_available = travel_orchestrator.NUMBA_AVAILABLE
+    travel_orchestrator.NUMBA_AVAILABLE = False
+    try:
+        _check_batch_scores(_scoring_orchestrator())
+    finally:
+        travel_orchestrator.NUMBA_AVAILABLE = numba_available
+
+def _check_top_k():
+    """Best first, ties in index order, k larger than the scores or zero"""
+    scores = np.array([0.4, 0.9, 0.1, 0.9, 0.4, 0.7, 0.0, 0.9])
+    for k in (0, 1, 3, 5, 8, 12):
+        expected = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+        assert _top_k(scores, k).tolist() == expected
+    
+    orchestrator = _scoring_orchestrator()
+    scores = orchestrator._score_offers(orchestrator._build_offer_matrix(SCORING_OFFERS))
+    assert _top_k(scores, 3).tolist() == [0, 1, 3]
+
+def test_top_k():
+    """Partial insertion sort (numba kernel when installed)"""
+    _check_top_k()
+
+def test_top_k_without_numba():
+    """heapq fallback of _top_k"""
+    numba_available = travel_orchestrator.NUMBA_AVAILABLE
+    travel_orchestrator.NUMBA_AVAILABLE = False
+    try:
+        _check_top_k()
+    finally:
+        travel_orchestrator.NUMBA_AVAILABLE = numba_available
+
+def _embedding_service(quantize: bool) -> OptimizedSemanticService:
+    """Service over a fixed random offer matrix, without loading a model or an index"""
+    rng = np.random.default_rng(7)
+    embeddings = rng.standard_normal((40, 16)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    service = OptimizedSemanticService.__new__(OptimizedSemanticService)
+    service.offer_embeddings = embeddings
+    service.quantize_embeddings = quantize
+    service._offer_embeddings_i8 = None
+    service._offer_scales = None
+    return service
+
+def test_quantized_scores_match_float_scores():
+    """int8 scores stay close to the float32 cosine similarities, for the matrix and for some rows"""
+    service = _embedding_service(quantize=True)
+    query = service.offer_embeddings[5]
+    for rows in (None, [0, 5, 9, 33]):
+        matrix = service.offer_embeddings if rows is None else service.offer_embeddings[rows]
+        assert np.allclose(service.score_offers(query, rows), matrix @ query, atol=0.02)
+    assert service.score_offers(query).argmax() == 5
+
+def test_native_dot_scores_match_numpy():
+    """Above the row threshold the numba kernel scores float32 and int8 rows like numpy"""
+    rng = np.random.default_rng(11)
+    rows = optimized_semantic_service._NATIVE_SCORE_MIN_ROWS + 88
+    matrix = rng.standard_normal((rows, 32)).astype(np.float32)
+    query = rng.standard_normal(32).astype(np.float32)
+    matrix_i8 = rng.integers(-127, 128, (rows, 32), dtype=np.int8)
+    query_i8 = rng.integers(-127, 128, 32, dtype=np.int8)
+    
+    simsimd_available = optimized_semantic_service.SIMSIMD_AVAILABLE
+    optimized_semantic_service.SIMSIMD_AVAILABLE = False
+    try:
+        assert np.allclose(optimized_semantic_service._dot_scores(matrix, query), matrix @ query, atol=1e-4)
+        assert np.array_equal(optimized_semantic_service._dot_scores(matrix_i8, query_i8),
+                              matrix_i8.astype(np.int32) @ query_i8.astype(np.int32))
+    finally:
+        optimized_semantic_service.SIMSIMD_AVAILABLE = simsimd_available
+
+def _check_top_offers():
+    """top_offers must return the score_offers ranking, best first, for the matrix and for some rows"""
+    for quantize in (False, True):
+        service = _embedding_service(quantize)
+        query = service.offer_embeddings[3] + 0.5 * service.offer_embeddings[11]
+        query /= np.linalg.norm(query)
+        for rows in (None, [2, 3, 5, 11, 17, 30]):
+            scores = service.score_offers(query, rows)
+            expected_top = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:5]
+            top, top_scores = service.top_offers(query, 5, rows)
+            assert top.tolist() == expected_top
+            assert np.allclose(top_scores, scores[expected_top], atol=1e-5)
+
+def test_top_offers_matches_score_offers():
+    """Fused scoring and selection (numba kernel when installed) against score_offers"""
+    _check_top_offers()
+
+def test_top_offers_matches_score_offers_without_numba():
+    """argsort fallback of top_offers against score_offers"""
+    numba_available = optimized_semantic_service.NUMBA_AVAILABLE
+    optimized_semantic_service.NUMBA_AVAILABLE = False
+    try:
+        _check_top_offers()
+    finally:
+        optimized_semantic_service.NUMBA_AVAILABLE = numba_available
 
 def test_offer_detection():
     """Test the offer detection functionality"""
@@ -34,5 +202,84 @@ def test_offer_detection():
     print(f"📊 Test preferences: {test_preferences}")
     print("✅ Basic test completed!")
 
+def _keyword_pass(user_input: str, has_destination: bool = False):
+    """Keyword preferences of an input with the fixed vocabulary, and whether the LLM would be skipped"""
+    preferences = _fast_extract_preferences(user_input)
+    return preferences, _fast_extraction_suffices(user_input, preferences, _FAST_TERMS, _FAST_TERMS_RE,
+                                                  has_destination)
+
+def test_keyword_pass_defers_negations_and_conflicts_to_llm():
+    """The first keyword hit may be the rejected value, the LLM extraction must decide"""
+    for user_input in ("Pas le Japon, plutôt la Thaïlande en juillet",
+                       "je ne veux pas voyager en famille, Japon en hiver",
+                       "Japon en juillet, finalement en août",
+                       "Japon ou Thaïlande en juillet",
+                       "Japon en juillet pour 10 jours ou 14 jours"):
+        _, suffices = _keyword_pass(user_input)
+        assert not suffices, user_input
+    
+    preferences, suffices = _keyword_pass("Japon en juillet pour 10 jours")
+    assert suffices
+    assert preferences == {'destination': 'Japon', 'travel_dates': 'juillet', 'duration': '10 jours'}
+
+def test_short_input_shortcut_keeps_the_negation_guard():
+    """One keyword is enough for a short reply, but not for a short rejection"""
+    preferences, suffices = _keyword_pass("Japon")
+    assert suffices and preferences == {'destination': 'Japon'}
+    
+    _, suffices = _keyword_pass("10 jours", has_destination=True)
+    assert suffices
+    
+    for user_input in ("pas le Japon", "non, Thaïlande", "not Japan"):
+        _, suffices = _keyword_pass(user_input)
+        assert not suffices, user_input
+    _, suffices = _keyword_pass("pas 10 jours", has_destination=True)
+    assert not suffices
+
+class _PreferenceSettingOrchestrator(TravelOrchestrator):
+    """Orchestrator without LLM calls: a destination input sets it and asks for confirmation"""
+    
+    async def process_user_input(self, user_input, conversation_context):
+        if user_input == 'Japon':
+            self.current_preferences.destination = 'Japon'
+            self.confirmation_pending = True
+        return {'text': 'ok', 'type': 'question'}
+
+def test_evicted_conversation_keeps_its_preferences():
+    """An orchestrator evicted from the LRU is rebuilt from the conversation memory"""
+    pipeline = EnhancedASIAModularPipeline()
+    pipeline._initialized = True
+    pipeline.services = {'memory': MemoryService(), 'data': object(), 'llm': None}
+    
+    max_active = enhanced_modular_pipeline.MAX_ACTIVE_ORCHESTRATORS
+    orchestrator_class = enhanced_modular_pipeline.TravelOrchestrator
+    enhanced_modular_pipeline.MAX_ACTIVE_ORCHESTRATORS = 1
+    enhanced_modular_pipeline.TravelOrchestrator = _PreferenceSettingOrchestrator
+    try:
+        asyncio.run(pipeline.process_user_input('Japon', 'first'))
+        asyncio.run(pipeline.process_user_input('Bonjour', 'second'))
+        assert 'orchestrator_first' not in pipeline._orchestrators
+        
+        response = asyncio.run(pipeline.process_user_input('10 jours', 'first'))
+        orchestrator = pipeline._orchestrators['orchestrator_first']
+        assert response['preferences'] == {'destination': 'Japon'}
+        assert orchestrator.current_preferences.destination == 'Japon'
+        assert orchestrator.confirmation_pending
+    finally:
+        enhanced_modular_pipeline.MAX_ACTIVE_ORCHESTRATORS = max_active
+        enhanced_modular_pipeline.TravelOrchestrator = orchestrator_class
+
 if __name__ == "__main__":
-    test_offer_detection() 
\ No newline at end of file
+    test_offer_detection()
+    test_score_offer_matches_hand_computed_scores()
+    test_batch_scoring_matches_scalar_scorer()
+    test_batch_scoring_matches_scalar_scorer_without_numba()
+    test_top_k()
+    test_top_k_without_numba()
+    test_quantized_scores_match_float_scores()
+    test_native_dot_scores_match_numpy()
+    test_top_offers_matches_score_offers()
+    test_top_offers_matches_score_offers_without_numba()
+    test_keyword_pass_defers_negations_and_conflicts_to_llm()
+    test_short_input_shortcut_keeps_the_negation_guard()
+    test_evicted_conversation_keeps_its_preferences()